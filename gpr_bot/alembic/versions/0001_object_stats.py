@@ -0,0 +1,65 @@
+"""object_stats rollup table
+
+Revision ID: 0001_object_stats
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_object_stats"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "object_stats",
+        sa.Column("object_id", sa.Integer, sa.ForeignKey("objects.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("task_total", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("task_done", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("task_overdue", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("task_in_progress", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("supply_total", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("supply_delayed", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("stage_total", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("stage_accepted", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.func.now()),
+    )
+    op.create_index("ix_tasks_object_status", "tasks", ["object_id", "status"])
+
+    # Backfill — то же, что python -m bot.services.object_stats
+    op.execute("""
+        INSERT INTO object_stats (
+            object_id, task_total, task_done, task_overdue, task_in_progress,
+            supply_total, supply_delayed, stage_total, stage_accepted
+        )
+        SELECT o.id,
+            COALESCE(t.total, 0), COALESCE(t.done, 0), COALESCE(t.overdue, 0), COALESCE(t.in_progress, 0),
+            COALESCE(s.total, 0), COALESCE(s.delayed, 0),
+            COALESCE(st.total, 0), COALESCE(st.accepted, 0)
+        FROM objects o
+        LEFT JOIN (
+            SELECT object_id, COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE status = 'done') AS done,
+                COUNT(*) FILTER (WHERE status = 'overdue') AS overdue,
+                COUNT(*) FILTER (WHERE status = 'in_progress') AS in_progress
+            FROM tasks GROUP BY object_id
+        ) t ON t.object_id = o.id
+        LEFT JOIN (
+            SELECT object_id, COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE status = 'delayed') AS delayed
+            FROM supply_orders GROUP BY object_id
+        ) s ON s.object_id = o.id
+        LEFT JOIN (
+            SELECT object_id, COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE status = 'accepted') AS accepted
+            FROM construction_stages GROUP BY object_id
+        ) st ON st.object_id = o.id
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_tasks_object_status", table_name="tasks")
+    op.drop_table("object_stats")
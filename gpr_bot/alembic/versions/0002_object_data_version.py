@@ -0,0 +1,24 @@
+"""objects.data_version for conditional GET
+
+Revision ID: 0002_object_data_version
+Revises: 0001_object_stats
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_object_data_version"
+down_revision = "0001_object_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "objects",
+        sa.Column("data_version", sa.BigInteger, nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_column("objects", "data_version")
@@ -0,0 +1,29 @@
+"""keyset indexes for notification / AI-chat feeds
+
+Revision ID: 0003_feed_keyset_indexes
+Revises: 0002_object_data_version
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_feed_keyset_indexes"
+down_revision = "0002_object_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_notifications_user_read_created", "notifications",
+        ["user_id", "is_read", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_ai_chat_object_created", "ai_chat_messages",
+        ["object_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_ai_chat_object_created", table_name="ai_chat_messages")
+    op.drop_index("ix_notifications_user_read_created", table_name="notifications")
@@ -0,0 +1,61 @@
+"""notification_counters: unread per (user, type), kept by trigger
+
+Revision ID: 0004_notification_counters
+Revises: 0003_feed_keyset_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_notification_counters"
+down_revision = "0003_feed_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("type", sa.String(50), primary_key=True),
+        sa.Column("unread", sa.Integer, nullable=False, server_default="0"),
+    )
+
+    # Триггер ловит все пути записи: ORM, raw SQL планировщика, массовый UPDATE read-all
+    op.execute("""
+        CREATE FUNCTION notification_counters_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_read IS FALSE THEN
+                UPDATE notification_counters SET unread = unread - 1
+                WHERE user_id = OLD.user_id AND type = OLD.type::text;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_read IS FALSE THEN
+                INSERT INTO notification_counters (user_id, type, unread)
+                VALUES (NEW.user_id, NEW.type::text, 1)
+                ON CONFLICT (user_id, type) DO UPDATE
+                SET unread = notification_counters.unread + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_notification_counters
+        AFTER INSERT OR DELETE OR UPDATE OF is_read, user_id, type ON notifications
+        FOR EACH ROW EXECUTE FUNCTION notification_counters_sync()
+    """)
+
+    # Backfill — то же, что python -m bot.services.notification_center
+    op.execute("""
+        INSERT INTO notification_counters (user_id, type, unread)
+        SELECT user_id, type::text, COUNT(*)
+        FROM notifications
+        WHERE is_read IS FALSE
+        GROUP BY user_id, type
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_notification_counters ON notifications")
+    op.execute("DROP FUNCTION IF EXISTS notification_counters_sync()")
+    op.drop_table("notification_counters")
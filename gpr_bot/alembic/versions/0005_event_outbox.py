@@ -0,0 +1,40 @@
+"""event_outbox: transactional outbox for event side effects
+
+Revision ID: 0005_event_outbox
+Revises: 0004_notification_counters
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0005_event_outbox"
+down_revision = "0004_notification_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "event_outbox",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("event", sa.String(50), nullable=False),
+        sa.Column("idempotency_key", sa.String(255), nullable=False, unique=True),
+        sa.Column("payload", JSONB, nullable=False, server_default="{}"),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text),
+        sa.Column("available_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("processed_at", sa.DateTime),
+    )
+    # Воркеры выбирают только ожидающие — частичный индекс остаётся маленьким
+    op.create_index(
+        "ix_event_outbox_pending", "event_outbox", ["available_at", "id"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_event_outbox_pending", table_name="event_outbox")
+    op.drop_table("event_outbox")
@@ -0,0 +1,41 @@
+"""message_deliveries + unreachable markers on users / object_chats
+
+Revision ID: 0006_message_deliveries
+Revises: 0005_event_outbox
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_message_deliveries"
+down_revision = "0005_event_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("tg_unreachable_at", sa.DateTime))
+    op.add_column("object_chats", sa.Column("unreachable_at", sa.DateTime))
+
+    op.create_table(
+        "message_deliveries",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("chat_id", sa.BigInteger, nullable=False),
+        sa.Column("object_id", sa.Integer, sa.ForeignKey("objects.id", ondelete="SET NULL")),
+        sa.Column("notification_id", sa.Integer, sa.ForeignKey("notifications.id", ondelete="SET NULL")),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("reason", sa.String(255)),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("enqueued_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_message_deliveries_object_created", "message_deliveries", ["object_id", "created_at"])
+    op.create_index("ix_message_deliveries_chat_created", "message_deliveries", ["chat_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_message_deliveries_chat_created", table_name="message_deliveries")
+    op.drop_index("ix_message_deliveries_object_created", table_name="message_deliveries")
+    op.drop_table("message_deliveries")
+    op.drop_column("object_chats", "unreachable_at")
+    op.drop_column("users", "tg_unreachable_at")
@@ -0,0 +1,27 @@
+"""notifications.dedupe_key with a unique partial index
+
+Revision ID: 0007_notification_dedupe_key
+Revises: 0006_message_deliveries
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_notification_dedupe_key"
+down_revision = "0006_message_deliveries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("notifications", sa.Column("dedupe_key", sa.String(255)))
+    # Частичный: обычные уведомления без ключа в индекс не попадают
+    op.create_index(
+        "ux_notifications_dedupe_key", "notifications", ["dedupe_key"], unique=True,
+        postgresql_where=sa.text("dedupe_key IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ux_notifications_dedupe_key", table_name="notifications")
+    op.drop_column("notifications", "dedupe_key")
@@ -0,0 +1,21 @@
+"""daily_plan_fact (object_id, date) index
+
+Revision ID: 0008_daily_plan_fact_object_date
+Revises: 0007_notification_dedupe_key
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0008_daily_plan_fact_object_date"
+down_revision = "0007_notification_dedupe_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Поиск объектов без факта за день и выборки план/факт по объекту за период
+    op.create_index("ix_daily_plan_fact_object_date", "daily_plan_fact", ["object_id", "date"])
+
+
+def downgrade():
+    op.drop_index("ix_daily_plan_fact_object_date", table_name="daily_plan_fact")
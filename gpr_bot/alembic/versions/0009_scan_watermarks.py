@@ -0,0 +1,60 @@
+"""job_watermarks + updated_at maintenance for incremental scheduler scans
+
+Revision ID: 0009_scan_watermarks
+Revises: 0008_daily_plan_fact_object_date
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_scan_watermarks"
+down_revision = "0008_daily_plan_fact_object_date"
+branch_labels = None
+depends_on = None
+
+TABLES = ("tasks", "supply_orders")
+
+
+def upgrade():
+    op.create_table(
+        "job_watermarks",
+        sa.Column("job", sa.String(100), primary_key=True),
+        sa.Column("scanned_until", sa.DateTime, nullable=False),
+        sa.Column("scanned_day", sa.Date, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+    )
+
+    # updated_at есть в модели, но в части инсталляций колонку не создавали
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at timestamp DEFAULT now()")
+        op.execute(f"UPDATE {table} SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+
+    # Инкрементальный скан верит updated_at — триггер ловит и raw SQL, и импорт Excel
+    op.execute("""
+        CREATE FUNCTION touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION touch_updated_at()
+        """)
+
+    op.create_index("ix_tasks_updated_at", "tasks", ["updated_at"])
+    op.create_index("ix_supply_orders_updated_at", "supply_orders", ["updated_at"])
+    op.create_index("ix_supply_orders_status_expected", "supply_orders", ["status", "expected_date"])
+
+
+def downgrade():
+    op.drop_index("ix_supply_orders_status_expected", table_name="supply_orders")
+    op.drop_index("ix_supply_orders_updated_at", table_name="supply_orders")
+    op.drop_index("ix_tasks_updated_at", table_name="tasks")
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS touch_updated_at()")
+    op.drop_table("job_watermarks")
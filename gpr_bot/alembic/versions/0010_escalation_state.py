@@ -0,0 +1,39 @@
+"""escalation_state: due-time indexed escalation of actionable notifications
+
+Revision ID: 0010_escalation_state
+Revises: 0009_scan_watermarks
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_escalation_state"
+down_revision = "0009_scan_watermarks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "escalation_state",
+        sa.Column("notification_id", sa.Integer,
+                  sa.ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("subject_type", sa.String(50)),
+        sa.Column("subject_id", sa.Integer),
+        sa.Column("object_id", sa.Integer, sa.ForeignKey("objects.id", ondelete="SET NULL")),
+        sa.Column("level", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("next_escalation_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+    )
+    # Воркер берёт только созревшие — завершённые (NULL) в индекс не попадают
+    op.create_index(
+        "ix_escalation_state_due", "escalation_state", ["next_escalation_at"],
+        postgresql_where=sa.text("next_escalation_at IS NOT NULL"),
+    )
+    op.create_index("ix_escalation_state_subject", "escalation_state", ["subject_type", "subject_id"])
+
+
+def downgrade():
+    op.drop_index("ix_escalation_state_subject", table_name="escalation_state")
+    op.drop_index("ix_escalation_state_due", table_name="escalation_state")
+    op.drop_table("escalation_state")
@@ -0,0 +1,36 @@
+"""message_deliveries: object_id / notification_id without foreign keys
+
+Revision ID: 0011_message_deliveries_plain_refs
+Revises: 0010_escalation_state
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0011_message_deliveries_plain_refs"
+down_revision = "0010_escalation_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Сообщение ставится в очередь до commit пишущей транзакции: запись о доставке
+    # может сослаться на ещё не закоммиченное (или откаченное) уведомление
+    op.drop_constraint("message_deliveries_notification_id_fkey", "message_deliveries", type_="foreignkey")
+    op.drop_constraint("message_deliveries_object_id_fkey", "message_deliveries", type_="foreignkey")
+
+
+def downgrade():
+    op.execute("""
+        UPDATE message_deliveries SET notification_id = NULL
+        WHERE notification_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM notifications n WHERE n.id = notification_id)
+    """)
+    op.execute("""
+        UPDATE message_deliveries SET object_id = NULL
+        WHERE object_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM objects o WHERE o.id = object_id)
+    """)
+    op.create_foreign_key("message_deliveries_object_id_fkey", "message_deliveries", "objects",
+                          ["object_id"], ["id"], ondelete="SET NULL")
+    op.create_foreign_key("message_deliveries_notification_id_fkey", "message_deliveries", "notifications",
+                          ["notification_id"], ["id"], ondelete="SET NULL")
@@ -0,0 +1,149 @@
+"""
+HTTP-кеширование объектных GET-роутов.
+
+@etag — условный GET по objects.data_version (bot/services/object_changes.py):
+weak ETag W/"{object_id}-{version}", на совпавший If-None-Match — 304 без
+выполнения роута. Ставится внешним декоратором (над @cached).
+
+@cached — кеширование ответов GET-роутов в Redis (bot/services/response_cache.py).
+
+    @router.get("/{object_id}/dashboard")
+    @cached(ttl=120)
+    async def production_dashboard(object_id: int, db: AsyncSession = Depends(get_db)):
+        ...
+
+Ключ — шаблон пути + path/query параметры + роль пользователя (если у роута
+есть зависимость `user`) + data_version объекта, прочитанная до выполнения
+роута (её передаёт @etag, иначе читается по `db`). Ответ, посчитанный до
+чужого commit, ложится под старую версию и новым запросам не достаётся;
+сброс по тегу объекта после commit — только уборка. Ответ тегируется по
+path-параметру `object_id`.
+Тело кешируется уже прошедшим response_model роута (валидация, фильтрация
+полей, response_model_exclude_* — как у самого FastAPI), поэтому HIT и
+MISS отдают то же, что роут без кеша.
+Заголовок запроса `X-Cache-Bypass: 1` — пересчитать в обход кеша.
+Заголовок ответа `X-Cache: HIT | MISS | BYPASS`.
+"""
+import functools
+import inspect
+import json
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from bot.services.response_cache import build_key, cache_get, cache_set, record
+from bot.services.object_changes import get_object_version
+
+BYPASS_HEADER = "X-Cache-Bypass"
+_REQUEST_PARAM = "_cache_request"
+_ETAG_REQUEST = "_etag_request"
+_ETAG_RESPONSE = "_etag_response"
+
+
+def _etag_matches(if_none_match: str | None, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(c.strip().removeprefix("W/") == opaque for c in if_none_match.split(","))
+
+
+def etag(param: str = "object_id"):
+    def decorator(func):
+        sig = inspect.signature(func)
+        # FastAPI передаёт Request только в один параметр — над @cached берём его параметр
+        request_param = next((p.name for p in sig.parameters.values() if p.annotation is Request), None)
+        params = list(sig.parameters.values())
+        if request_param is None:
+            params.append(inspect.Parameter(_ETAG_REQUEST, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        params.append(inspect.Parameter(_ETAG_RESPONSE, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs[request_param] if request_param else kwargs.pop(_ETAG_REQUEST)
+            response: Response = kwargs.pop(_ETAG_RESPONSE)
+            object_id = request.path_params.get(param)
+            db = kwargs.get("db")
+            version = None
+            if object_id is not None and db is not None:
+                version = await get_object_version(db, int(object_id))
+            if version is None:
+                return await func(*args, **kwargs)
+            request.state.data_version = version   # для ключа @cached — без второго запроса
+
+            tag = f'W/"{object_id}-{version}"'
+            headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+            if _etag_matches(request.headers.get("If-None-Match"), tag):
+                return Response(status_code=304, headers=headers)
+
+            result = await func(*args, **kwargs)
+            target = result if isinstance(result, Response) else response
+            target.headers.update(headers)
+            return result
+
+        wrapper.__signature__ = sig.replace(parameters=params)
+        return wrapper
+
+    return decorator
+
+
+async def _data_version(request: Request, param: str, db) -> int | None:
+    version = getattr(request.state, "data_version", None)
+    object_id = request.path_params.get(param)
+    if version is None and object_id is not None and db is not None:
+        version = await get_object_version(db, int(object_id))
+    return version
+
+
+async def _serialize(route, result):
+    """Ответ роута через его response_model (если есть) — кешируется уже отфильтрованное тело."""
+    field = getattr(route, "response_field", None)
+    if field is None:
+        return jsonable_encoder(result)
+    return jsonable_encoder(await serialize_response(
+        field=field, response_content=result,
+        include=route.response_model_include, exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias, exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults, exclude_none=route.response_model_exclude_none,
+    ))
+
+
+def cached(ttl: int = 60, tag_param: str = "object_id"):
+    def decorator(func):
+        sig = inspect.signature(func)
+        params = list(sig.parameters.values())
+        params.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop(_REQUEST_PARAM)
+            route = getattr(request.scope.get("route"), "path", request.url.path)
+            key_params = {**request.path_params, **request.query_params}
+            version = await _data_version(request, tag_param, kwargs.get("db"))
+            if version is not None:
+                key_params["v"] = version
+            user = kwargs.get("user")
+            role = getattr(getattr(user, "role", None), "value", "any")
+            key = build_key(route, key_params, role)
+
+            bypass = request.headers.get(BYPASS_HEADER, "").lower() in ("1", "true", "yes")
+            if not bypass:
+                payload = await cache_get(key)
+                if payload is not None:
+                    await record(route, "hit")
+                    return Response(payload, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            payload = json.dumps(await _serialize(request.scope.get("route"), result), ensure_ascii=False)
+            await cache_set(key, payload, ttl, request.path_params.get(tag_param))
+            outcome = "bypass" if bypass else "miss"
+            await record(route, outcome)
+            return Response(payload, media_type="application/json", headers={"X-Cache": outcome.upper()})
+
+        wrapper.__signature__ = sig.replace(parameters=params)
+        return wrapper
+
+    return decorator
@@ -1,16 +1,22 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select, func, text
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.session import async_session, init_db
 from bot.db.models import (
-    ConstructionObject, ObjectStatus, GPR, GPRItem, Task, TaskStatus,
-    SupplyOrder, SupplyStatus, ConstructionStage, ConstructionStageStatus,
+    GPR, GPRItem, Task, ConstructionStage, ConstructionStageStatus,
     Department, User, ObjectRole,
     FloorVolume, WorkType, DailyPlanFact,
 )
 from bot.rbac.permissions import DEPARTMENT_NAMES
+from bot.services.dashboard_service import build_dashboard
+from bot.services.response_cache import get_stats as get_cache_stats
+from bot.services.outbound import get_metrics as get_outbound_metrics
+from bot.services.burst import get_burst_stats
+from scheduler.metrics import get_job_metrics
+from bot.services.outbox import get_outbox_stats
+from api.cache import cached, etag
 from pydantic import BaseModel
 from datetime import date
 import hashlib, hmac
@@ -24,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache", "X-Next-Cursor"],
 )
 
 
@@ -87,6 +94,8 @@ class ObjectSummary(BaseModel):
 # ─── ROUTES ──────────────────────────────────────────────
 
 @app.get("/api/gpr/{object_id}", response_model=GPROut)
+@etag()
+@cached(ttl=300)
 async def get_gpr(object_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(GPR)
@@ -133,148 +142,11 @@ async def get_gpr(object_id: int, db: AsyncSession = Depends(get_db)):
 
 @app.get("/api/dashboard", response_model=DashboardOut)
 async def get_dashboard(db: AsyncSession = Depends(get_db)):
-    active_objects = (await db.execute(
-        select(func.count(ConstructionObject.id)).where(ConstructionObject.status == ObjectStatus.ACTIVE)
-    )).scalar() or 0
-
-    total_tasks = (await db.execute(select(func.count(Task.id)))).scalar() or 0
-
-    overdue_tasks = (await db.execute(
-        select(func.count(Task.id)).where(Task.status == TaskStatus.OVERDUE)
-    )).scalar() or 0
-
-    completed_tasks = (await db.execute(
-        select(func.count(Task.id)).where(Task.status == TaskStatus.DONE)
-    )).scalar() or 0
-
-    delayed_supplies = (await db.execute(
-        select(func.count(SupplyOrder.id)).where(SupplyOrder.status == SupplyStatus.DELAYED)
-    )).scalar() or 0
-
-    # Per-object summaries
-    objs_result = await db.execute(
-        select(ConstructionObject)
-        .where(ConstructionObject.status.in_([ObjectStatus.ACTIVE, ObjectStatus.PLANNING]))
-        .order_by(ConstructionObject.deadline_date)
-    )
-    objects = []
-    for obj in objs_result.scalars().all():
-        t_total = (await db.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id)
-        )).scalar() or 0
-        t_done = (await db.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.DONE)
-        )).scalar() or 0
-        t_overdue = (await db.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.OVERDUE)
-        )).scalar() or 0
-
-        objects.append({
-            "id": obj.id,
-            "name": obj.name,
-            "city": obj.city,
-            "status": obj.status.value,
-            "deadline_date": obj.deadline_date.isoformat() if obj.deadline_date else None,
-            "task_total": t_total,
-            "task_done": t_done,
-            "task_overdue": t_overdue,
-            "progress_pct": round(t_done / t_total * 100) if t_total > 0 else 0,
-        })
-
-    # ── Production aggregation across all active objects ──
-    production = None
-    try:
-        active_obj_ids = [o["id"] for o in objects]
-        if active_obj_ids:
-            ids_str = ",".join(str(i) for i in active_obj_ids)
-
-            # Total modules (work_type code 'МОД')
-            mod_result = await db.execute(text(f"""
-                SELECT COALESCE(SUM(fv.plan_qty), 0), COALESCE(SUM(fv.fact_qty), 0)
-                FROM floor_volumes fv
-                JOIN work_types wt ON wt.id = fv.work_type_id
-                WHERE fv.object_id IN ({ids_str}) AND wt.code = 'МОД'
-            """))
-            mod_row = mod_result.fetchone()
-
-            # Total brackets
-            brk_result = await db.execute(text(f"""
-                SELECT COALESCE(SUM(fv.plan_qty), 0), COALESCE(SUM(fv.fact_qty), 0)
-                FROM floor_volumes fv
-                JOIN work_types wt ON wt.id = fv.work_type_id
-                WHERE fv.object_id IN ({ids_str}) AND wt.code IN ('КРН-Н', 'КРН-В')
-            """))
-            brk_row = brk_result.fetchone()
-
-            # KPI by work type
-            kpi_result = await db.execute(text(f"""
-                SELECT wt.name, wt.unit,
-                    COALESCE(SUM(fv.plan_qty), 0) as plan,
-                    COALESCE(SUM(fv.fact_qty), 0) as fact
-                FROM floor_volumes fv
-                JOIN work_types wt ON wt.id = fv.work_type_id
-                WHERE fv.object_id IN ({ids_str})
-                GROUP BY wt.name, wt.unit, wt.sequence_order
-                ORDER BY wt.sequence_order
-            """))
-
-            kpi = []
-            for row in kpi_result:
-                p, f = float(row[2]), float(row[3])
-                kpi.append({
-                    "name": row[0], "unit": row[1],
-                    "plan": p, "fact": f,
-                    "pct": round(f / p * 100, 1) if p > 0 else 0,
-                })
-
-            # Per-object production progress
-            obj_prod = []
-            for oid in active_obj_ids:
-                op_result = await db.execute(text("""
-                    SELECT COALESCE(SUM(fv.plan_qty), 0), COALESCE(SUM(fv.fact_qty), 0)
-                    FROM floor_volumes fv
-                    JOIN work_types wt ON wt.id = fv.work_type_id
-                    WHERE fv.object_id = :oid AND wt.code = 'МОД'
-                """), {"oid": oid})
-                op_row = op_result.fetchone()
-                if op_row and float(op_row[0]) > 0:
-                    obj_prod.append({
-                        "object_id": oid,
-                        "modules_plan": int(float(op_row[0])),
-                        "modules_fact": int(float(op_row[1])),
-                        "modules_pct": round(float(op_row[1]) / float(op_row[0]) * 100, 1),
-                    })
-
-            mod_plan = int(float(mod_row[0])) if mod_row else 0
-            mod_fact = int(float(mod_row[1])) if mod_row else 0
-            brk_plan = int(float(brk_row[0])) if brk_row else 0
-            brk_fact = int(float(brk_row[1])) if brk_row else 0
-
-            production = {
-                "modules_plan": mod_plan,
-                "modules_fact": mod_fact,
-                "modules_pct": round(mod_fact / mod_plan * 100, 1) if mod_plan > 0 else 0,
-                "brackets_plan": brk_plan,
-                "brackets_fact": brk_fact,
-                "brackets_pct": round(brk_fact / brk_plan * 100, 1) if brk_plan > 0 else 0,
-                "kpi": kpi,
-                "by_object": obj_prod,
-            }
-    except Exception:
-        production = None
-
-    return DashboardOut(
-        active_objects=active_objects,
-        total_tasks=total_tasks,
-        overdue_tasks=overdue_tasks,
-        completed_tasks=completed_tasks,
-        delayed_supplies=delayed_supplies,
-        objects=objects,
-        production=production,
-    )
+    return DashboardOut(**await build_dashboard(db))
 
 
 @app.get("/api/objects/{object_id}/tasks")
+@etag()
 async def get_object_tasks(
     object_id: int,
     department: str | None = None,
@@ -307,6 +179,7 @@ async def get_object_tasks(
 
 
 @app.get("/api/objects/{object_id}/construction")
+@etag()
 async def get_construction_stages(object_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(ConstructionStage)
@@ -356,3 +229,38 @@ register_miniapp_routes(app)
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Счётчики hit/miss/bypass кеша ответов по роутам."""
+    try:
+        return await get_cache_stats()
+    except Exception as e:
+        raise HTTPException(503, f"Cache unavailable: {e}")
+
+
+@app.get("/api/outbound/stats")
+async def outbound_stats():
+    """Очередь исходящих Telegram-сообщений: глубина, sent/failed/retried, задержка p50/p95,
+    отложенные рассылки планировщика и прогноз их завершения."""
+    try:
+        return {**await get_outbound_metrics(), "bursts": await get_burst_stats()}
+    except Exception as e:
+        raise HTTPException(503, f"Outbound queue unavailable: {e}")
+
+
+@app.get("/api/scheduler/metrics")
+async def scheduler_metrics():
+    """Задачи планировщика: прогоны, ошибки, долгие/пропущенные, объёмы, гистограмма длительности."""
+    try:
+        return await get_job_metrics()
+    except Exception as e:
+        raise HTTPException(503, f"Scheduler metrics unavailable: {e}")
+
+
+@app.get("/api/outbox/stats")
+async def outbox_stats():
+    """Outbox событий: pending/done/failed и возраст самого старого ожидающего."""
+    async with async_session() as session:
+        return await get_outbox_stats(session)
@@ -1,8 +1,10 @@
 """Analytics API — AI-powered анализ данных проекта (Kimi / Anthropic / OpenAI-compatible)"""
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text, select, desc
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import text, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from bot.db.session import async_session
+from api.cache import cached, etag
+from bot.services.keyset import CURSOR_HEADER, keyset_page
 from bot.db.models import ConstructionObject, AIChatMessage
 from pydantic import BaseModel
 from typing import Optional
@@ -242,22 +244,26 @@ async def ask_analytics(req: AskRequest, db: AsyncSession = Depends(get_db)):
 @router.get("/history/{object_id}")
 async def get_chat_history(
     object_id: int,
+    response: Response,
     telegram_id: int | None = None,
-    limit: int = Query(default=50, le=200),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Получить историю AI-чата по объекту"""
-    query = (
-        select(AIChatMessage)
-        .where(AIChatMessage.object_id == object_id)
-        .order_by(desc(AIChatMessage.created_at))
-        .limit(limit)
-    )
+    """Получить историю AI-чата по объекту (более ранние — ?cursor= из X-Next-Cursor)"""
+    query = select(AIChatMessage).where(AIChatMessage.object_id == object_id)
     if telegram_id:
         query = query.where(AIChatMessage.telegram_id == telegram_id)
 
-    result = await db.execute(query)
-    messages = result.scalars().all()
+    try:
+        page = await keyset_page(
+            db, query, AIChatMessage.created_at, AIChatMessage.id, cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if page.next_cursor:
+        response.headers[CURSOR_HEADER] = page.next_cursor
+    messages = page.items
 
     return [
         {
@@ -336,6 +342,8 @@ async def get_sheets_import_url(object_id: int, db: AsyncSession = Depends(get_d
 
 
 @router.get("/{object_id}/summary")
+@etag()
+@cached(ttl=120)
 async def project_summary(object_id: int, db: AsyncSession = Depends(get_db)):
     """Сводка по проекту без AI — чистые данные"""
     obj = await db.get(ConstructionObject, object_id)
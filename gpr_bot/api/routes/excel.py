@@ -4,6 +4,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from bot.db.session import async_session
+from bot.services.object_changes import mark_object_changed
 from bot.db.models import (
     Crew, WorkType, FloorVolume, GPRWeekly, DailyProgress,
     DailyPlanFact, ConstructionObject,
@@ -157,6 +158,7 @@ async def import_excel(
             db.add(pf)
             stats["plan_fact"] += 1
 
+    mark_object_changed(db, object_id)
     await db.commit()
     return {"status": "ok", "object_id": object_id, "imported": stats}
 
@@ -6,7 +6,7 @@ Mount these on the existing FastAPI app in main.py:
     register_miniapp_routes(app)
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -36,6 +36,20 @@ def register_miniapp_routes(app: FastAPI):
         has_permission, get_user_permissions,
     )
     from bot.config import get_settings
+    from bot.services.batch_loader import get_loaders
+    from bot.services.object_stats import refresh_object_stats
+    from bot.services.object_changes import mark_object_changed
+    from bot.services.object_detail import load_object_detail
+    from api.cache import etag
+    from bot.services.outbox import event_key
+    from bot.services.delivery_log import failure_rates
+    from bot.services.escalation_state import acknowledge, acknowledge_subject
+    from bot.services.event_engine import publish_task_assigned, publish_task_status_changed
+    from bot.services.keyset import CURSOR_HEADER, keyset_page
+    from bot.services.notification_center import (
+        NOTIF_CATEGORY_MAP, NOTIF_PRIORITY_MAP, category_clause,
+        get_unread_by_type, summarize_unread, mark_all_read as mark_all_notifications_read,
+    )
 
     settings = get_settings()
 
@@ -158,23 +172,15 @@ def register_miniapp_routes(app: FastAPI):
             select(ObjectRole).options(selectinload(ObjectRole.object))
             .where(ObjectRole.user_id == user.id)
         )
+        obj_roles = [r for r in obj_roles_result.scalars().all() if r.object]
+        stats = await get_loaders(db).object_stats.load_many([r.object.id for r in obj_roles])
         objects = []
-        for r in obj_roles_result.scalars().all():
-            if not r.object:
-                continue
-            t_total = (await db.execute(
-                select(func.count(Task.id)).where(Task.object_id == r.object.id)
-            )).scalar() or 0
-            t_done = (await db.execute(
-                select(func.count(Task.id)).where(
-                    Task.object_id == r.object.id, Task.status == TaskStatus.DONE
-                )
-            )).scalar() or 0
+        for r, st in zip(obj_roles, stats):
             objects.append({
                 "id": r.object.id, "name": r.object.name, "city": r.object.city,
                 "status": r.object.status.value, "role": r.role.value,
                 "role_name": ROLE_NAMES.get(r.role, r.role.value),
-                "progress_pct": round(t_done / t_total * 100) if t_total > 0 else 0,
+                "progress_pct": round(st["task_done"] / st["task_total"] * 100) if st["task_total"] > 0 else 0,
             })
 
         # Supervisor: find from ObjectRole or org hierarchy
@@ -374,16 +380,21 @@ def register_miniapp_routes(app: FastAPI):
 
     @app.get("/api/profile/activity")
     async def get_profile_activity(
-        limit: int = 30,
+        response: Response,
+        limit: int = Query(30, ge=1, le=200),
+        cursor: str | None = None,
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
     ):
-        result = await db.execute(
-            select(AuditLog)
-            .where(AuditLog.user_id == user.id)
-            .order_by(AuditLog.created_at.desc())
-            .limit(limit)
-        )
-        logs = result.scalars().all()
+        try:
+            page = await keyset_page(
+                db, select(AuditLog).where(AuditLog.user_id == user.id),
+                AuditLog.created_at, AuditLog.id, cursor=cursor, limit=limit,
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        if page.next_cursor:
+            response.headers[CURSOR_HEADER] = page.next_cursor
+        logs = page.items
 
         ACTION_LABELS = {
             "task.create": "Создал задачу",
@@ -500,23 +511,15 @@ def register_miniapp_routes(app: FastAPI):
             ).order_by(ConstructionObject.deadline_date)
 
         objs = (await db.execute(q)).scalars().all()
+        stats = await get_loaders(db).object_stats.load_many([obj.id for obj in objs])
         result = []
-        for obj in objs:
-            t_total = (await db.execute(
-                select(func.count(Task.id)).where(Task.object_id == obj.id)
-            )).scalar() or 0
-            t_done = (await db.execute(
-                select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.DONE)
-            )).scalar() or 0
-            t_overdue = (await db.execute(
-                select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.OVERDUE)
-            )).scalar() or 0
+        for obj, st in zip(objs, stats):
             result.append({
                 "id": obj.id, "name": obj.name, "city": obj.city,
                 "status": obj.status.value,
                 "deadline_date": obj.deadline_date.isoformat() if obj.deadline_date else None,
-                "task_total": t_total, "task_done": t_done, "task_overdue": t_overdue,
-                "progress_pct": round(t_done / t_total * 100) if t_total > 0 else 0,
+                "task_total": st["task_total"], "task_done": st["task_done"], "task_overdue": st["task_overdue"],
+                "progress_pct": round(st["task_done"] / st["task_total"] * 100) if st["task_total"] > 0 else 0,
             })
         return result
 
@@ -524,32 +527,21 @@ def register_miniapp_routes(app: FastAPI):
 
     @app.get("/api/objects/{object_id}")
     async def get_object_detail(object_id: int, user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-        obj = (await db.execute(
-            select(ConstructionObject).where(ConstructionObject.id == object_id)
-        )).scalar_one_or_none()
-        if not obj:
+        detail = await load_object_detail(db, object_id)
+        if not detail:
             raise HTTPException(404, "Object not found")
+        obj = detail["object"]
 
-        # Team
-        team_result = await db.execute(
-            select(ObjectRole).options(selectinload(ObjectRole.user))
-            .where(ObjectRole.object_id == object_id)
-        )
         team = [
-            {"user_id": r.user.id, "full_name": r.user.full_name,
-             "role": r.role.value, "role_name": ROLE_NAMES.get(r.role, r.role.value)}
-            for r in team_result.scalars().all() if r.user
+            {"user_id": m["user_id"], "full_name": m["full_name"],
+             "role": m["role"], "role_name": ROLE_NAMES.get(UserRole(m["role"]), m["role"])}
+            for m in detail["team"]
         ]
 
-        # Stats
-        t_total = (await db.execute(select(func.count(Task.id)).where(Task.object_id == object_id))).scalar() or 0
-        t_done = (await db.execute(select(func.count(Task.id)).where(Task.object_id == object_id, Task.status == TaskStatus.DONE))).scalar() or 0
-        t_overdue = (await db.execute(select(func.count(Task.id)).where(Task.object_id == object_id, Task.status == TaskStatus.OVERDUE))).scalar() or 0
-        t_progress = (await db.execute(select(func.count(Task.id)).where(Task.object_id == object_id, Task.status == TaskStatus.IN_PROGRESS))).scalar() or 0
-        s_total = (await db.execute(select(func.count(SupplyOrder.id)).where(SupplyOrder.object_id == object_id))).scalar() or 0
-        s_delayed = (await db.execute(select(func.count(SupplyOrder.id)).where(SupplyOrder.object_id == object_id, SupplyOrder.status == SupplyStatus.DELAYED))).scalar() or 0
-        st_total = (await db.execute(select(func.count(ConstructionStage.id)).where(ConstructionStage.object_id == object_id))).scalar() or 0
-        st_accepted = (await db.execute(select(func.count(ConstructionStage.id)).where(ConstructionStage.object_id == object_id, ConstructionStage.status == ConstructionStageStatus.ACCEPTED))).scalar() or 0
+        st = detail["stats"]
+        t_total, t_done, t_overdue, t_progress = st["task_total"], st["task_done"], st["task_overdue"], st["task_in_progress"]
+        s_total, s_delayed = st["supply_total"], st["supply_delayed"]
+        st_total, st_accepted = st["stage_total"], st["stage_accepted"]
 
         return {
             "id": obj.id, "name": obj.name, "city": obj.city, "address": obj.address,
@@ -573,6 +565,7 @@ def register_miniapp_routes(app: FastAPI):
     async def update_task_status(
         task_id: int, body: UpdateStatusBody,
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = Header(None),
     ):
         task = (await db.execute(select(Task).where(Task.id == task_id))).scalar_one_or_none()
         if not task:
@@ -591,6 +584,9 @@ def register_miniapp_routes(app: FastAPI):
         task.updated_at = datetime.utcnow()
         if new_status == TaskStatus.DONE:
             task.completed_at = datetime.utcnow()
+        if new_status != TaskStatus.ASSIGNED:
+            # Задача сдвинулась — назначение больше не ждёт ответа
+            await acknowledge_subject(db, "task", task.id)
 
         await write_audit(db, user.id, "task.status_change", "task", task.id,
                           {"status": old_status}, {"status": new_status.value})
@@ -599,15 +595,12 @@ def register_miniapp_routes(app: FastAPI):
             comment = TaskComment(task_id=task.id, user_id=user.id, text=body.comment)
             db.add(comment)
 
+        await refresh_object_stats(db, task.object_id)
+        # Уведомления разошлёт воркер outbox после commit
+        await publish_task_status_changed(db, task, old_status, user,
+                                          event_key(f"task_status:{task.id}", idempotency_key))
         await db.commit()
 
-        # Fire event engine
-        try:
-            from bot.services.event_engine import on_task_status_changed
-            await on_task_status_changed(db, task, old_status, changed_by=user)
-        except Exception as e:
-            logger.warning(f"Event engine error (task status): {e}")
-
         return {"id": task.id, "status": task.status.value, "ok": True}
 
     # ── Task creation ──
@@ -616,6 +609,7 @@ def register_miniapp_routes(app: FastAPI):
     async def create_task(
         object_id: int, body: CreateTaskBody,
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = Header(None),
     ):
         if not has_permission(user.role, "task.create"):
             raise HTTPException(403, "No permission to create tasks")
@@ -632,15 +626,10 @@ def register_miniapp_routes(app: FastAPI):
 
         await write_audit(db, user.id, "task.create", "task", task.id,
                           None, {"title": body.title, "department": body.department})
-        await db.commit()
-
-        # Fire event engine — notify assignee
+        await refresh_object_stats(db, object_id)
         if task.assignee_id:
-            try:
-                from bot.services.event_engine import on_task_assigned
-                await on_task_assigned(db, task, assigned_by=user)
-            except Exception as e:
-                logger.warning(f"Event engine error (task assign): {e}")
+            await publish_task_assigned(db, task, user, event_key(f"task_assigned:{task.id}", idempotency_key))
+        await db.commit()
 
         return {"id": task.id, "title": task.title, "status": task.status.value}
 
@@ -657,6 +646,7 @@ def register_miniapp_routes(app: FastAPI):
 
         comment = TaskComment(task_id=task_id, user_id=user.id, text=body.text)
         db.add(comment)
+        mark_object_changed(db, task.object_id)
         await db.commit()
         await db.refresh(comment)
         return {"id": comment.id, "user": user.full_name, "text": comment.text,
@@ -735,12 +725,16 @@ def register_miniapp_routes(app: FastAPI):
 
         await write_audit(db, user.id, "gpr.sign", "gpr", gpr_id,
                           None, {"signed": True, "comment": body.comment})
+        gpr = await db.get(GPR, gpr_id)
+        if gpr:
+            mark_object_changed(db, gpr.object_id)
         await db.commit()
         return {"ok": True}
 
     # ── Supply orders ──
 
     @app.get("/api/objects/{object_id}/supply")
+    @etag()
     async def get_supply_orders(object_id: int, user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
         result = await db.execute(
             select(SupplyOrder)
@@ -803,6 +797,9 @@ def register_miniapp_routes(app: FastAPI):
 
         await write_audit(db, user.id, "checklist.toggle", "checklist_item", item_id,
                           {"is_done": not item.is_done}, {"is_done": item.is_done})
+        stage = await db.get(ConstructionStage, item.stage_id)
+        if stage:
+            mark_object_changed(db, stage.object_id)
         await db.commit()
         return {"ok": True, "is_done": item.is_done}
 
@@ -810,28 +807,6 @@ def register_miniapp_routes(app: FastAPI):
     # ══  NOTIFICATION CENTER  ════════════════════════════════
     # ══════════════════════════════════════════════════════════
 
-    NOTIF_CATEGORY_MAP = {
-        "task_assigned": "tasks", "task_overdue": "tasks", "task_completed": "tasks",
-        "task_blocked": "tasks", "plan_fact_request": "tasks", "plan_fact_overdue": "tasks",
-        "gpr_sign_request": "gpr", "gpr_signed": "gpr", "gpr_all_signed": "gpr",
-        "supply_delayed": "supply", "supply_shipped": "supply", "supply_received": "supply",
-        "material_shipped": "supply", "material_received": "supply", "cascade_shift": "supply",
-        "stage_completed": "construction", "stage_rejected": "construction",
-        "construction_stage_done": "construction", "defect_reported": "construction",
-        "defect_resolved": "construction", "kmd_issued": "construction",
-        "escalation_l1": "escalation", "escalation_l2": "escalation",
-        "escalation_l3": "escalation",
-        "weekly_audit": "system", "object_status_change": "system", "general": "system",
-    }
-
-    NOTIF_PRIORITY_MAP = {
-        "task_overdue": "high", "task_blocked": "high",
-        "gpr_sign_request": "high", "supply_delayed": "high",
-        "defect_reported": "critical",
-        "escalation_l1": "high", "escalation_l2": "critical", "escalation_l3": "critical",
-        "plan_fact_overdue": "high", "cascade_shift": "high",
-    }
-
     # Actions per notification type (served to frontend)
     NOTIF_ACTIONS = {
         "task_assigned": [
@@ -926,26 +901,31 @@ def register_miniapp_routes(app: FastAPI):
 
     @app.get("/api/notifications")
     async def get_notifications(
-        limit: int = 50,
+        response: Response,
+        limit: int = Query(50, ge=1, le=200),
         category: str | None = None,
         unread_only: bool = False,
+        cursor: str | None = None,
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
     ):
+        """Лента уведомлений; следующая страница — ?cursor= из заголовка X-Next-Cursor."""
         query = select(Notification).where(Notification.user_id == user.id)
 
         if unread_only:
             query = query.where(Notification.is_read == False)
-
-        query = query.order_by(Notification.created_at.desc()).limit(limit)
-        result = await db.execute(query)
-        all_notifs = result.scalars().all()
-
-        # Filter by category in Python (type → category mapping)
-        serialized = [_serialize_notification(n) for n in all_notifs]
         if category:
-            serialized = [n for n in serialized if n["category"] == category]
+            query = query.where(category_clause(category))
 
-        return serialized
+        try:
+            page = await keyset_page(
+                db, query, Notification.created_at, Notification.id, cursor=cursor, limit=limit,
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        if page.next_cursor:
+            response.headers[CURSOR_HEADER] = page.next_cursor
+
+        return [_serialize_notification(n) for n in page.items]
 
     # ── GET /notifications/summary ──
 
@@ -953,36 +933,8 @@ def register_miniapp_routes(app: FastAPI):
     async def notification_summary(
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
     ):
-        result = await db.execute(
-            select(Notification)
-            .where(Notification.user_id == user.id, Notification.is_read == False)
-        )
-        unread = result.scalars().all()
-
-        by_category: dict[str, int] = {}
-        critical_count = 0
-        pending_actions = 0
-        escalations = 0
-
-        for n in unread:
-            ntype = n.type.value if hasattr(n.type, 'value') else str(n.type)
-            cat = NOTIF_CATEGORY_MAP.get(ntype, "system")
-            by_category[cat] = by_category.get(cat, 0) + 1
-
-            if NOTIF_PRIORITY_MAP.get(ntype) in ("critical", "high"):
-                critical_count += 1
-            if ntype in NOTIF_ACTIONS:
-                pending_actions += 1
-            if ntype.startswith("escalation_"):
-                escalations += 1
-
-        return {
-            "total_unread": len(unread),
-            "critical_unread": critical_count,
-            "by_category": by_category,
-            "pending_actions": pending_actions,
-            "escalations_active": escalations,
-        }
+        by_type = await get_unread_by_type(db, user.id)
+        return summarize_unread(by_type, NOTIF_ACTIONS)
 
     # ── POST /notifications/{id}/read ──
 
@@ -1007,23 +959,21 @@ def register_miniapp_routes(app: FastAPI):
         body: MarkAllReadBody,
         user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
     ):
-        result = await db.execute(
-            select(Notification)
-            .where(Notification.user_id == user.id, Notification.is_read == False)
-        )
-        unread = result.scalars().all()
-
-        count = 0
-        for n in unread:
-            ntype = n.type.value if hasattr(n.type, 'value') else str(n.type)
-            cat = NOTIF_CATEGORY_MAP.get(ntype, "system")
-            if body.category is None or cat == body.category:
-                n.is_read = True
-                count += 1
-
+        count = await mark_all_notifications_read(db, user.id, body.category)
         await db.commit()
         return {"ok": True, "count": count}
 
+    # ── GET /admin/delivery-failures ──
+
+    @app.get("/api/admin/delivery-failures")
+    async def delivery_failures(
+        days: int = Query(7, ge=1, le=90),
+        user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db),
+    ):
+        if not has_permission(user.role, "admin.view_audit"):
+            raise HTTPException(403, "No permission")
+        return {"days": days, "objects": await failure_rates(db, days)}
+
     # ── POST /notifications/action (inline action handler) ──
 
     class NotifActionBody(BaseModel):
@@ -1047,6 +997,7 @@ def register_miniapp_routes(app: FastAPI):
         action = body.action_key
         result_msg = None
         status_changed = None
+        stats_object_id = None
 
         # ── Task actions ──
         if ntype == "task_assigned" and action == "accept":
@@ -1055,6 +1006,7 @@ def register_miniapp_routes(app: FastAPI):
                 if task:
                     task.status = TaskStatus.IN_PROGRESS
                     status_changed = "in_progress"
+                    stats_object_id = task.object_id
                     result_msg = f"Задача «{task.title}» принята в работу"
 
         elif ntype == "task_completed" and action == "approve":
@@ -1063,6 +1015,7 @@ def register_miniapp_routes(app: FastAPI):
                 if task:
                     task.status = TaskStatus.DONE
                     status_changed = "done"
+                    stats_object_id = task.object_id
                     result_msg = f"Задача «{task.title}» принята"
 
         elif ntype == "task_completed" and action == "reject":
@@ -1071,6 +1024,7 @@ def register_miniapp_routes(app: FastAPI):
                 if task:
                     task.status = TaskStatus.IN_PROGRESS
                     status_changed = "in_progress"
+                    stats_object_id = task.object_id
                     result_msg = "Задача возвращена исполнителю"
 
         # ── GPR sign ──
@@ -1084,6 +1038,9 @@ def register_miniapp_routes(app: FastAPI):
                     sig.signed = True
                     sig.signed_at = datetime.utcnow()
                     status_changed = "signed"
+                    signed_gpr = await db.get(GPR, notif.entity_id)
+                    if signed_gpr:
+                        mark_object_changed(db, signed_gpr.object_id)
                     result_msg = "ГПР подписан"
 
                     # Check if all signed → activate object
@@ -1112,6 +1069,7 @@ def register_miniapp_routes(app: FastAPI):
                 if order:
                     order.status = SupplyStatus.DELIVERED
                     status_changed = "delivered"
+                    stats_object_id = order.object_id
                     result_msg = "Материал принят. ТТН зафиксирована."
                     # Side-effect: generate quality check task (СМР-002)
                     # Пробел → fire MATERIAL_RECEIVED event via TriggerEngine
@@ -1131,6 +1089,7 @@ def register_miniapp_routes(app: FastAPI):
                 if stage:
                     stage.status = ConstructionStageStatus.ACCEPTED
                     status_changed = "accepted"
+                    stats_object_id = stage.object_id
                     result_msg = "Этап принят Технадзором"
 
         elif ntype == "construction_stage_done" and action == "reject_stage":
@@ -1141,6 +1100,7 @@ def register_miniapp_routes(app: FastAPI):
                 if stage:
                     stage.status = ConstructionStageStatus.REJECTED
                     status_changed = "rejected"
+                    stats_object_id = stage.object_id
                     result_msg = "Этап отклонён. Замечания направлены."
 
         # ── Escalation actions ──
@@ -1152,8 +1112,9 @@ def register_miniapp_routes(app: FastAPI):
         if not result_msg:
             result_msg = f"Действие «{action}» выполнено"
 
-        # Mark notification as read + actioned
+        # Mark notification as read + actioned — эскалация по нему больше не нужна
         notif.is_read = True
+        await acknowledge(db, notif.id)
 
         # Audit log
         await write_audit(
@@ -1162,6 +1123,7 @@ def register_miniapp_routes(app: FastAPI):
             None, {"action": action, "notification_type": ntype},
         )
 
+        await refresh_object_stats(db, stats_object_id)
         await db.commit()
 
         return {
@@ -1220,20 +1182,10 @@ def register_miniapp_routes(app: FastAPI):
             select(User).where(User.is_active == True).order_by(User.full_name)
         )
         all_users = result.scalars().all()
+        # Active objects per user — one grouped query
+        obj_counts = await get_loaders(db).active_objects_by_user.load_many([u.id for u in all_users])
         output = []
-        for u in all_users:
-            # Count active objects for each user
-            obj_count = (await db.execute(
-                select(func.count(ObjectRole.id))
-                .join(ConstructionObject, ObjectRole.object_id == ConstructionObject.id)
-                .where(
-                    ObjectRole.user_id == u.id,
-                    ConstructionObject.status.in_([
-                        ObjectStatus.ACTIVE, ObjectStatus.PLANNING,
-                    ]),
-                )
-            )).scalar() or 0
-
+        for u, obj_count in zip(all_users, obj_counts):
             output.append({
                 "id": u.id,
                 "full_name": u.full_name,
@@ -1718,6 +1670,7 @@ def register_miniapp_routes(app: FastAPI):
         entries: list[FactEntry]
 
     @app.get("/api/objects/{object_id}/fact-entry")
+    @etag()
     async def get_fact_entry_data(object_id: int, floor: int | None = None, facade: str | None = None, db: AsyncSession = Depends(get_db)):
         """Получить данные для внесения факта — этажи/фасады с план/факт"""
         from bot.db.models import FloorVolume, WorkType
@@ -1785,6 +1738,7 @@ def register_miniapp_routes(app: FastAPI):
                 fv.status = "not_started"
             updated += 1
 
+        mark_object_changed(db, object_id)
         await db.commit()
         return {"updated": updated, "total": len(req.entries)}
 
@@ -5,6 +5,8 @@ from sqlalchemy import select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.session import async_session
+from api.cache import cached, etag
+from bot.services.columnar import to_columnar
 from bot.db.models import (
     Crew, WorkType, FloorVolume, GPRWeekly, DailyProgress,
     DailyPlanFact, ConstructionObject,
@@ -62,6 +64,10 @@ class FloorVolumeOut(BaseModel):
     inspection_floor: str
 
 
+FLOOR_VOLUME_COLUMNS = list(FloorVolumeOut.model_fields)
+FLOOR_VOLUME_DICT_COLUMNS = {"facade", "work_code", "work_name", "status", "inspection_brackets", "inspection_floor"}
+
+
 class DailyProgressOut(BaseModel):
     date: date
     day_number: int | None
@@ -116,6 +122,8 @@ async def list_work_types(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{object_id}/dashboard", response_model=DashboardProductionOut)
+@etag()
+@cached(ttl=120)
 async def production_dashboard(object_id: int, db: AsyncSession = Depends(get_db)):
     obj = await db.get(ConstructionObject, object_id)
     if not obj:
@@ -189,43 +197,55 @@ async def production_dashboard(object_id: int, db: AsyncSession = Depends(get_db
 
 
 @router.get("/{object_id}/floor-volumes")
+@etag()
 async def get_floor_volumes(
     object_id: int,
     floor: int | None = None,
     facade: str | None = None,
     work_code: str | None = None,
+    format: str | None = Query(None, pattern="^(rows|columnar)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    q = text("""
+    """Объёмы по этажам/фасадам. format=columnar — параллельные массивы (bot/services/columnar.py)."""
+    where = ["fv.object_id = :oid"]
+    params = {"oid": object_id}
+    if floor:
+        where.append("fv.floor = :floor")
+        params["floor"] = floor
+    if facade:
+        where.append("strpos(fv.facade, :facade) > 0")
+        params["facade"] = facade
+    if work_code:
+        where.append("wt.code = :work_code")
+        params["work_code"] = work_code
+
+    q = text(f"""
         SELECT fv.floor, fv.facade, wt.code, wt.name,
             fv.plan_qty, fv.fact_qty,
             CASE WHEN fv.plan_qty > 0 THEN ROUND(fv.fact_qty / fv.plan_qty * 100, 1) ELSE 0 END as pct,
             fv.status, fv.inspection_brackets, fv.inspection_floor
         FROM floor_volumes fv
         JOIN work_types wt ON wt.id = fv.work_type_id
-        WHERE fv.object_id = :oid
+        WHERE {" AND ".join(where)}
         ORDER BY fv.floor, fv.facade, wt.sequence_order
     """)
-    result = await db.execute(q, {"oid": object_id})
-    rows = result.fetchall()
-
-    data = []
-    for r in rows:
-        if floor and r[0] != floor:
-            continue
-        if facade and facade not in r[1]:
-            continue
-        if work_code and r[2] != work_code:
-            continue
-        data.append(FloorVolumeOut(
+    rows = (await db.execute(q, params)).fetchall()
+
+    if format == "columnar":
+        return to_columnar(rows, FLOOR_VOLUME_COLUMNS, FLOOR_VOLUME_DICT_COLUMNS)
+
+    return [
+        FloorVolumeOut(
             floor=r[0], facade=r[1], work_code=r[2], work_name=r[3],
             plan_qty=float(r[4]), fact_qty=float(r[5]), pct=float(r[6]),
             status=r[7], inspection_brackets=r[8], inspection_floor=r[9],
-        ))
-    return data
+        )
+        for r in rows
+    ]
 
 
 @router.get("/{object_id}/daily-progress", response_model=list[DailyProgressOut])
+@etag()
 async def get_daily_progress(
     object_id: int,
     week: str | None = None,
@@ -239,6 +259,8 @@ async def get_daily_progress(
 
 
 @router.get("/{object_id}/gpr-weekly")
+@etag()
+@cached(ttl=300)
 async def get_gpr_weekly(object_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(text("""
         SELECT wt.code, wt.name, wt.unit,
@@ -274,6 +296,7 @@ async def get_gpr_weekly(object_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{object_id}/plan-fact")
+@etag()
 async def get_plan_fact(
     object_id: int,
     date_from: date | None = None,
@@ -2,10 +2,12 @@
 Production Chain API routes — zones, BOM, materials, warehouse, shipments
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.session import async_session
+from bot.services.batch_loader import get_loaders
+from api.cache import cached, etag
 from bot.db.models import (
     Zone, BOMItem, Material, ProductionPlan, ElementStatus,
     Warehouse, Shipment, ConstructionObject, ObjectChat,
@@ -22,6 +24,7 @@ async def get_db():
 # ── Zones ────────────────────────────────────────────────
 
 @router.get("/{object_id}/zones")
+@etag()
 async def get_zones(object_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(Zone)
@@ -30,18 +33,12 @@ async def get_zones(object_id: int, db: AsyncSession = Depends(get_db)):
     )
     zones = result.scalars().all()
 
-    output = []
-    for z in zones:
-        # Count BOM items per zone
-        bom_total = (await db.execute(
-            select(func.count(BOMItem.id)).where(BOMItem.zone_id == z.id)
-        )).scalar() or 0
-        bom_completed = (await db.execute(
-            select(func.count(BOMItem.id)).where(
-                BOMItem.zone_id == z.id, BOMItem.status == 'completed'
-            )
-        )).scalar() or 0
+    # BOM items per zone — one grouped query
+    bom_stats = await get_loaders(db).bom_stats.load_many([z.id for z in zones])
 
+    output = []
+    for z, bs in zip(zones, bom_stats):
+        bom_total, bom_completed = bs["total"], bs["completed"]
         output.append({
             "id": z.id,
             "name": z.name,
@@ -62,6 +59,7 @@ async def get_zones(object_id: int, db: AsyncSession = Depends(get_db)):
 # ── BOM Items (per zone) ─────────────────────────────────
 
 @router.get("/{object_id}/zones/{zone_id}/bom")
+@etag()
 async def get_bom_items(object_id: int, zone_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(BOMItem).where(BOMItem.zone_id == zone_id).order_by(BOMItem.mark)
@@ -131,6 +129,7 @@ async def get_materials(object_id: int, db: AsyncSession = Depends(get_db)):
 # ── Warehouse (per object via zones) ─────────────────────
 
 @router.get("/{object_id}/warehouse")
+@etag()
 async def get_warehouse(object_id: int, db: AsyncSession = Depends(get_db)):
     # Get all zones for this object
     zone_ids = (await db.execute(
@@ -194,6 +193,7 @@ async def get_warehouse(object_id: int, db: AsyncSession = Depends(get_db)):
 # ── Shipments ────────────────────────────────────────────
 
 @router.get("/{object_id}/shipments")
+@etag()
 async def get_shipments(object_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(Shipment)
@@ -230,6 +230,8 @@ STAGE_LABELS = {
 
 
 @router.get("/{object_id}/element-status")
+@etag()
+@cached(ttl=120)
 async def get_element_status(object_id: int, db: AsyncSession = Depends(get_db)):
     """Get element tracking pipeline — BOM items grouped by production stage."""
     # Get all zones for this object
@@ -331,6 +333,7 @@ async def get_object_chats(object_id: int, db: AsyncSession = Depends(get_db)):
 # ── Production Plan (per object) ─────────────────────────
 
 @router.get("/{object_id}/production-plan")
+@etag()
 async def get_production_plan(object_id: int, db: AsyncSession = Depends(get_db)):
     """Get production plan grouped by workshop and line."""
     # Get zones → BOM items for this object
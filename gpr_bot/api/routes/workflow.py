@@ -4,6 +4,7 @@ from sqlalchemy import select, text, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.session import async_session
+from bot.services.object_changes import mark_object_changed
 from bot.db.models import (
     WorkflowTemplate, WorkflowTemplateStep,
     WorkflowInstance, WorkflowInstanceStep,
@@ -94,6 +95,7 @@ async def create_workflow_instance(object_id: int, template_id: int = 1, db: Asy
         db.add(step)
         current_date = planned_end  # sequential by default
 
+    mark_object_changed(db, object_id)
     await db.commit()
     return {"instance_id": instance.id, "steps_created": len(template_steps)}
 
@@ -209,5 +211,8 @@ async def update_step(step_id: int, req: StepUpdateRequest, db: AsyncSession = D
     if req.assignee_id is not None:
         step.assignee_id = req.assignee_id
 
+    instance = await db.get(WorkflowInstance, step.instance_id)
+    if instance:
+        mark_object_changed(db, instance.object_id)
     await db.commit()
     return {"id": step.id, "status": step.status, "name": step.name}
@@ -0,0 +1,55 @@
+"""
+Общее для бенчмарков: замер p50/p95 и сессия, откатываемая в конце.
+
+Бенчмарки ходят в настоящую БД из DATABASE_URL; всё, что они сеют,
+живёт в одной транзакции и откатывается — данные стенда не меняются.
+"""
+import statistics
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from bot.db.models import ConstructionObject, ObjectStatus, User, UserRole
+
+
+async def measure(fn, runs: int = 200, warmup: int = 10) -> dict:
+    """Вызвать async fn() runs раз; {"p50": мс, "p95": мс, "runs": n}."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    q = statistics.quantiles(samples, n=100)
+    return {"p50": round(q[49], 2), "p95": round(q[94], 2), "runs": runs}
+
+
+def print_table(title: str, results: dict[str, dict]):
+    print(f"\n{title}")
+    print(f"{'variant':<12}{'p50, ms':>10}{'p95, ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['p50']:>10}{r['p95']:>10}")
+
+
+@asynccontextmanager
+async def rollback_session():
+    from bot.db.session import async_session
+    async with async_session() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+
+
+async def seed_object(session, name: str = "BENCH") -> tuple[ConstructionObject, User]:
+    """Пустой объект и пользователь-владелец (telegram_id из текущего времени)."""
+    user = User(
+        telegram_id=-int(datetime.utcnow().timestamp() * 1000),
+        full_name=f"{name} user", role=UserRole.PROJECT_MANAGER,
+    )
+    session.add(user)
+    obj = ConstructionObject(name=name, status=ObjectStatus.ACTIVE)
+    session.add(obj)
+    await session.flush()
+    return obj, user
@@ -0,0 +1,115 @@
+"""
+Бенчмарк эскалации: цикл по всем просроченным задачам с запросами PM,
+директоров и исполнителя на каждую («до») против одного прохода
+(bot/services/escalation.py, «после»).
+
+10 000 просроченных задач на 200 объектах (по PM на объект, 5 директоров),
+дедлайны равномерно на 1…10 дней назад. Сеется в транзакции и откатывается;
+каждый прогон тоже откатывается до savepoint, чтобы уведомления
+не копились между замерами.
+
+Запуск: docker-compose exec api python -m benchmarks.escalation [runs]
+"""
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import measure, print_table, rollback_session, seed_object
+from bot.db.models import (
+    ConstructionObject, Department, Notification, NotificationType, ObjectRole,
+    ObjectStatus, Task, TaskStatus, User, UserRole,
+)
+from bot.services.escalation import sweep_escalations
+
+TASKS = 10_000
+OBJECTS = 200
+DIRECTORS = 5
+
+
+async def legacy_escalation(db, today: date) -> int:
+    """Путь до sweep: все просроченные, по запросу PM/директоров/исполнителя на задачу."""
+    sent = 0
+    tasks = (await db.execute(
+        select(Task).where(Task.status == TaskStatus.OVERDUE, Task.deadline.isnot(None))
+    )).scalars().all()
+    for task in tasks:
+        days_overdue = (today - task.deadline).days
+        if days_overdue == 1 and task.assignee_id:
+            if await db.get(User, task.assignee_id):
+                sent += 1
+        if days_overdue == 3:
+            pms = (await db.execute(
+                select(User).join(ObjectRole, ObjectRole.user_id == User.id).where(
+                    ObjectRole.object_id == task.object_id,
+                    ObjectRole.role.in_([UserRole.PROJECT_MANAGER, UserRole.ADMIN]),
+                )
+            )).scalars().all()
+            if task.assignee_id:
+                await db.get(User, task.assignee_id)
+            for pm in pms:
+                db.add(Notification(user_id=pm.id, type=NotificationType.ESCALATION, title=task.title,
+                                    text="", entity_type="task", entity_id=task.id))
+                sent += 1
+        if days_overdue == 7:
+            directors = (await db.execute(
+                select(User).where(User.role.in_([UserRole.DIRECTOR, UserRole.ADMIN]), User.is_active == True)
+            )).scalars().all()
+            if task.assignee_id:
+                await db.get(User, task.assignee_id)
+            for director in directors:
+                db.add(Notification(user_id=director.id, type=NotificationType.ESCALATION, title=task.title,
+                                    text="", entity_type="task", entity_id=task.id))
+                sent += 1
+    await db.flush()
+    return sent
+
+
+async def seed(db, today: date):
+    first, owner = await seed_object(db, "BENCH escalation")
+    objects = [first] + [ConstructionObject(name=f"BENCH escalation {i}", status=ObjectStatus.ACTIVE)
+                         for i in range(1, OBJECTS)]
+    users = [User(telegram_id=owner.telegram_id - 1 - i, full_name=f"bench pm {i}", role=UserRole.PROJECT_MANAGER)
+             for i in range(OBJECTS)]
+    users += [User(telegram_id=owner.telegram_id - 1 - OBJECTS - i, full_name=f"bench director {i}",
+                   role=UserRole.DIRECTOR) for i in range(DIRECTORS)]
+    db.add_all(objects[1:] + users)
+    await db.flush()
+    await db.execute(insert(ObjectRole), [
+        {"object_id": obj.id, "user_id": pm.id, "role": UserRole.PROJECT_MANAGER}
+        for obj, pm in zip(objects, users)
+    ])
+    await db.execute(insert(Task), [
+        {"object_id": objects[i % OBJECTS].id, "title": f"bench task {i}", "department": Department.CONSTRUCTION,
+         "created_by_id": owner.id, "assignee_id": users[i % OBJECTS].id,
+         "status": TaskStatus.OVERDUE, "deadline": today - timedelta(days=i % 10 + 1)}
+        for i in range(TASKS)
+    ])
+
+
+async def main(runs: int):
+    today = date.today()
+    async with rollback_session() as db:
+        await seed(db, today)
+
+        async def rolled_back(fn):
+            savepoint = await db.begin_nested()
+            try:
+                return await fn()
+            finally:
+                await savepoint.rollback()
+
+        before = await rolled_back(lambda: legacy_escalation(db, today))
+        after = len(await rolled_back(lambda: sweep_escalations(db, today)))
+        assert before == after, (before, after)
+
+        results = {
+            "before": await measure(lambda: rolled_back(lambda: legacy_escalation(db, today)), runs, warmup=1),
+            "after": await measure(lambda: rolled_back(lambda: sweep_escalations(db, today)), runs, warmup=1),
+        }
+    print_table(f"escalation_check — {TASKS} overdue tasks, {OBJECTS} objects, {runs} runs", results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
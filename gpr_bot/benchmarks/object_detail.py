@@ -0,0 +1,98 @@
+"""
+Бенчмарк карточки объекта: восемь COUNT + команда + объект («до») против
+read model одним запросом (bot/services/object_detail.py, «после»).
+
+Объект с 2000 задач, 40 поставками, 12 этапами и командой из 8 человек
+сеется в транзакции и откатывается в конце.
+
+Запуск: docker-compose exec api python -m benchmarks.object_detail [runs]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import selectinload
+
+from benchmarks.common import measure, print_table, rollback_session, seed_object
+from bot.db.models import (
+    ConstructionObject, ConstructionStage, ConstructionStageStatus, Department,
+    ObjectRole, SupplyOrder, SupplyStatus, Task, TaskStatus, User, UserRole,
+)
+from bot.services.object_detail import load_object_detail
+from bot.services.object_stats import refresh_object_stats
+
+TASKS = 2000
+
+
+async def legacy_detail(db, object_id: int) -> dict:
+    """Путь до read model: объект, команда, восемь отдельных COUNT."""
+    obj = (await db.execute(
+        select(ConstructionObject).where(ConstructionObject.id == object_id)
+    )).scalar_one_or_none()
+    team = (await db.execute(
+        select(ObjectRole).options(selectinload(ObjectRole.user))
+        .where(ObjectRole.object_id == object_id)
+    )).scalars().all()
+
+    async def count(col, *where):
+        return (await db.execute(select(func.count(col)).where(*where))).scalar() or 0
+
+    stats = {
+        "task_total": await count(Task.id, Task.object_id == object_id),
+        "task_done": await count(Task.id, Task.object_id == object_id, Task.status == TaskStatus.DONE),
+        "task_overdue": await count(Task.id, Task.object_id == object_id, Task.status == TaskStatus.OVERDUE),
+        "task_in_progress": await count(Task.id, Task.object_id == object_id, Task.status == TaskStatus.IN_PROGRESS),
+        "supply_total": await count(SupplyOrder.id, SupplyOrder.object_id == object_id),
+        "supply_delayed": await count(SupplyOrder.id, SupplyOrder.object_id == object_id,
+                                      SupplyOrder.status == SupplyStatus.DELAYED),
+        "stage_total": await count(ConstructionStage.id, ConstructionStage.object_id == object_id),
+        "stage_accepted": await count(ConstructionStage.id, ConstructionStage.object_id == object_id,
+                                      ConstructionStage.status == ConstructionStageStatus.ACCEPTED),
+    }
+    return {"object": obj, "team": team, "stats": stats}
+
+
+async def seed(db) -> int:
+    obj, owner = await seed_object(db, "BENCH object_detail")
+    statuses = list(TaskStatus)
+    await db.execute(insert(Task), [
+        {"object_id": obj.id, "title": f"bench task {i}", "department": Department.CONSTRUCTION,
+         "created_by_id": owner.id, "status": statuses[i % len(statuses)]}
+        for i in range(TASKS)
+    ])
+    supply_statuses = list(SupplyStatus)
+    await db.execute(insert(SupplyOrder), [
+        {"object_id": obj.id, "material_name": f"bench material {i}", "status": supply_statuses[i % len(supply_statuses)]}
+        for i in range(40)
+    ])
+    stage_statuses = list(ConstructionStageStatus)
+    await db.execute(insert(ConstructionStage), [
+        {"object_id": obj.id, "name": f"bench stage {i}", "status": stage_statuses[i % len(stage_statuses)]}
+        for i in range(12)
+    ])
+    for i, role in enumerate(list(UserRole)[:8]):
+        member = User(telegram_id=owner.telegram_id - 1 - i, full_name=f"bench member {i}", role=role)
+        db.add(member)
+        await db.flush()
+        db.add(ObjectRole(object_id=obj.id, user_id=member.id, role=role))
+    await refresh_object_stats(db, obj.id)
+    return obj.id
+
+
+async def main(runs: int):
+    async with rollback_session() as db:
+        object_id = await seed(db)
+        before = await legacy_detail(db, object_id)
+        after = await load_object_detail(db, object_id)
+        assert before["stats"] == after["stats"], (before["stats"], after["stats"])
+        assert len(before["team"]) == len(after["team"])
+
+        results = {
+            "before": await measure(lambda: legacy_detail(db, object_id), runs),
+            "after": await measure(lambda: load_object_detail(db, object_id), runs),
+        }
+    print_table(f"/api/objects/{{id}} — {TASKS} tasks, {runs} runs", results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
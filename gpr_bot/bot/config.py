@@ -11,6 +11,17 @@ class Settings(BaseSettings):
 
     redis_url: str = "redis://localhost:6379/0"
 
+    # Бот: polling (одна реплика) или webhook (N реплик за балансировщиком)
+    bot_mode: str = "polling"
+    webhook_base_url: str = ""        # https://bot.example.com
+    webhook_path: str = "/tg/webhook"
+    webhook_secret: str = ""          # X-Telegram-Bot-Api-Secret-Token
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8081
+    fsm_state_ttl: int = 7 * 24 * 3600
+    # Outbound-диспетчер и сводки — только в одной реплике
+    outbound_enabled: bool = True
+
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_secret_key: str = "change-me"
@@ -36,6 +47,21 @@ class Settings(BaseSettings):
     check_deadlines_interval: int = 3600
     digest_hour: int = 9
 
+    # Склейка некритичных push по (получатель, объект), см. bot/services/coalesce.py
+    notify_coalesce_window: int = 60
+    notify_digest_top: int = 5
+    # Сколько send_message OutboundDispatcher выполняет одновременно (ожидание лимитов не считается)
+    outbound_concurrency: int = 20
+    # Воркеры outbox событий (python -m bot.outbox_worker)
+    outbox_workers: int = 4
+    # Утренние рассылки планировщика растягиваются на окно с бюджетом msg/s (bot/services/burst.py);
+    # старт самих задач размазывается на burst_job_jitter секунд
+    burst_window: int = 900
+    burst_send_budget: int = 20
+    burst_job_jitter: int = 120
+    # Прогон задачи планировщика дольше этой доли периода — ERROR и сообщение админам
+    job_overrun_fraction: float = 0.5
+
     admin_telegram_ids: str = ""
 
     # AI provider
@@ -135,6 +135,7 @@ class User(Base):
     role = Column(Enum(UserRole, name="user_role", create_type=False, values_callable=lambda x: [e.value for e in x]), nullable=False, default=UserRole.VIEWER)
     department = Column(Enum(Department, name="department", create_type=False, values_callable=lambda x: [e.value for e in x]))
     is_active = Column(Boolean, default=True)
+    tg_unreachable_at = Column(DateTime)  # бот заблокирован — push не шлём до нового обращения
     created_at = Column(DateTime, default=func.now())
 
     object_roles = relationship("ObjectRole", back_populates="user")
@@ -156,6 +157,7 @@ class ConstructionObject(Base):
     budget = Column(Float)
     status = Column(Enum(ObjectStatus, name="object_status", create_type=False, values_callable=lambda x: [e.value for e in x]), default=ObjectStatus.DRAFT, nullable=False)
     responsible_pm_id = Column(Integer, ForeignKey("users.id"))
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # ETag, bot/services/object_changes.py
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -269,6 +271,8 @@ class Task(Base):
     __table_args__ = (
         Index("ix_tasks_status_deadline", "status", "deadline"),
         Index("ix_tasks_assignee_status", "assignee_id", "status"),
+        Index("ix_tasks_object_status", "object_id", "status"),
+        Index("ix_tasks_updated_at", "updated_at"),
     )
 
 
@@ -307,6 +311,11 @@ class SupplyOrder(Base):
     created_by = relationship("User", foreign_keys=[created_by_id])
     approved_by = relationship("User", foreign_keys=[approved_by_id])
 
+    __table_args__ = (
+        Index("ix_supply_orders_status_expected", "status", "expected_date"),
+        Index("ix_supply_orders_updated_at", "updated_at"),
+    )
+
 
 class ConstructionStage(Base):
     __tablename__ = "construction_stages"
@@ -368,10 +377,17 @@ class Notification(Base):
     entity_type = Column(String(50))
     entity_id = Column(Integer)
     is_read = Column(Boolean, default=False)
+    dedupe_key = Column(String(255))  # reminder:24h:task:123:2026-10-17 — не больше одного такого
     created_at = Column(DateTime, default=func.now())
 
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_notifications_user_read_created", "user_id", "is_read", created_at.desc(), id.desc()),
+        Index("ux_notifications_dedupe_key", "dedupe_key", unique=True,
+              postgresql_where=dedupe_key.isnot(None)),
+    )
+
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
@@ -392,6 +408,109 @@ class AuditLog(Base):
     )
 
 
+# ─── ROLLUPS ─────────────────────────────────────────────
+
+class ObjectStats(Base):
+    """Денормализованные счётчики объекта (bot/services/object_stats.py)"""
+    __tablename__ = "object_stats"
+
+    object_id = Column(Integer, ForeignKey("objects.id", ondelete="CASCADE"), primary_key=True)
+    task_total = Column(Integer, nullable=False, default=0)
+    task_done = Column(Integer, nullable=False, default=0)
+    task_overdue = Column(Integer, nullable=False, default=0)
+    task_in_progress = Column(Integer, nullable=False, default=0)
+    supply_total = Column(Integer, nullable=False, default=0)
+    supply_delayed = Column(Integer, nullable=False, default=0)
+    stage_total = Column(Integer, nullable=False, default=0)
+    stage_accepted = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class NotificationCounter(Base):
+    """Непрочитанные уведомления по (user, type); ведёт триггер БД (alembic 0004)"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    type = Column(String(50), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+
+# ─── SCHEDULER ───────────────────────────────────────────
+
+class JobWatermark(Base):
+    """Граница последнего успешного прогона задачи планировщика (bot/services/watermarks.py)"""
+    __tablename__ = "job_watermarks"
+
+    job = Column(String(100), primary_key=True)
+    scanned_until = Column(DateTime, nullable=False)   # строки с updated_at позже — ещё не видели
+    scanned_day = Column(Date, nullable=False)         # «сегодня» прошлого прогона
+    updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+
+
+class EscalationState(Base):
+    """Уведомление, ожидающее действия, и срок следующей ступени эскалации (bot/services/escalation_state.py)"""
+    __tablename__ = "escalation_state"
+
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True)
+    subject_type = Column(String(50))          # что ждёт действия: task / gpr / supply …
+    subject_id = Column(Integer)
+    object_id = Column(Integer, ForeignKey("objects.id", ondelete="SET NULL"))
+    level = Column(Integer, nullable=False, default=0)     # последняя пройденная ступень
+    next_escalation_at = Column(DateTime)                   # NULL — ступеней больше нет
+    created_at = Column(DateTime, nullable=False, default=func.now())
+
+    notification = relationship("Notification")
+
+    __table_args__ = (
+        Index("ix_escalation_state_due", "next_escalation_at",
+              postgresql_where=next_escalation_at.isnot(None)),
+        Index("ix_escalation_state_subject", "subject_type", "subject_id"),
+    )
+
+
+# ─── OUTBOX ──────────────────────────────────────────────
+
+class EventOutbox(Base):
+    """События для воркеров (bot/services/outbox.py); пишутся в транзакции изменения"""
+    __tablename__ = "event_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    event = Column(String(50), nullable=False)
+    idempotency_key = Column(String(255), nullable=False, unique=True)
+    payload = Column(JSONB, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="pending")  # pending / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    available_at = Column(DateTime, nullable=False, default=func.now())
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    processed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_event_outbox_pending", "available_at", "id", postgresql_where=status == "pending"),
+    )
+
+
+class MessageDelivery(Base):
+    """Итог доставки исходящего сообщения (пишет OutboundDispatcher, bot/services/delivery_log.py)"""
+    __tablename__ = "message_deliveries"
+
+    id = Column(BigInteger, primary_key=True)
+    chat_id = Column(BigInteger, nullable=False)
+    # Без FK: сообщение уходит в очередь до commit пишущей транзакции (и переживает её rollback)
+    object_id = Column(Integer)
+    notification_id = Column(Integer)
+    status = Column(String(20), nullable=False)  # sent / failed / skipped
+    reason = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    enqueued_at = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index("ix_message_deliveries_object_created", "object_id", "created_at"),
+        Index("ix_message_deliveries_chat_created", "chat_id", "created_at"),
+    )
+
+
 # ─── EXCEL MODELS (Листы 5-12) ──────────────────────────
 
 class Zone(Base):
@@ -569,6 +688,10 @@ class DailyPlanFact(Base):
     work_type = relationship("WorkType")
     crew = relationship("Crew")
 
+    __table_args__ = (
+        Index("ix_daily_plan_fact_object_date", "object_id", "date"),
+    )
+
 
 # ─── PRODUCTION MODELS (Excel СПК Блок Б) ───────────────
 
@@ -664,6 +787,7 @@ class ObjectChat(Base):
     chat_type = Column(String(20), default="group")  # group, supergroup
     linked_by_id = Column(Integer, ForeignKey("users.id"))
     is_active = Column(Boolean, default=True)
+    unreachable_at = Column(DateTime)  # бота удалили из группы / чат не найден
     created_at = Column(DateTime, default=func.now())
 
     object = relationship("ConstructionObject")
@@ -711,6 +835,10 @@ class AIChatMessage(Base):
     object = relationship("ConstructionObject")
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_ai_chat_object_created", "object_id", created_at.desc(), id.desc()),
+    )
+
 
 # ─── WORKFLOW ENGINE ─────────────────────────────────────
 
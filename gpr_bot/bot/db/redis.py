@@ -0,0 +1,19 @@
+from redis.asyncio import Redis
+from bot.config import get_settings
+
+_redis: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Общий клиент Redis (ленивая инициализация, пул соединений внутри)."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(get_settings().redis_url, decode_responses=True)
+    return _redis
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
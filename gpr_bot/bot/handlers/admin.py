@@ -10,6 +10,7 @@ from bot.keyboards.main_menu import main_menu_keyboard
 from bot.rbac.permissions import has_permission, ROLE_NAMES, ROLE_DEPARTMENT
 from bot.services.audit_service import log_action
 from bot.services.notification_service import get_unread_count
+from bot.services.outbound import enqueue
 from bot.services.object_service import create_object
 from bot.states.forms import CreateObjectForm
 from datetime import datetime
@@ -371,15 +372,11 @@ async def set_user_role(callback: CallbackQuery, callback_data: AdminCB, db_user
         parse_mode="HTML",
     )
 
-    try:
-        await callback.bot.send_message(
-            user.telegram_id,
-            f"✅ Ваша заявка одобрена!\n"
-            f"Роль: <b>{role_name}</b>\n\n"
-            f"Нажмите /start для начала работы.",
-            parse_mode="HTML",
-        )
-    except Exception:
-        pass
+    await enqueue(
+        user.telegram_id,
+        f"✅ Ваша заявка одобрена!\n"
+        f"Роль: <b>{role_name}</b>\n\n"
+        f"Нажмите /start для начала работы.",
+    )
 
     await callback.answer("Роль назначена")
@@ -3,13 +3,16 @@ Chat linking handler — привязка TG-групп к объектам.
 /link <object_id> — привязать текущий чат к объекту
 /unlink — отвязать текущий чат
 /chatinfo — показать привязку
+Добавление/удаление бота из группы снимает/ставит метку недоступности чата.
 """
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.types import ChatMemberUpdated, Message
+from aiogram.filters import ChatMemberUpdatedFilter, JOIN_TRANSITION, LEAVE_TRANSITION
 from aiogram.filters import Command
 from sqlalchemy import select
 from bot.db.models import User, ObjectChat, ConstructionObject, Task, TaskStatus
 from bot.db.session import async_session
+from bot.services.delivery_log import mark_reachable, mark_unreachable
 from bot.utils.deep_links import object_button
 from aiogram.types import InlineKeyboardMarkup
 
@@ -156,3 +159,19 @@ async def cmd_chatinfo(message: Message):
         lines.append(f"  🏗 <b>{obj.name}</b> (#{obj.id}){task_text}")
 
     await message.answer("\n".join(lines), parse_mode="HTML")
+
+
+@router.my_chat_member(ChatMemberUpdatedFilter(JOIN_TRANSITION))
+async def on_bot_joined(event: ChatMemberUpdated):
+    """Бота вернули в группу — уведомления по привязкам снова доставляются."""
+    async with async_session() as db:
+        await mark_reachable(db, event.chat.id)
+        await db.commit()
+
+
+@router.my_chat_member(ChatMemberUpdatedFilter(LEAVE_TRANSITION))
+async def on_bot_left(event: ChatMemberUpdated):
+    """Бота удалили из группы — не пытаться слать туда до возвращения."""
+    async with async_session() as db:
+        await mark_unreachable(db, {event.chat.id})
+        await db.commit()
@@ -10,6 +10,8 @@ from bot.utils.callbacks import ConstructionCB, ObjectCB
 from bot.keyboards.common import construction_stages_kb, back_button
 from bot.services.notification_service import notify_and_push
 from bot.services.audit_service import log_action
+from bot.services.object_stats import refresh_object_stats
+from bot.services.object_changes import mark_object_changed
 from bot.rbac.permissions import has_permission
 from bot.utils.formatters import fmt_status
 
@@ -130,6 +132,7 @@ async def construction_start(callback: CallbackQuery, callback_data: Constructio
         stage.status = ConstructionStageStatus.IN_PROGRESS
         stage.started_at = datetime.utcnow()
         await log_action(session, user.id, "stage_start", "construction_stage", stage.id)
+        mark_object_changed(session, stage.object_id)
         await session.commit()
         await callback.message.edit_text(f"▶️ Этап «{stage.name}» запущен.")
     await callback.answer()
@@ -146,6 +149,7 @@ async def construction_complete(callback: CallbackQuery, callback_data: Construc
     if stage and stage.status == ConstructionStageStatus.IN_PROGRESS:
         stage.status = ConstructionStageStatus.SUBMITTED
         await log_action(session, user.id, "stage_submit", "construction_stage", stage.id)
+        mark_object_changed(session, stage.object_id)
         await session.commit()
         await callback.message.edit_text(f"📤 Этап «{stage.name}» отправлен на приёмку.")
     await callback.answer()
@@ -165,6 +169,7 @@ async def construction_accept(callback: CallbackQuery, callback_data: Constructi
         stage.completed_at = datetime.utcnow()
         stage.accepted_by_id = user.id
         await log_action(session, user.id, "stage_accept", "construction_stage", stage.id)
+        await refresh_object_stats(session, stage.object_id)
         await session.commit()
         await callback.message.edit_text(f"✅ Этап «{stage.name}» принят.")
     await callback.answer()
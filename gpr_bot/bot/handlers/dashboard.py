@@ -8,6 +8,7 @@ from bot.db.models import (
     SupplyOrder, SupplyStatus, DailyPlanFact,
 )
 from bot.db.session import async_session
+from bot.services.batch_loader import get_loaders
 from bot.utils.formatters import LINE, progress_bar, fmt_date, days_until
 
 router = Router()
@@ -128,22 +129,13 @@ async def cmd_report(message: Message, db_user: User | None, session):
         f"{'─' * 30}",
     ]
 
-    for obj in objs:
-        t_total = (await session.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id)
-        )).scalar() or 0
-        t_done = (await session.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.DONE)
-        )).scalar() or 0
-        t_overdue = (await session.execute(
-            select(func.count(Task.id)).where(Task.object_id == obj.id, Task.status == TaskStatus.OVERDUE)
-        )).scalar() or 0
-
-        today_vol = (await session.execute(
-            select(func.sum(DailyPlanFact.fact_volume))
-            .where(DailyPlanFact.object_id == obj.id, DailyPlanFact.date == date.today())
-        )).scalar() or 0
+    loaders = get_loaders(session)
+    today = date.today()
+    stats = await loaders.object_stats.load_many([obj.id for obj in objs])
+    volumes = await loaders.fact_volume.load_many([(obj.id, today) for obj in objs])
 
+    for obj, st, today_vol in zip(objs, stats, volumes):
+        t_total, t_done, t_overdue = st["task_total"], st["task_done"], st["task_overdue"]
         pct = round(t_done / t_total * 100) if t_total > 0 else 0
         dl = days_until(obj.deadline_date)
 
@@ -16,6 +16,7 @@ from bot.db.models import (
     DailyPlanFact, ObjectRole, User,
 )
 from bot.config import get_settings
+from bot.services.object_changes import mark_object_changed
 
 router = Router()
 settings = get_settings()
@@ -334,6 +335,7 @@ async def on_save(callback: CallbackQuery, state: FSMContext, bot: Bot):
             existing_notes = record.notes or ""
             record.notes = f"{existing_notes}\n[ФОТО: {', '.join(photo_urls)}]".strip()
         db.add(record)
+        mark_object_changed(db, data["object_id"])
         await db.commit()
 
     photo_line = f"\n📸 Загружено фото: {len(photo_urls)}" if photo_urls else ""
@@ -95,7 +95,7 @@ async def gpr_create(callback: CallbackQuery, callback_data: GPRCB, db_user: Use
     for obj_role in result.scalars().all():
         if obj_role.user_id != user.id:
             await notify_and_push(
-                callback.bot, session, obj_role.user_id,
+                session, obj_role.user_id,
                 NotificationType.GPR_SIGN_REQUEST,
                 "📄 Новый ГПР на подписание",
                 "Создан ГПР. Требуется ваша подпись.",
@@ -133,7 +133,7 @@ async def gpr_sign(callback: CallbackQuery, callback_data: GPRCB, db_user: User
             )
             for obj_role in result.scalars().all():
                 await notify_and_push(
-                    callback.bot, session, obj_role.user_id,
+                    session, obj_role.user_id,
                     NotificationType.GPR_SIGNED,
                     "✅ ГПР полностью подписан!",
                     "Все подписи получены. Объект активирован.",
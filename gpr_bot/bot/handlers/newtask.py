@@ -14,6 +14,7 @@ from bot.db.models import (
     Department, ObjectRole,
 )
 from bot.rbac.permissions import has_permission, DEPARTMENT_NAMES
+from bot.services.object_stats import refresh_object_stats
 
 router = Router()
 
@@ -151,10 +152,11 @@ async def on_save(callback: CallbackQuery, state: FSMContext):
             description=data.get("description"),
             department=Department(data["department"]),
             status=TaskStatus.NEW,
-            creator_id=data["user_id"],
+            created_by_id=data["user_id"],
             deadline=datetime.fromisoformat(data["deadline"]).date() if data.get("deadline") else None,
         )
         db.add(task)
+        await refresh_object_stats(db, data["object_id"])
         await db.commit()
 
     await callback.answer("✅ Задача создана!")
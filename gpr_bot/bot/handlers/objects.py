@@ -8,6 +8,7 @@ from bot.utils.callbacks import ObjectCB, NavCB
 from bot.utils.formatters import format_object_card
 from bot.services.object_service import get_user_objects, get_object_by_id, get_object_team
 from bot.services.notification_service import get_unread_count
+from bot.services.object_stats import get_object_stats, empty_stats
 from bot.rbac.permissions import has_permission, ROLE_NAMES
 from bot.states.forms import CreateObjectForm
 from datetime import datetime
@@ -21,6 +22,12 @@ def _require_auth(db_user: User | None) -> User | None:
     return db_user
 
 
+async def _object_card(session, obj) -> str:
+    """Карточка объекта со счётчиками из object_stats (PK-lookup)."""
+    stats = (await get_object_stats(session, [obj.id])).get(obj.id) or empty_stats()
+    return format_object_card(obj, stats["task_done"], stats["task_total"], stats["task_overdue"])
+
+
 # ─── REPLY BUTTON: My Objects ────────────────────────────
 
 @router.message(F.text.startswith("📋"))
@@ -77,7 +84,7 @@ async def object_detail(callback: CallbackQuery, callback_data: ObjectCB, db_use
         await callback.answer("Объект не найден")
         return
 
-    text = format_object_card(obj)
+    text = await _object_card(session, obj)
 
     await callback.message.edit_text(
         text,
@@ -149,7 +156,7 @@ async def nav_back_object_detail(callback: CallbackQuery, callback_data: NavCB,
         return
 
     await callback.message.edit_text(
-        format_object_card(obj),
+        await _object_card(session, obj),
         reply_markup=object_detail_kb(obj.id, user.role),
         parse_mode="HTML",
     )
@@ -7,6 +7,7 @@ from bot.db.models import User, UserRole, Task, TaskStatus, ConstructionObject,
 from bot.db.session import async_session
 from bot.keyboards.main_menu import main_menu_inline
 from bot.services.notification_service import get_unread_count
+from bot.services.outbound import enqueue
 from bot.states.forms import RegisterForm
 from bot.rbac.permissions import ROLE_NAMES
 from bot.utils.formatters import LINE, progress_bar
@@ -287,17 +288,13 @@ async def register_phone(message: Message, state: FSMContext, session):
 
     settings = get_settings()
     for admin_id in settings.admin_ids:
-        try:
-            await message.bot.send_message(
-                admin_id,
-                f"🆕 <b>Новая заявка</b>\n"
-                f"{'┄' * 28}\n"
-                f"  👤  {full_name}\n"
-                f"  📱  {phone}\n"
-                f"  TG  @{message.from_user.username or '—'}\n"
-                f"{'┄' * 28}\n\n"
-                f"/admin — управление",
-                parse_mode="HTML",
-            )
-        except Exception:
-            pass
+        await enqueue(
+            admin_id,
+            f"🆕 <b>Новая заявка</b>\n"
+            f"{'┄' * 28}\n"
+            f"  👤  {full_name}\n"
+            f"  📱  {phone}\n"
+            f"  TG  @{message.from_user.username or '—'}\n"
+            f"{'┄' * 28}\n\n"
+            f"/admin — управление",
+        )
@@ -9,6 +9,11 @@ from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy import select
 from bot.db.models import User, Task, TaskStatus, TaskComment
 from bot.db.session import async_session
+from bot.services.escalation_state import acknowledge_subject
+from bot.services.object_stats import refresh_object_stats
+from bot.services.outbound import enqueue
+from bot.services.outbox import event_key
+from bot.services.event_engine import publish_task_status_changed
 from bot.utils.deep_links import object_tasks_button
 from aiogram.types import InlineKeyboardMarkup
 
@@ -43,15 +48,13 @@ async def accept_task(callback: CallbackQuery):
 
         old_status = task.status.value
         task.status = TaskStatus.IN_PROGRESS
+        await acknowledge_subject(db, "task", task.id)
+        await refresh_object_stats(db, task.object_id)
+        # Notify creator — через outbox; id callback защищает от повторной доставки
+        await publish_task_status_changed(db, task, old_status, user,
+                                          event_key(f"task_status:{task.id}", f"tg:{callback.id}"))
         await db.commit()
 
-        # Notify creator
-        try:
-            from bot.services.event_engine import on_task_status_changed
-            await on_task_status_changed(db, task, old_status, changed_by=user)
-        except Exception:
-            pass
-
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [object_tasks_button(task.object_id)],
     ])
@@ -128,32 +131,26 @@ async def reject_reason(message: Message, state: FSMContext):
             text=f"❌ Отклонено: {reason}",
         )
         db.add(comment)
+        await acknowledge_subject(db, "task", task.id)
+        await refresh_object_stats(db, task.object_id)
         await db.commit()
 
         # Notify creator
         if task.created_by_id:
             creator = await db.get(User, task.created_by_id)
             if creator:
-                try:
-                    from aiogram import Bot
-                    from bot.config import get_settings
-                    bot = Bot(token=get_settings().bot_token)
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [object_tasks_button(task.object_id)],
-                    ])
-                    assignee_name = user.full_name if user else "Исполнитель"
-                    await bot.send_message(
-                        creator.telegram_id,
-                        f"❌ <b>Задача отклонена</b>\n\n"
-                        f"<b>{task.title}</b>\n"
-                        f"Отклонил: {assignee_name}\n"
-                        f"Причина: {reason}",
-                        parse_mode="HTML",
-                        reply_markup=kb,
-                    )
-                    await bot.session.close()
-                except Exception:
-                    pass
+                kb = InlineKeyboardMarkup(inline_keyboard=[
+                    [object_tasks_button(task.object_id)],
+                ])
+                assignee_name = user.full_name if user else "Исполнитель"
+                await enqueue(
+                    creator.telegram_id,
+                    f"❌ <b>Задача отклонена</b>\n\n"
+                    f"<b>{task.title}</b>\n"
+                    f"Отклонил: {assignee_name}\n"
+                    f"Причина: {reason}",
+                    reply_markup=kb,
+                )
 
     await state.clear()
     await message.answer(
@@ -114,7 +114,7 @@ async def task_complete(callback: CallbackQuery, callback_data: TaskCB, db_user:
     # Notify creator / project manager
     if task.created_by_id:
         await notify_and_push(
-            callback.bot, session, task.created_by_id,
+            session, task.created_by_id,
             NotificationType.TASK_ASSIGNED,
             f"Задача на проверке: {task.title}",
             f"Исполнитель {user.full_name} отправил задачу на проверку.",
@@ -148,7 +148,7 @@ async def task_approve(callback: CallbackQuery, callback_data: TaskCB, db_user:
 
     if task.assignee_id:
         await notify_and_push(
-            callback.bot, session, task.assignee_id,
+            session, task.assignee_id,
             NotificationType.TASK_ASSIGNED,
             f"✅ Задача принята: {task.title}",
             entity_type="task", entity_id=task.id,
@@ -181,7 +181,7 @@ async def task_reject(callback: CallbackQuery, callback_data: TaskCB, db_user: U
 
     if task.assignee_id:
         await notify_and_push(
-            callback.bot, session, task.assignee_id,
+            session, task.assignee_id,
             NotificationType.TASK_ASSIGNED,
             f"↩️ Задача возвращена: {task.title}",
             "Требуется доработка.",
@@ -227,7 +227,7 @@ async def task_block_reason(message: Message, state: FSMContext, db_user: User |
 
     if task.created_by_id:
         await notify_and_push(
-            message.bot, session, task.created_by_id,
+            session, task.created_by_id,
             NotificationType.ESCALATION,
             f"🚫 Задача заблокирована: {task.title}",
             f"Причина: {reason}\nИсполнитель: {user.full_name}",
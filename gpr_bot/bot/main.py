@@ -3,11 +3,18 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from bot.config import get_settings
-from bot.db.session import init_db
+from bot.db.session import async_session, init_db
 from bot.middlewares.auth import AuthMiddleware
 from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.services.outbound import OutboundDispatcher
+from bot.services.coalesce import DigestFlusher
+from bot.services.burst import BurstPump
+from bot.db.redis import close_redis
 
 from bot.handlers import start, objects, tasks, gpr, supply, construction, notifications, admin, fact, dashboard, newtask, chat_links, task_actions
 
@@ -18,21 +25,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    settings = get_settings()
-
-    # Initialize database
-    await init_db()
-    logger.info("Database initialized")
-
-    # Create bot
-    bot = Bot(
-        token=settings.bot_token,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+def build_storage(settings) -> RedisStorage:
+    """FSM в Redis: формы (FactForm, CreateTaskForm, …) переживают рестарт и видны любой реплике."""
+    return RedisStorage.from_url(
+        settings.redis_url,
+        key_builder=DefaultKeyBuilder(prefix="fsm"),
+        state_ttl=settings.fsm_state_ttl,
+        data_ttl=settings.fsm_state_ttl,
     )
 
-    # Create dispatcher
-    dp = Dispatcher()
+
+def build_dispatcher(settings) -> Dispatcher:
+    dp = Dispatcher(storage=build_storage(settings))
 
     # Register middlewares
     dp.message.middleware(ThrottlingMiddleware())
@@ -54,6 +58,52 @@ async def main():
     dp.include_router(newtask.router)
     dp.include_router(chat_links.router)
     dp.include_router(task_actions.router)
+    return dp
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, settings):
+    """aiohttp-сервер: POST {webhook_path} с проверкой X-Telegram-Bot-Api-Secret-Token, GET /healthz."""
+    if not settings.webhook_base_url or not settings.webhook_secret:
+        raise RuntimeError("bot_mode=webhook requires WEBHOOK_BASE_URL and WEBHOOK_SECRET")
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=settings.webhook_secret).register(
+        app, path=settings.webhook_path,
+    )
+    app.router.add_get("/healthz", lambda request: web.json_response({"status": "ok"}))
+    setup_application(app, dp, bot=bot)
+
+    # set_webhook идемпотентен — каждая реплика может вызывать его при старте
+    await bot.set_webhook(
+        settings.webhook_base_url.rstrip("/") + settings.webhook_path,
+        secret_token=settings.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, settings.webhook_host, settings.webhook_port).start()
+    logger.info(f"Webhook listening on {settings.webhook_host}:{settings.webhook_port}{settings.webhook_path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def main():
+    settings = get_settings()
+
+    # Initialize database
+    await init_db()
+    logger.info("Database initialized")
+
+    # Create bot
+    bot = Bot(
+        token=settings.bot_token,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+    dp = build_dispatcher(settings)
 
     # Set bot commands
     from aiogram.types import BotCommand
@@ -68,11 +118,34 @@ async def main():
         BotCommand(command="newobject", description="Создать объект"),
     ])
 
-    logger.info("Bot starting...")
+    # Outbound queue — all pushes go through this bot session.
+    # При нескольких репликах включать в одной (OUTBOUND_ENABLED=false в остальных),
+    # иначе лимиты и порядок сообщений в чате считаются на каждую реплику отдельно.
+    background = []
+    if settings.outbound_enabled:
+        outbound = OutboundDispatcher(bot, concurrency=settings.outbound_concurrency, session_factory=async_session)
+        digests = DigestFlusher()
+        bursts = BurstPump()
+        background = [
+            (outbound, asyncio.create_task(outbound.run())),
+            (digests, asyncio.create_task(digests.run())),
+            (bursts, asyncio.create_task(bursts.run())),
+        ]
+
+    logger.info(f"Bot starting ({settings.bot_mode})...")
 
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if settings.bot_mode == "webhook":
+            await run_webhook(bot, dp, settings)
+        else:
+            await bot.delete_webhook()
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        for worker, task in background:
+            worker.stop()
+            task.cancel()
+        await dp.storage.close()
+        await close_redis()
         await bot.session.close()
 
 
@@ -4,6 +4,12 @@ from aiogram.types import TelegramObject, Message, CallbackQuery
 from sqlalchemy import select
 from bot.db.session import async_session
 from bot.db.models import User
+from bot.services.delivery_log import mark_reachable
+
+
+def _is_private(event: TelegramObject) -> bool:
+    message = event.message if isinstance(event, CallbackQuery) else event
+    return message is None or message.chat.type == "private"
 
 
 class AuthMiddleware(BaseMiddleware):
@@ -28,6 +34,11 @@ class AuthMiddleware(BaseMiddleware):
             )
             user = result.scalar_one_or_none()
 
+            # Пользователь снова пишет боту — снять метку «заблокировал бота»
+            if user and user.tg_unreachable_at and _is_private(event):
+                await mark_reachable(session, tg_user.id)
+                await session.commit()
+
             data["db_user"] = user
             data["session"] = session
             return await handler(event, data)
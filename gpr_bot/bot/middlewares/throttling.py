@@ -1,10 +1,34 @@
+"""
+Throttling — не чаще одного действия пользователя в THROTTLE_SECONDS.
+Метка в Redis (SET NX PX), чтобы ограничение действовало на всех репликах
+бота; если Redis недоступен — локальный словарь процесса.
+"""
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
+import logging
 import time
+from bot.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
 
 _user_last_action: dict[int, float] = {}
 THROTTLE_SECONDS = 0.5
+THROTTLE_PREFIX = "throttle"
+
+
+async def _allow(user_id: int) -> bool:
+    try:
+        return bool(await get_redis().set(
+            f"{THROTTLE_PREFIX}:{user_id}", 1, px=int(THROTTLE_SECONDS * 1000), nx=True,
+        ))
+    except Exception as e:
+        logger.warning(f"Throttle via Redis failed, using local state: {e}")
+    now = time.monotonic()
+    if now - _user_last_action.get(user_id, 0) < THROTTLE_SECONDS:
+        return False
+    _user_last_action[user_id] = now
+    return True
 
 
 class ThrottlingMiddleware(BaseMiddleware):
@@ -20,13 +44,9 @@ class ThrottlingMiddleware(BaseMiddleware):
         elif isinstance(event, CallbackQuery) and event.from_user:
             user_id = event.from_user.id
 
-        if user_id:
-            now = time.monotonic()
-            last = _user_last_action.get(user_id, 0)
-            if now - last < THROTTLE_SECONDS:
-                if isinstance(event, CallbackQuery):
-                    await event.answer("⏳ Подождите...")
-                return
-            _user_last_action[user_id] = now
+        if user_id and not await _allow(user_id):
+            if isinstance(event, CallbackQuery):
+                await event.answer("⏳ Подождите...")
+            return
 
         return await handler(event, data)
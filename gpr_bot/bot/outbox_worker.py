@@ -0,0 +1,34 @@
+"""
+Outbox worker — точка входа сервиса outbox (docker-compose):
+
+    python -m bot.outbox_worker
+
+Отдельный модуль, а не __main__ в bot/services/outbox.py: запущенный как
+__main__, outbox.py был бы второй копией модуля, и @outbox_handler из
+event_engine регистрировались бы не в тот HANDLERS, который читает пул.
+"""
+import asyncio
+import logging
+
+from bot.services.outbox import OutboxWorkerPool
+import bot.services.event_engine  # noqa: F401 — регистрирует обработчики в bot.services.outbox.HANDLERS
+
+
+async def main():
+    from bot.config import get_settings
+    from bot.db.redis import close_redis
+    from bot.db.session import async_session
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    pool = OutboxWorkerPool(async_session, size=get_settings().outbox_workers)
+    try:
+        await pool.run()
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Batch Loader — request-scoped DataLoader для счётчиков.
+Ключи, запрошенные за один тик event loop, собираются в пачку и
+резолвятся одним сгруппированным запросом; результат кешируется
+до конца запроса (до закрытия сессии).
+
+AsyncSession не допускает параллельных запросов, а пачки разных семейств
+одного тика диспетчеризуются конкурентно — поэтому загрузчики одной сессии
+делят asyncio.Lock (session.info["loaders_lock"]) и ходят в БД по очереди.
+
+    loaders = get_loaders(session)
+    stats = await loaders.object_stats.load_many([o.id for o in objs])
+"""
+import asyncio
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.db.models import (
+    ConstructionObject, ObjectStatus, ObjectRole, BOMItem, BOMStatus, DailyPlanFact,
+)
+from bot.services.object_stats import get_object_stats, empty_stats
+
+BatchFn = Callable[[list], Awaitable[dict]]
+
+
+class BatchLoader:
+    """Собирает ключи, вызывает batch_fn(keys) -> {key: value} один раз на пачку."""
+
+    def __init__(self, batch_fn: BatchFn, default: Callable[[], Any] = lambda: None,
+                 lock: asyncio.Lock | None = None):
+        self._batch_fn = batch_fn
+        self._default = default
+        self._lock = lock or asyncio.Lock()
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._queue: list[Hashable] = []
+        self._tasks: set[asyncio.Task] = set()   # ссылка держит задачу до конца (иначе её может собрать GC)
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        fut = self._cache.get(key)
+        if fut is not None:
+            return fut
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._cache[key] = fut
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            loop.call_soon(self._start_dispatch, loop)
+        return fut
+
+    def _start_dispatch(self, loop: asyncio.AbstractEventLoop):
+        task = loop.create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    async def _dispatch(self):
+        """Любая ошибка пачки (и отмена) доходит до ожидающих; такие ключи не кешируются."""
+        keys, self._queue = self._queue, []
+        try:
+            async with self._lock:
+                values = await self._batch_fn(keys)
+            results = {k: values.get(k, self._default()) for k in keys}
+        except BaseException as e:
+            for k in keys:
+                fut = self._cache.pop(k)
+                if fut.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    fut.cancel()
+                else:
+                    fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for k in keys:
+            fut = self._cache[k]
+            if not fut.done():
+                fut.set_result(results[k])
+
+
+# ─── COUNTER FAMILIES ───────────────────────────────────
+
+def _bom_stats_default() -> dict:
+    return {"total": 0, "completed": 0}
+
+
+class Loaders:
+    """Набор загрузчиков, привязанный к одной сессии (одному запросу)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        lock = session.info.setdefault("loaders_lock", asyncio.Lock())
+        self.object_stats = BatchLoader(self._object_stats, empty_stats, lock)
+        self.active_objects_by_user = BatchLoader(self._active_objects_by_user, int, lock)
+        self.bom_stats = BatchLoader(self._bom_stats, _bom_stats_default, lock)
+        self.fact_volume = BatchLoader(self._fact_volume, float, lock)
+
+    async def _object_stats(self, object_ids: list[int]) -> dict:
+        """Счётчики задач / поставок / этапов по объекту (rollup object_stats)."""
+        return await get_object_stats(self.session, object_ids)
+
+    async def _active_objects_by_user(self, user_ids: list[int]) -> dict:
+        """Количество активных/планируемых объектов, где пользователь в команде."""
+        result = await self.session.execute(
+            select(ObjectRole.user_id, func.count(ObjectRole.id))
+            .join(ConstructionObject, ObjectRole.object_id == ConstructionObject.id)
+            .where(
+                ObjectRole.user_id.in_(user_ids),
+                ConstructionObject.status.in_([ObjectStatus.ACTIVE, ObjectStatus.PLANNING]),
+            )
+            .group_by(ObjectRole.user_id)
+        )
+        return dict(result.all())
+
+    async def _bom_stats(self, zone_ids: list[int]) -> dict:
+        """Позиции BOM по зоне: total / completed."""
+        result = await self.session.execute(
+            select(
+                BOMItem.zone_id,
+                func.count(),
+                func.count().filter(BOMItem.status == BOMStatus.COMPLETED),
+            )
+            .where(BOMItem.zone_id.in_(zone_ids))
+            .group_by(BOMItem.zone_id)
+        )
+        return {zid: {"total": total, "completed": completed} for zid, total, completed in result.all()}
+
+    async def _fact_volume(self, keys: list[tuple[int, date]]) -> dict:
+        """Сумма факта за день, ключ (object_id, date)."""
+        object_ids = {oid for oid, _ in keys}
+        days = {d for _, d in keys}
+        result = await self.session.execute(
+            select(DailyPlanFact.object_id, DailyPlanFact.date, func.sum(DailyPlanFact.fact_volume))
+            .where(DailyPlanFact.object_id.in_(object_ids), DailyPlanFact.date.in_(days))
+            .group_by(DailyPlanFact.object_id, DailyPlanFact.date)
+        )
+        return {(oid, d): vol or 0 for oid, d, vol in result.all()}
+
+
+def get_loaders(session: AsyncSession) -> Loaders:
+    """Загрузчики текущего запроса — живут в session.info вместе с сессией."""
+    loaders = session.info.get("loaders")
+    if loaders is None:
+        loaders = Loaders(session)
+        session.info["loaders"] = loaders
+    return loaders
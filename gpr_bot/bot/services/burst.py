@@ -0,0 +1,181 @@
+"""
+Burst — растянутая во времени выдача массовых рассылок планировщика.
+
+Утренние задачи (дайджест, факт за вчера, напоминания о дедлайнах, задержки
+поставок) срабатывают в начале часа и разом кладут в outbound сотни
+сообщений — именно тогда, когда пользователи открывают бота. Вместо
+enqueue_many задача вызывает
+
+    report = await enqueue_burst("daily_digest", messages)
+
+Каждому получателю назначается слот внутри окна: сдвиг от начала —
+детерминированный хэш (имя рассылки, chat_id), то есть один и тот же
+пользователь каждый день получает дайджест примерно в одно и то же время.
+Слоты раскладываются так, чтобы на секунду приходилось не больше бюджета
+сообщений; переполненная секунда сдвигает остаток дальше.
+
+Сообщения ждут в tg:burst:due (zset, score — время выдачи). BurstPump
+(процесс бота) раз в секунду переносит созревшие в outbound, но не больше
+бюджета за тик на все рассылки вместе — наложившиеся рассылки делят один
+бюджет. Окно и бюджет — settings.burst_window / burst_send_budget.
+
+Прогноз завершения (с учётом уже ожидающих в очереди) пишется в лог и в
+tg:burst:reports; его показывает /api/outbound/stats.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.db.redis import get_redis
+from bot.services.fanout import Outgoing
+from bot.services.outbound import enqueue_many
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "tg:burst"
+DUE_KEY = f"{PREFIX}:due"
+REPORTS_KEY = f"{PREFIX}:reports"
+PUMP_INTERVAL = 1.0
+
+
+def _settings():
+    from bot.config import get_settings
+    return get_settings()
+
+
+@dataclass
+class BurstReport:
+    name: str
+    messages: int
+    started_at: float
+    finish_at: float          # прогноз: последний слот или разбор очереди при бюджете
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "finish_at": datetime.fromtimestamp(self.finish_at).isoformat(timespec="seconds"),
+        }
+
+
+def jitter(name: str, chat_id: int, window: float) -> float:
+    """Детерминированный сдвиг получателя в окне [0, window)."""
+    digest = hashlib.blake2b(f"{name}:{chat_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64 * window
+
+
+def plan_offsets(name: str, chat_ids: list[int], window: float, budget: int) -> list[float]:
+    """Сдвиг каждого сообщения от начала рассылки: jitter, не больше budget в секунду."""
+    wanted = [jitter(name, chat_id, window) for chat_id in chat_ids]
+    planned = [0.0] * len(wanted)
+    second, used = 0, 0
+    # Сортировка устойчивая — сообщения одного чата остаются в исходном порядке
+    for i in sorted(range(len(wanted)), key=wanted.__getitem__):
+        if int(wanted[i]) > second:
+            second, used = int(wanted[i]), 0
+        if used >= budget:
+            second, used = second + 1, 0
+        used += 1
+        planned[i] = max(wanted[i], second)
+    return planned
+
+
+def _encode(msg: Outgoing, seq: str) -> str:
+    # seq первым: уникальность члена zset и исходный порядок при равном score
+    fields = {"seq": seq, **asdict(msg)}
+    if msg.reply_markup is not None:
+        fields["reply_markup"] = msg.reply_markup.model_dump_json(exclude_none=True)
+    return json.dumps(fields, ensure_ascii=False)
+
+
+def _decode(raw: str) -> Outgoing:
+    fields = json.loads(raw)
+    fields.pop("seq")
+    markup = fields.get("reply_markup")
+    if markup:
+        fields["reply_markup"] = InlineKeyboardMarkup.model_validate_json(markup)
+    return Outgoing(**fields)
+
+
+async def enqueue_burst(name: str, messages: list[Outgoing], window: float | None = None,
+                        budget: int | None = None, now: float | None = None) -> BurstReport:
+    """Разложить сообщения по окну и поставить в tg:burst:due; вернуть прогноз."""
+    window = _settings().burst_window if window is None else window
+    budget = _settings().burst_send_budget if budget is None else budget
+    now = time.time() if now is None else now
+    if not messages:
+        return BurstReport(name, 0, now, now)
+
+    offsets = plan_offsets(name, [m.chat_id for m in messages], window, budget)
+    run = f"{name}:{int(now)}"
+    try:
+        redis = get_redis()
+        backlog = await redis.zcard(DUE_KEY)
+        await redis.zadd(DUE_KEY, {
+            _encode(msg, f"{run}:{i:06d}"): now + offset for i, (msg, offset) in enumerate(zip(messages, offsets))
+        })
+    except Exception as e:
+        logger.error(f"Burst {name}: scheduling failed, enqueueing {len(messages)} at once: {e}")
+        await enqueue_many(messages)
+        return BurstReport(name, len(messages), now, now)
+
+    # Pump общий на все рассылки: раньше, чем разберётся вся очередь при бюджете, не закончим
+    finish_at = max(now + max(offsets), now + (backlog + len(messages)) / budget)
+    report = BurstReport(name, len(messages), now, finish_at)
+    await redis.hset(REPORTS_KEY, name, json.dumps(report.to_dict()))
+    logger.info(
+        f"Burst {name}: {len(messages)} messages over {window:.0f}s at ≤{budget} msg/s, "
+        f"projected completion {datetime.fromtimestamp(finish_at):%H:%M:%S}"
+    )
+    return report
+
+
+async def release_due(now: float | None = None, limit: int | None = None) -> int:
+    """Перенести созревшие сообщения в outbound (не больше limit); вернуть их число."""
+    now = time.time() if now is None else now
+    limit = _settings().burst_send_budget if limit is None else limit
+    redis = get_redis()
+    members = await redis.zrangebyscore(DUE_KEY, "-inf", now, start=0, num=limit)
+    if not members:
+        return 0
+    # ZREM вернёт 1 только одному из конкурирующих процессов
+    pipe = redis.pipeline(transaction=False)
+    for member in members:
+        pipe.zrem(DUE_KEY, member)
+    claimed = [m for m, removed in zip(members, await pipe.execute()) if removed]
+    return await enqueue_many([_decode(m) for m in claimed])
+
+
+async def get_burst_stats() -> dict:
+    redis = get_redis()
+    reports = await redis.hgetall(REPORTS_KEY)
+    return {
+        "pending": await redis.zcard(DUE_KEY),
+        "last": {name: json.loads(raw) for name, raw in reports.items()},
+    }
+
+
+class BurstPump:
+    def __init__(self, interval: float = PUMP_INTERVAL):
+        self.interval = interval
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        logger.info("Burst pump started")
+        while not self._stopping:
+            try:
+                await release_due(limit=max(1, int(_settings().burst_send_budget * self.interval)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Burst pump error: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,216 @@
+"""
+Coalesce — окно склейки некритичных уведомлений по (получатель, объект).
+
+Массовые операции (импорт Excel, каскадный сдвиг) порождают десятки событий
+по одному объекту за секунды. Вместо push на каждое событие:
+
+    await coalesce(chat_id, object_id, "task_status", text, reply_markup=kb)
+
+(или coalesce_many([Push(...), ...]) — пачкой за один round trip) кладёт
+сообщение в буфер tg:digest:{chat_id}:{object_id} и ставит срок
+выдачи (now + окно) в tg:digest:due. DigestFlusher (процесс бота) по
+истечении окна забирает буфер и ставит в outbound одно сообщение: если
+событие одно — его исходный текст, иначе сводку с количеством по видам и
+первыми N пунктами. Критичные типы, эскалации и всё, что ждёт действия
+(типы из EscalationMatrix.TIMING, кнопки с callback_data — принять/отклонить
+и т.п.), идут в outbound сразу: в сводке у каждого пункта своих кнопок нет.
+
+Окно и N — settings.notify_coalesce_window / notify_digest_top.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.db.redis import get_redis
+from bot.services.fanout import Delivery, Outgoing
+from bot.services.notification_center import NOTIF_PRIORITY_MAP
+from bot.services.outbound import enqueue_many
+from bot.services.trigger_engine import EscalationMatrix
+
+logger = logging.getLogger(__name__)
+
+BUFFER_PREFIX = "tg:digest"
+DUE_KEY = f"{BUFFER_PREFIX}:due"
+FLUSH_BATCH = 200
+FLUSH_INTERVAL = 1.0
+SNIPPET_LEN = 80
+
+_TAG = re.compile(r"<[^>]+>")
+
+
+def is_urgent(ntype: str) -> bool:
+    """Эскалации, critical-типы и ждущие действия (есть сроки в TIMING) не ждут окна."""
+    return (ntype.startswith("escalation") or NOTIF_PRIORITY_MAP.get(ntype) == "critical"
+            or ntype in EscalationMatrix.TIMING)
+
+
+def has_actions(markup) -> bool:
+    """Кнопки с callback_data — действие над конкретным пунктом; навигация — web_app/url."""
+    if markup is None:
+        return False
+    return any(b.callback_data for row in markup.inline_keyboard for b in row)
+
+
+def buffer_key(chat_id: int, object_id: int) -> str:
+    return f"{BUFFER_PREFIX}:{chat_id}:{object_id}"
+
+
+def _settings():
+    from bot.config import get_settings
+    return get_settings()
+
+
+# ─── BUFFER ──────────────────────────────────────────────
+
+@dataclass
+class Push:
+    chat_id: int
+    text: str
+    object_id: int | None = None
+    ntype: str = "general"
+    reply_markup: Any = None
+
+
+async def coalesce(chat_id: int, object_id: int | None, ntype: str, text: str,
+                   reply_markup=None, window: int | None = None):
+    """Отправить сразу (срочное/без объекта) или положить в окно склейки."""
+    await coalesce_many([Push(chat_id, text, object_id, ntype, reply_markup)], window)
+
+
+async def coalesce_many(pushes: list[Push], window: int | None = None) -> list[Delivery]:
+    """Пачка push одним pipeline в буферы + одним enqueue_many для срочных.
+
+    Возвращает Delivery на каждый push: ok — сообщение принято в буфер или
+    очередь (сама отправка — в OutboundDispatcher).
+    """
+    if not pushes:
+        return []
+    window = _settings().notify_coalesce_window if window is None else window
+    immediate, buffered = [], []
+    for p in pushes:
+        urgent = (p.object_id is None or window <= 0 or is_urgent(p.ntype)
+                  or has_actions(p.reply_markup))
+        (immediate if urgent else buffered).append(p)
+
+    if buffered:
+        try:
+            pipe = get_redis().pipeline(transaction=True)
+            due = time.time() + window
+            for p in buffered:
+                item = {"type": p.ntype, "text": p.text}
+                if p.reply_markup is not None:
+                    item["kb"] = p.reply_markup.model_dump_json(exclude_none=True)
+                key = buffer_key(p.chat_id, p.object_id)
+                pipe.rpush(key, json.dumps(item, ensure_ascii=False))
+                pipe.expire(key, window * 10)
+                pipe.zadd(DUE_KEY, {key: due}, nx=True)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Coalesce buffer failed for {len(buffered)} pushes, sending directly: {e}")
+            immediate += buffered
+
+    results = {id(p): Delivery(p.chat_id, True) for p in pushes}
+    try:
+        await enqueue_many([
+            Outgoing(p.chat_id, p.text, reply_markup=p.reply_markup, object_id=p.object_id) for p in immediate
+        ])
+    except Exception as e:
+        logger.error(f"Push enqueue failed for {len(immediate)} recipients: {e}")
+        for p in immediate:
+            results[id(p)] = Delivery(p.chat_id, False, str(e))
+    return [results[id(p)] for p in pushes]
+
+
+# ─── DIGEST ──────────────────────────────────────────────
+
+def _lines(text: str) -> list[str]:
+    return [ln.strip() for ln in _TAG.sub("", text).splitlines() if ln.strip()]
+
+
+def render_digest(items: list[dict], top: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Один пункт — как есть; несколько — сводка: виды событий × количество и первые top пунктов."""
+    markups = {item.get("kb") for item in items}
+    kb_json = markups.pop() if len(markups) == 1 else None
+    kb = InlineKeyboardMarkup.model_validate_json(kb_json) if kb_json else None
+    if len(items) == 1:
+        return items[0]["text"], kb
+
+    counts: dict[str, int] = {}
+    snippets = []
+    for item in items:
+        lines = _lines(item["text"]) or [item["type"]]
+        counts[lines[0]] = counts.get(lines[0], 0) + 1
+        if len(snippets) < top:
+            snippet = " · ".join(lines[1:3]) or lines[0]
+            snippets.append(snippet if len(snippet) <= SNIPPET_LEN else snippet[:SNIPPET_LEN - 1] + "…")
+
+    text = f"📬 <b>Сводка: {len(items)} уведомл.</b>\n"
+    text += "\n".join(f"{headline} — {n}" for headline, n in counts.items())
+    text += "\n\n" + "\n".join(f"• {s}" for s in snippets)
+    if len(items) > top:
+        text += f"\n…и ещё {len(items) - top}"
+    return text, kb
+
+
+async def take_buffer(key: str) -> list[dict]:
+    """Забрать буфер целиком (LRANGE + DEL атомарно)."""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.lrange(key, 0, -1)
+    pipe.delete(key)
+    raw, _ = await pipe.execute()
+    return [json.loads(x) for x in raw]
+
+
+async def flush_due(now: float | None = None, top: int | None = None) -> int:
+    """Выдать созревшие буферы; вернуть число поставленных в outbound сообщений."""
+    from bot.utils.deep_links import object_button
+
+    now = time.time() if now is None else now
+    top = _settings().notify_digest_top if top is None else top
+    redis = get_redis()
+    keys = await redis.zrangebyscore(DUE_KEY, "-inf", now, start=0, num=FLUSH_BATCH)
+
+    messages = []
+    for key in keys:
+        # ZREM вернёт 1 только одному из конкурирующих процессов
+        if not await redis.zrem(DUE_KEY, key):
+            continue
+        items = await take_buffer(key)
+        if not items:
+            continue
+        _, chat_id, object_id = key.rsplit(":", 2)
+        text, kb = render_digest(items, top)
+        if kb is None and len(items) > 1:
+            kb = InlineKeyboardMarkup(inline_keyboard=[[object_button(int(object_id))]])
+        messages.append(Outgoing(int(chat_id), text, reply_markup=kb, object_id=int(object_id)))
+
+    await enqueue_many(messages)
+    return len(messages)
+
+
+class DigestFlusher:
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        logger.info("Digest flusher started")
+        while not self._stopping:
+            try:
+                sent = await flush_due()
+                if sent:
+                    logger.info(f"Digest flusher: {sent} messages")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Digest flusher error: {e}")
+            await asyncio.sleep(self.interval)
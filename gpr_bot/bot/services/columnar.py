@@ -0,0 +1,37 @@
+"""
+Columnar — табличный ответ API в виде параллельных массивов.
+
+    {"format": "columnar", "count": 2,
+     "columns": {
+         "floor":  [1, 1],
+         "facade": {"dict": ["Север"], "codes": [0, 0]},
+         ...}}
+
+Строковые колонки с повторами (фасад, код работ, статус) кодируются словарём:
+значения строки i — dict[codes[i]]. Для сетки 40 этажей × 4 фасада × 7 работ
+это в разы меньше JSON и быстрее парсится на клиенте, чем список объектов.
+"""
+from decimal import Decimal
+
+
+def _plain(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def encode_dict(values) -> dict:
+    """Словарное кодирование колонки: {"dict": [уникальные], "codes": [индексы]}."""
+    index: dict = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    return {"dict": list(index), "codes": codes}
+
+
+def to_columnar(rows, columns: list[str], dict_columns: set[str] = frozenset()) -> dict:
+    """rows — последовательность кортежей в порядке columns."""
+    arrays = list(zip(*rows)) if rows else [()] * len(columns)
+    out = {}
+    for name, values in zip(columns, arrays):
+        if name in dict_columns:
+            out[name] = encode_dict(values)
+        else:
+            out[name] = [_plain(v) for v in values]
+    return {"format": "columnar", "count": len(rows), "columns": out}
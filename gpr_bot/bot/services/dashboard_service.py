@@ -0,0 +1,177 @@
+"""
+Dashboard Service — агрегаты для GET /api/dashboard.
+Все счётчики считаются фиксированным числом сгруппированных запросов
+(COUNT(*) FILTER + GROUP BY object_id), независимо от числа объектов.
+"""
+import logging
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.db.models import (
+    ConstructionObject, ObjectStatus, ObjectStats, Task, TaskStatus,
+    SupplyOrder, SupplyStatus, FloorVolume, WorkType,
+)
+
+logger = logging.getLogger(__name__)
+
+MODULE_CODES = ("МОД",)
+BRACKET_CODES = ("КРН-Н", "КРН-В")
+DASHBOARD_OBJECT_STATUSES = (ObjectStatus.ACTIVE, ObjectStatus.PLANNING)
+
+
+def _pct(fact: float, plan: float) -> float:
+    return round(fact / plan * 100, 1) if plan > 0 else 0
+
+
+async def _global_counters(session: AsyncSession) -> dict:
+    """Глобальные счётчики — один запрос."""
+    active_objects = (
+        select(func.count())
+        .select_from(ConstructionObject)
+        .where(ConstructionObject.status == ObjectStatus.ACTIVE)
+        .scalar_subquery()
+    )
+    delayed_supplies = (
+        select(func.count())
+        .select_from(SupplyOrder)
+        .where(SupplyOrder.status == SupplyStatus.DELAYED)
+        .scalar_subquery()
+    )
+    row = (await session.execute(
+        select(
+            active_objects.label("active_objects"),
+            func.count().label("total_tasks"),
+            func.count().filter(Task.status == TaskStatus.OVERDUE).label("overdue_tasks"),
+            func.count().filter(Task.status == TaskStatus.DONE).label("completed_tasks"),
+            delayed_supplies.label("delayed_supplies"),
+        ).select_from(Task)
+    )).one()
+    return {
+        "active_objects": row.active_objects or 0,
+        "total_tasks": row.total_tasks or 0,
+        "overdue_tasks": row.overdue_tasks or 0,
+        "completed_tasks": row.completed_tasks or 0,
+        "delayed_supplies": row.delayed_supplies or 0,
+    }
+
+
+async def _object_summaries(session: AsyncSession) -> list[dict]:
+    """Активные/планируемые объекты со счётчиками задач из object_stats — один запрос."""
+    result = await session.execute(
+        select(
+            ConstructionObject.id,
+            ConstructionObject.name,
+            ConstructionObject.city,
+            ConstructionObject.status,
+            ConstructionObject.deadline_date,
+            func.coalesce(ObjectStats.task_total, 0).label("task_total"),
+            func.coalesce(ObjectStats.task_done, 0).label("task_done"),
+            func.coalesce(ObjectStats.task_overdue, 0).label("task_overdue"),
+        )
+        .outerjoin(ObjectStats, ObjectStats.object_id == ConstructionObject.id)
+        .where(ConstructionObject.status.in_(DASHBOARD_OBJECT_STATUSES))
+        .order_by(ConstructionObject.deadline_date)
+    )
+    objects = []
+    for row in result.all():
+        objects.append({
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "status": row.status.value,
+            "deadline_date": row.deadline_date.isoformat() if row.deadline_date else None,
+            "task_total": row.task_total,
+            "task_done": row.task_done,
+            "task_overdue": row.task_overdue,
+            "progress_pct": round(row.task_done / row.task_total * 100) if row.task_total > 0 else 0,
+        })
+    return objects
+
+
+async def _production(session: AsyncSession, object_ids: list[int]) -> dict:
+    """МОД/КРН план-факт по объектам + KPI по видам работ — два запроса."""
+    is_mod = WorkType.code.in_(MODULE_CODES)
+    is_brk = WorkType.code.in_(BRACKET_CODES)
+    per_object = await session.execute(
+        select(
+            FloorVolume.object_id,
+            func.coalesce(func.sum(FloorVolume.plan_qty).filter(is_mod), 0).label("mod_plan"),
+            func.coalesce(func.sum(FloorVolume.fact_qty).filter(is_mod), 0).label("mod_fact"),
+            func.coalesce(func.sum(FloorVolume.plan_qty).filter(is_brk), 0).label("brk_plan"),
+            func.coalesce(func.sum(FloorVolume.fact_qty).filter(is_brk), 0).label("brk_fact"),
+        )
+        .join(WorkType, WorkType.id == FloorVolume.work_type_id)
+        .where(FloorVolume.object_id.in_(object_ids))
+        .group_by(FloorVolume.object_id)
+    )
+    prod_rows = {row.object_id: row for row in per_object.all()}
+
+    kpi_result = await session.execute(
+        select(
+            WorkType.name,
+            WorkType.unit,
+            func.coalesce(func.sum(FloorVolume.plan_qty), 0).label("plan"),
+            func.coalesce(func.sum(FloorVolume.fact_qty), 0).label("fact"),
+        )
+        .join(WorkType, WorkType.id == FloorVolume.work_type_id)
+        .where(FloorVolume.object_id.in_(object_ids))
+        .group_by(WorkType.name, WorkType.unit, WorkType.sequence_order)
+        .order_by(WorkType.sequence_order)
+    )
+    kpi = []
+    for row in kpi_result.all():
+        p, f = float(row.plan), float(row.fact)
+        kpi.append({"name": row.name, "unit": row.unit, "plan": p, "fact": f, "pct": _pct(f, p)})
+
+    mod_plan = mod_fact = brk_plan = brk_fact = 0.0
+    obj_prod = []
+    # Порядок by_object — как в списке объектов (по дедлайну)
+    for oid in object_ids:
+        row = prod_rows.get(oid)
+        if not row:
+            continue
+        mod_plan += float(row.mod_plan)
+        mod_fact += float(row.mod_fact)
+        brk_plan += float(row.brk_plan)
+        brk_fact += float(row.brk_fact)
+        if float(row.mod_plan) > 0:
+            obj_prod.append({
+                "object_id": oid,
+                "modules_plan": int(float(row.mod_plan)),
+                "modules_fact": int(float(row.mod_fact)),
+                "modules_pct": _pct(float(row.mod_fact), float(row.mod_plan)),
+            })
+
+    mod_plan, mod_fact = int(mod_plan), int(mod_fact)
+    brk_plan, brk_fact = int(brk_plan), int(brk_fact)
+    return {
+        "modules_plan": mod_plan,
+        "modules_fact": mod_fact,
+        "modules_pct": _pct(mod_fact, mod_plan),
+        "brackets_plan": brk_plan,
+        "brackets_fact": brk_fact,
+        "brackets_pct": _pct(brk_fact, brk_plan),
+        "kpi": kpi,
+        "by_object": obj_prod,
+    }
+
+
+async def build_dashboard(session: AsyncSession) -> dict:
+    """
+    Полный набор данных для DashboardOut.
+    Не более 4 SQL-запросов при любом количестве объектов.
+    """
+    data = await _global_counters(session)
+    objects = await _object_summaries(session)
+
+    production = None
+    object_ids = [o["id"] for o in objects]
+    if object_ids:
+        try:
+            production = await _production(session, object_ids)
+        except Exception as e:
+            logger.warning(f"Dashboard production aggregation failed: {e}")
+            production = None
+
+    data["objects"] = objects
+    data["production"] = production
+    return data
@@ -0,0 +1,120 @@
+"""
+Delivery Log — итоги доставки Telegram-сообщений и недоступные получатели.
+
+OutboundDispatcher после каждого чтения потока пишет накопленные итоги одним INSERT:
+sent / failed (с причиной) / skipped. «В очереди» — это сами записи потока
+tg:outbound (глубину показывает /api/outbound/stats).
+
+Если Telegram отвечает «bot was blocked», «chat not found», «bot was kicked»
+и т.п., получатель помечается недоступным: users.tg_unreachable_at /
+object_chats.unreachable_at + Redis-множество tg:unreachable, по которому
+диспетчер пропускает отправку. Метка снимается, когда пользователь снова
+пишет боту (AuthMiddleware) или бота возвращают в группу (chat_links).
+
+Доля ошибок по объектам — failure_rates() → /api/admin/delivery-failures.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy import case, func, insert, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import ConstructionObject, MessageDelivery, ObjectChat, User
+from bot.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+UNREACHABLE_KEY = "tg:unreachable"
+
+UNREACHABLE_MARKERS = (
+    "bot was blocked", "chat not found", "bot was kicked", "user is deactivated",
+    "bot is not a member", "group chat was deactivated", "chat was deleted",
+)
+
+
+def is_unreachable_error(error: Exception) -> bool:
+    """Ошибка означает, что писать в чат бессмысленно до действия получателя."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and any(m in str(error).lower() for m in UNREACHABLE_MARKERS)
+
+
+# ─── UNREACHABLE ─────────────────────────────────────────
+
+async def unreachable_among(chat_ids) -> set[int]:
+    chat_ids = list(chat_ids)
+    if not chat_ids:
+        return set()
+    flags = await get_redis().smismember(UNREACHABLE_KEY, [str(c) for c in chat_ids])
+    return {c for c, flag in zip(chat_ids, flags) if flag}
+
+
+async def mark_unreachable(session: AsyncSession, chat_ids: set[int]):
+    if not chat_ids:
+        return
+    now = datetime.utcnow()
+    await session.execute(
+        update(User)
+        .where(User.telegram_id.in_(chat_ids), User.tg_unreachable_at.is_(None))
+        .values(tg_unreachable_at=now)
+    )
+    await session.execute(
+        update(ObjectChat)
+        .where(ObjectChat.chat_id.in_(chat_ids), ObjectChat.unreachable_at.is_(None))
+        .values(unreachable_at=now)
+    )
+    await get_redis().sadd(UNREACHABLE_KEY, *[str(c) for c in chat_ids])
+    logger.info(f"Marked unreachable: {sorted(chat_ids)}")
+
+
+async def mark_reachable(session: AsyncSession, chat_id: int):
+    """Получатель снова доступен (написал боту / бот снова в группе)."""
+    await session.execute(update(User).where(User.telegram_id == chat_id).values(tg_unreachable_at=None))
+    await session.execute(update(ObjectChat).where(ObjectChat.chat_id == chat_id).values(unreachable_at=None))
+    await get_redis().srem(UNREACHABLE_KEY, str(chat_id))
+
+
+async def load_unreachable(session: AsyncSession) -> int:
+    """Восстановить tg:unreachable из БД (при старте диспетчера)."""
+    chat_ids = (await session.execute(union(
+        select(User.telegram_id).where(User.tg_unreachable_at.is_not(None)),
+        select(ObjectChat.chat_id).where(ObjectChat.unreachable_at.is_not(None)),
+    ))).scalars().all()
+    redis = get_redis()
+    pipe = redis.pipeline(transaction=True)
+    pipe.delete(UNREACHABLE_KEY)
+    if chat_ids:
+        pipe.sadd(UNREACHABLE_KEY, *[str(c) for c in chat_ids])
+    await pipe.execute()
+    return len(chat_ids)
+
+
+# ─── RECORDS ─────────────────────────────────────────────
+
+async def record_deliveries(session: AsyncSession, records: list[dict]):
+    """records: [{chat_id, object_id, notification_id, status, reason, attempts, enqueued_at}]"""
+    if records:
+        await session.execute(insert(MessageDelivery), records)
+
+
+async def failure_rates(session: AsyncSession, days: int = 7) -> list[dict]:
+    """Доставка по объектам за days дней, худшие сверху."""
+    failed = func.count(case((MessageDelivery.status == "failed", 1)))
+    skipped = func.count(case((MessageDelivery.status == "skipped", 1)))
+    total = func.count()
+    result = await session.execute(
+        select(MessageDelivery.object_id, ConstructionObject.name, total, failed, skipped)
+        .join(ConstructionObject, ConstructionObject.id == MessageDelivery.object_id)
+        .where(MessageDelivery.created_at >= datetime.utcnow() - timedelta(days=days))
+        .group_by(MessageDelivery.object_id, ConstructionObject.name)
+        .order_by((failed + skipped).desc())
+    )
+    return [
+        {
+            "object_id": object_id, "object_name": name, "total": n,
+            "failed": f, "skipped": sk,
+            "failure_rate": round((f + sk) / n, 4) if n else 0.0,
+        }
+        for object_id, name, n, f, sk in result.all()
+    ]
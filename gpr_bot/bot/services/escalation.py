@@ -0,0 +1,158 @@
+"""
+Escalation — эскалация просроченных задач одним проходом, без запросов на задачу.
+
+Ступени по дням просрочки: 1 → исполнитель, 3 → PM объекта, 7 → директора.
+Число запросов не зависит от числа задач:
+  1. просроченные задачи ровно на 1/3/7 дней вместе с исполнителем — один
+     SELECT с LEFT JOIN users (остальные просроченные в этот день не эскалируются);
+  2. карта объект → PM/админы объекта (object_roles) — один SELECT, только если
+     есть задачи на 3 дня;
+  3. директора и админы — один SELECT, только если есть задачи на 7 дней;
+  4. уведомления эскалации одним INSERT … RETURNING id.
+Отправку в Telegram делает вызывающий (scheduler/tasks.py) после commit.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import Notification, NotificationType, ObjectRole, Task, TaskStatus, User, UserRole
+from bot.services.overdue import Recipient
+
+STEPS = (1, 3, 7)
+
+
+@dataclass
+class Escalation:
+    telegram_id: int
+    object_id: int
+    text: str
+    notification_id: int | None = None
+
+
+@dataclass
+class _Overdue:
+    id: int
+    title: str
+    deadline: date
+    object_id: int
+    assignee: Recipient | None
+
+    @property
+    def assignee_name(self) -> str:
+        return self.assignee.full_name if self.assignee else "—"
+
+
+async def _overdue_buckets(session: AsyncSession, today: date, scope) -> dict[int, list[_Overdue]]:
+    days_by_deadline = {today - timedelta(days=d): d for d in STEPS}
+    result = await session.execute(
+        select(
+            Task.id, Task.title, Task.deadline, Task.object_id,
+            User.id, User.telegram_id, User.full_name,
+        )
+        .outerjoin(User, User.id == Task.assignee_id)
+        .where(
+            Task.status == TaskStatus.OVERDUE, Task.deadline.in_(days_by_deadline),
+            *([] if scope is None else [scope]),
+        )
+    )
+    buckets: dict[int, list[_Overdue]] = {d: [] for d in STEPS}
+    for task_id, title, deadline, object_id, user_id, telegram_id, full_name in result.all():
+        assignee = Recipient(user_id, telegram_id, full_name) if user_id else None
+        buckets[days_by_deadline[deadline]].append(_Overdue(task_id, title, deadline, object_id, assignee))
+    return buckets
+
+
+async def _object_managers(session: AsyncSession, object_ids: set[int]) -> dict[int, list[Recipient]]:
+    if not object_ids:
+        return {}
+    result = await session.execute(
+        select(ObjectRole.object_id, User.id, User.telegram_id, User.full_name)
+        .join(User, User.id == ObjectRole.user_id)
+        .where(
+            ObjectRole.object_id.in_(object_ids),
+            ObjectRole.role.in_([UserRole.PROJECT_MANAGER, UserRole.ADMIN]),
+        )
+    )
+    managers: dict[int, list[Recipient]] = {}
+    for object_id, user_id, telegram_id, full_name in result.all():
+        managers.setdefault(object_id, []).append(Recipient(user_id, telegram_id, full_name))
+    return managers
+
+
+async def _directors(session: AsyncSession) -> list[Recipient]:
+    result = await session.execute(
+        select(User.id, User.telegram_id, User.full_name)
+        .where(User.role.in_([UserRole.DIRECTOR, UserRole.ADMIN]), User.is_active == True)
+    )
+    return [Recipient(*r) for r in result.all()]
+
+
+def _pm_text(task: _Overdue) -> str:
+    return (
+        f"⚠️ <b>Эскалация: 3 дня просрочки</b>\n\n"
+        f"📋 {task.title}\n"
+        f"👤 Исполнитель: {task.assignee_name}\n"
+        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}"
+    )
+
+
+def _director_text(task: _Overdue) -> str:
+    return (
+        f"🚨 <b>Критическая эскалация: 7 дней просрочки</b>\n\n"
+        f"📋 {task.title}\n"
+        f"👤 Исполнитель: {task.assignee_name}\n"
+        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}"
+    )
+
+
+async def sweep_escalations(session: AsyncSession, today: date, scope=None) -> list[Escalation]:
+    """Собрать эскалации на today, записать уведомления; вернуть push к отправке.
+
+    scope — дополнительное условие на задачи (инкрементальный скан, bot/services/watermarks.py).
+    """
+    buckets = await _overdue_buckets(session, today, scope)
+    if not any(buckets.values()):
+        return []
+
+    managers = await _object_managers(session, {t.object_id for t in buckets[3]})
+    directors = await _directors(session) if buckets[7] else []
+
+    pushes = [
+        Escalation(
+            task.assignee.telegram_id, task.object_id,
+            f"🔴 <b>Просрочено 1 день</b>\n\n"
+            f"📋 {task.title}\n"
+            f"Дедлайн был: {task.deadline.strftime('%d.%m.%Y')}",
+        )
+        for task in buckets[1] if task.assignee
+    ]
+
+    rows, escalated = [], []
+    for task in buckets[3]:
+        text = _pm_text(task)
+        for pm in managers.get(task.object_id, []):
+            rows.append({
+                "user_id": pm.id, "type": NotificationType.ESCALATION,
+                "title": f"⚠️ Эскалация: {task.title}",
+                "text": text, "entity_type": "task", "entity_id": task.id,
+            })
+            escalated.append(Escalation(pm.telegram_id, task.object_id, text))
+    for task in buckets[7]:
+        text = _director_text(task)
+        for director in directors:
+            rows.append({
+                "user_id": director.id, "type": NotificationType.ESCALATION,
+                "title": f"🚨 Критическая: {task.title}",
+                "text": text, "entity_type": "task", "entity_id": task.id,
+            })
+            escalated.append(Escalation(director.telegram_id, task.object_id, text))
+
+    if rows:
+        ids = (await session.execute(
+            insert(Notification).returning(Notification.id, sort_by_parameter_order=True), rows,
+        )).scalars().all()
+        for push, notification_id in zip(escalated, ids):
+            push.notification_id = notification_id
+    return pushes + escalated
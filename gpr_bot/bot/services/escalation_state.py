@@ -0,0 +1,175 @@
+"""
+Escalation state — ступени эскалации уведомлений, ждущих действия, по сроку.
+
+Ступени и сроки — EscalationMatrix.TIMING (bot/services/trigger_engine.py):
+минуты от создания уведомления до L1 (повтор получателю), L2 (PM объекта)
+и L3 (директора). Уведомление, на которое ждут действия, ставится на учёт
+в той же транзакции:
+
+    notif = await _create_notif(db, ...)
+    track(db, notif, subject=("task", task.id), object_id=task.object_id)
+
+escalation_state хранит пройденную ступень и next_escalation_at с частичным
+индексом. Воркер (scheduler/tasks.py, escalate_pending) берёт только
+созревшие строки — FOR UPDATE SKIP LOCKED, поэтому работа O(созревших), а
+несколько воркеров не берут одну строку дважды. Действие по уведомлению
+(кнопка в Mini App) снимает учёт — acknowledge(); любая смена статуса
+задачи, кроме ASSIGNED (принять/отклонить в Telegram, /tasks —
+transition_task, PATCH /api/tasks/{id}/status), — acknowledge_subject().
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import EscalationState, Notification, NotificationType, ObjectRole, User, UserRole
+from bot.services.fanout import Outgoing
+from bot.services.trigger_engine import EscalationMatrix
+
+BATCH_SIZE = 100
+TIMING = EscalationMatrix.TIMING
+
+
+def _type_of(notif: Notification) -> str:
+    return getattr(notif.type, "value", notif.type)
+
+
+def next_escalation_at(ntype: str, created_at: datetime, level: int) -> datetime | None:
+    """Срок ступени level + 1 или None, если ступеней больше нет."""
+    minutes = TIMING.get(ntype, {}).get(f"l{level + 1}")
+    return created_at + timedelta(minutes=minutes) if minutes else None
+
+
+def track(session: AsyncSession, notif: Notification, subject: tuple[str, int] | None = None,
+          object_id: int | None = None, now: datetime | None = None) -> EscalationState | None:
+    """Поставить уведомление на учёт; для типов без сроков в TIMING — ничего."""
+    ntype = _type_of(notif)
+    if ntype not in TIMING:
+        return None
+    now = now or datetime.utcnow()
+    subject_type, subject_id = subject or (notif.entity_type, notif.entity_id)
+    state = EscalationState(
+        notification=notif, subject_type=subject_type, subject_id=subject_id, object_id=object_id,
+        level=0, created_at=now, next_escalation_at=next_escalation_at(ntype, now, 0),
+    )
+    session.add(state)
+    return state
+
+
+async def acknowledge(session: AsyncSession, notification_id: int) -> int:
+    result = await session.execute(
+        delete(EscalationState).where(EscalationState.notification_id == notification_id)
+    )
+    return result.rowcount
+
+
+async def acknowledge_subject(session: AsyncSession, subject_type: str, subject_id: int) -> int:
+    """Снять учёт со всех уведомлений о сущности (действие совершено не из уведомления)."""
+    result = await session.execute(
+        delete(EscalationState).where(
+            EscalationState.subject_type == subject_type, EscalationState.subject_id == subject_id,
+        )
+    )
+    return result.rowcount
+
+
+async def claim_due(session: AsyncSession, now: datetime, limit: int = BATCH_SIZE):
+    """Созревшие строки с их уведомлениями; заняты до конца транзакции."""
+    result = await session.execute(
+        select(EscalationState, Notification)
+        .join(Notification, Notification.id == EscalationState.notification_id)
+        .where(EscalationState.next_escalation_at <= now)
+        .order_by(EscalationState.next_escalation_at)
+        .limit(limit)
+        .with_for_update(of=EscalationState, skip_locked=True)
+    )
+    return result.all()
+
+
+@dataclass
+class _Recipient:
+    id: int
+    telegram_id: int
+
+
+async def _users(session: AsyncSession, user_ids: set[int]) -> dict[int, list[_Recipient]]:
+    if not user_ids:
+        return {}
+    result = await session.execute(
+        select(User.id, User.telegram_id).where(User.id.in_(user_ids), User.is_active == True)
+    )
+    return {user_id: [_Recipient(user_id, telegram_id)] for user_id, telegram_id in result.all()}
+
+
+async def _managers(session: AsyncSession, object_ids: set[int]) -> dict[int, list[_Recipient]]:
+    if not object_ids:
+        return {}
+    result = await session.execute(
+        select(ObjectRole.object_id, User.id, User.telegram_id)
+        .join(User, User.id == ObjectRole.user_id)
+        .where(
+            ObjectRole.object_id.in_(object_ids),
+            ObjectRole.role.in_([UserRole.PROJECT_MANAGER, UserRole.ADMIN]),
+            User.is_active == True,
+        )
+    )
+    managers: dict[int, list[_Recipient]] = {}
+    for object_id, user_id, telegram_id in result.all():
+        managers.setdefault(object_id, []).append(_Recipient(user_id, telegram_id))
+    return managers
+
+
+async def _directors(session: AsyncSession) -> list[_Recipient]:
+    result = await session.execute(
+        select(User.id, User.telegram_id)
+        .where(User.role.in_([UserRole.DIRECTOR, UserRole.ADMIN]), User.is_active == True)
+    )
+    return [_Recipient(*r) for r in result.all()]
+
+
+def _text(level: int, notif: Notification, hours: float) -> str:
+    if level == 1:
+        return f"🔔 <b>Напоминание</b>\n\n{notif.title}\nНет ответа {hours:g} ч"
+    if level == 2:
+        return f"⚠️ <b>Эскалация</b>\n\n{notif.title}\nИсполнитель не ответил {hours:g} ч"
+    return f"🚨 <b>Критическая эскалация</b>\n\n{notif.title}\nБез ответа {hours:g} ч"
+
+
+async def process_due(session: AsyncSession, now: datetime | None = None,
+                      limit: int = BATCH_SIZE) -> tuple[int, list[Outgoing]]:
+    """Поднять созревшие на следующую ступень; вернуть (сколько взято, push к отправке после commit)."""
+    now = now or datetime.utcnow()
+    due = await claim_due(session, now, limit)
+    if not due:
+        return 0, []
+
+    levels = [(state, notif, state.level + 1) for state, notif in due]
+    managers = await _managers(session, {s.object_id for s, _, lvl in levels if lvl == 2 and s.object_id})
+    directors = await _directors(session) if any(lvl == 3 for _, _, lvl in levels) else []
+    assignees = await _users(session, {n.user_id for _, n, lvl in levels if lvl == 1})
+
+    messages, rows = [], []
+    for state, notif, level in levels:
+        hours = round((now - state.created_at).total_seconds() / 3600, 1)
+        text = _text(level, notif, hours)
+        if level == 1:
+            recipients = assignees.get(notif.user_id, [])
+        elif level == 2:
+            recipients = managers.get(state.object_id, [])
+        else:
+            recipients = directors
+        for r in recipients:
+            messages.append(Outgoing(r.telegram_id, text, object_id=state.object_id))
+            if level > 1:
+                rows.append({
+                    "user_id": r.id, "type": NotificationType.ESCALATION,
+                    "title": f"{'⚠️' if level == 2 else '🚨'} L{level}: {notif.title}"[:500],
+                    "text": text, "entity_type": notif.entity_type, "entity_id": notif.entity_id,
+                })
+        state.level = level
+        state.next_escalation_at = next_escalation_at(_type_of(notif), state.created_at, level)
+
+    if rows:
+        await session.execute(insert(Notification), rows)
+    return len(due), messages
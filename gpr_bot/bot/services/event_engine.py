@@ -1,28 +1,29 @@
 """
 Event Engine — автоматические уведомления при изменении сущностей.
-Вызывается из API endpoints при смене статусов.
+API и хендлеры не вызывают on_* напрямую, а публикуют событие в outbox
+(publish_* ниже) в транзакции изменения; on_* выполняют воркеры
+bot/services/outbox.py через обработчики из раздела OUTBOX.
+Сообщения ставятся в очередь bot/services/outbound.py; некритичные —
+через окно склейки по (получатель, объект), см. bot/services/coalesce.py.
 """
 import logging
 from datetime import datetime
-from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from bot.db.models import (
     User, UserRole, Task, TaskStatus, ObjectRole,
     Notification, NotificationType, ObjectChat,
+    SupplyOrder, ConstructionStage,
 )
 from bot.utils.deep_links import object_button, object_tasks_button, notifications_button
-from bot.config import get_settings
+from bot.services.coalesce import Push, coalesce_many
+from bot.services.escalation_state import track
+from bot.services.outbox import outbox_handler, publish
 
 logger = logging.getLogger(__name__)
 
 
-async def _get_bot() -> Bot:
-    settings = get_settings()
-    return Bot(token=settings.bot_token)
-
-
 async def _get_object_users(db: AsyncSession, object_id: int, roles: list[UserRole] | None = None):
     """Get users assigned to an object, optionally filtered by role."""
     q = select(ObjectRole, User).join(User, User.id == ObjectRole.user_id).where(
@@ -34,24 +35,30 @@ async def _get_object_users(db: AsyncSession, object_id: int, roles: list[UserRo
     return [(or_.role, u) for or_, u in result.all()]
 
 
-async def _send_to_user(bot: Bot, user: User, text: str, kb=None):
-    """Send message to user, swallow errors."""
-    try:
-        await bot.send_message(user.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-    except Exception as e:
-        logger.warning(f"Failed to send to {user.telegram_id}: {e}")
+def _send_to_user(out: list[Push], user: User, text: str, kb=None,
+                  object_id: int | None = None, ntype: str = "general"):
+    out.append(Push(user.telegram_id, text, object_id, ntype, kb))
 
 
-async def _send_to_linked_chats(bot: Bot, db: AsyncSession, object_id: int, text: str, kb=None):
+async def _send_to_linked_chats(db: AsyncSession, out: list[Push], object_id: int, text: str,
+                                kb=None, ntype: str = "general"):
     """Send to all TG groups linked to this object."""
     result = await db.execute(
-        select(ObjectChat).where(ObjectChat.object_id == object_id, ObjectChat.is_active == True)
+        select(ObjectChat.chat_id).where(
+            ObjectChat.object_id == object_id, ObjectChat.is_active == True, ObjectChat.unreachable_at.is_(None),
+        )
     )
-    for chat in result.scalars().all():
-        try:
-            await bot.send_message(chat.chat_id, text, parse_mode="HTML", reply_markup=kb)
-        except Exception as e:
-            logger.warning(f"Failed to send to chat {chat.chat_id}: {e}")
+    for chat_id in result.scalars().all():
+        out.append(Push(chat_id, text, object_id, ntype, kb))
+
+
+async def _dispatch(out: list[Push], event: str):
+    """Все push события — одной пачкой; неудачи по получателям — в лог."""
+    results = await coalesce_many(out)
+    failed = [d.chat_id for d in results if not d.ok]
+    if failed:
+        logger.warning(f"{event}: {len(failed)}/{len(results)} recipients failed: {failed}")
+    return results
 
 
 async def _create_notif(db: AsyncSession, user_id: int, ntype: str, title: str, text: str = "",
@@ -70,10 +77,10 @@ async def _create_notif(db: AsyncSession, user_id: int, ntype: str, title: str,
 
 async def on_task_assigned(db: AsyncSession, task: Task, assigned_by: User | None = None):
     """Задача назначена исполнителю — push + кнопки Принять/Отклонить."""
+    out: list[Push] = []
     if not task.assignee_id:
         return
 
-    bot = await _get_bot()
     assignee = await db.get(User, task.assignee_id)
     if not assignee:
         return
@@ -95,10 +102,11 @@ async def on_task_assigned(db: AsyncSession, task: Task, assigned_by: User | Non
         [object_tasks_button(task.object_id)],
     ])
 
-    await _create_notif(db, assignee.id, "task_assigned",
-                        f"📋 Новая задача: {task.title}", text,
-                        "task", task.object_id)
-    await _send_to_user(bot, assignee, text, kb)
+    notif = await _create_notif(db, assignee.id, "task_assigned",
+                                f"📋 Новая задача: {task.title}", text,
+                                "task", task.object_id)
+    track(db, notif, subject=("task", task.id), object_id=task.object_id)
+    _send_to_user(out, assignee, text, kb, task.object_id, "task_assigned")
 
     # Notify linked chats
     chat_text = (
@@ -106,13 +114,13 @@ async def on_task_assigned(db: AsyncSession, task: Task, assigned_by: User | Non
         f"{task.title}\n"
         f"👤 Исполнитель: {assignee.full_name}{deadline_text}"
     )
-    await _send_to_linked_chats(bot, db, task.object_id, chat_text)
-    await bot.session.close()
+    await _send_to_linked_chats(db, out, task.object_id, chat_text, ntype="task_assigned")
+    return await _dispatch(out, "on_task_assigned")
 
 
 async def on_task_status_changed(db: AsyncSession, task: Task, old_status: str, changed_by: User | None = None):
     """Статус задачи изменился — уведомить заинтересованных."""
-    bot = await _get_bot()
+    out: list[Push] = []
     new_status = task.status.value if hasattr(task.status, 'value') else task.status
 
     STATUS_EMOJI = {
@@ -145,13 +153,13 @@ async def on_task_status_changed(db: AsyncSession, task: Task, old_status: str,
         if creator:
             await _create_notif(db, creator.id, "task_assigned", f"{emoji} {task.title}: {label}",
                                 text, "task", task.object_id)
-            await _send_to_user(bot, creator, text, kb)
+            _send_to_user(out, creator, text, kb, task.object_id, "task_status")
 
     # Notify assignee if changed by someone else
     if task.assignee_id and task.assignee_id != (changed_by.id if changed_by else None):
         assignee = await db.get(User, task.assignee_id)
         if assignee:
-            await _send_to_user(bot, assignee, text, kb)
+            _send_to_user(out, assignee, text, kb, task.object_id, "task_status")
 
     # If done — notify project managers
     if new_status == 'done':
@@ -159,7 +167,7 @@ async def on_task_status_changed(db: AsyncSession, task: Task, old_status: str,
                                            [UserRole.PROJECT_MANAGER, UserRole.ADMIN])
         for role, pm in managers:
             if pm.id not in (task.assignee_id, task.created_by_id):
-                await _send_to_user(bot, pm, text, kb)
+                _send_to_user(out, pm, text, kb, task.object_id, "task_completed")
 
     # If blocked — escalate to PM
     if new_status == 'blocked':
@@ -173,11 +181,11 @@ async def on_task_status_changed(db: AsyncSession, task: Task, old_status: str,
         for role, pm in managers:
             await _create_notif(db, pm.id, "escalation", f"⛔ Блокировка: {task.title}",
                                 block_text, "task", task.object_id)
-            await _send_to_user(bot, pm, block_text, kb)
+            _send_to_user(out, pm, block_text, kb, task.object_id, "escalation")
 
     # Linked chats
-    await _send_to_linked_chats(bot, db, task.object_id, text, kb)
-    await bot.session.close()
+    await _send_to_linked_chats(db, out, task.object_id, text, kb, "task_status")
+    return await _dispatch(out, "on_task_status_changed")
 
 
 # ═══════════════════════════════════════════════════════════
@@ -186,7 +194,7 @@ async def on_task_status_changed(db: AsyncSession, task: Task, old_status: str,
 
 async def on_supply_status_changed(db: AsyncSession, order, old_status: str):
     """Статус поставки изменился."""
-    bot = await _get_bot()
+    out: list[Push] = []
     new_status = order.status.value if hasattr(order.status, 'value') else order.status
 
     SUPPLY_EMOJI = {
@@ -210,10 +218,10 @@ async def on_supply_status_changed(db: AsyncSession, order, old_status: str):
         ntype = "supply_delayed" if new_status == 'delayed' else "supply_shipped"
         await _create_notif(db, user.id, ntype, f"{emoji} {order.material_name}",
                             text, "supply", order.object_id)
-        await _send_to_user(bot, user, text)
+        _send_to_user(out, user, text, object_id=order.object_id, ntype=ntype)
 
-    await _send_to_linked_chats(bot, db, order.object_id, text)
-    await bot.session.close()
+    await _send_to_linked_chats(db, out, order.object_id, text, ntype="supply_status")
+    return await _dispatch(out, "on_supply_status_changed")
 
 
 # ═══════════════════════════════════════════════════════════
@@ -222,7 +230,7 @@ async def on_supply_status_changed(db: AsyncSession, order, old_status: str):
 
 async def on_stage_completed(db: AsyncSession, stage, object_id: int):
     """Этап монтажа завершён — уведомить ПТО для приёмки."""
-    bot = await _get_bot()
+    out: list[Push] = []
 
     text = (
         f"🏗 <b>Этап завершён</b>\n\n"
@@ -236,10 +244,10 @@ async def on_stage_completed(db: AsyncSession, stage, object_id: int):
     for role, user in users:
         await _create_notif(db, user.id, "stage_completed", f"🏗 Завершён: {stage.name}",
                             text, "stage", object_id)
-        await _send_to_user(bot, user, text)
+        _send_to_user(out, user, text, object_id=object_id, ntype="stage_completed")
 
-    await _send_to_linked_chats(bot, db, object_id, text)
-    await bot.session.close()
+    await _send_to_linked_chats(db, out, object_id, text, ntype="stage_completed")
+    return await _dispatch(out, "on_stage_completed")
 
 
 # ═══════════════════════════════════════════════════════════
@@ -248,10 +256,10 @@ async def on_stage_completed(db: AsyncSession, stage, object_id: int):
 
 async def on_fact_deviation(db: AsyncSession, object_id: int, work_name: str, deviation_pct: float):
     """Отклонение факта от плана >15% — эскалация."""
+    out: list[Push] = []
     if abs(deviation_pct) < 15:
         return
 
-    bot = await _get_bot()
     emoji = "🔴" if deviation_pct < -15 else "🟡"
 
     text = (
@@ -265,7 +273,57 @@ async def on_fact_deviation(db: AsyncSession, object_id: int, work_name: str, de
     for role, user in managers:
         await _create_notif(db, user.id, "escalation", f"{emoji} Отклонение: {work_name}",
                             text, "object", object_id)
-        await _send_to_user(bot, user, text)
+        _send_to_user(out, user, text, object_id=object_id, ntype="escalation")
+
+    await _send_to_linked_chats(db, out, object_id, text, ntype="escalation")
+    return await _dispatch(out, "on_fact_deviation")
+
+
+# ═══════════════════════════════════════════════════════════
+# OUTBOX — публикация в транзакции изменения и обработчики воркеров
+# ═══════════════════════════════════════════════════════════
+
+async def publish_task_status_changed(db: AsyncSession, task: Task, old_status: str,
+                                      changed_by: User | None, key: str):
+    await publish(db, "task_status_changed", key, task_id=task.id, old_status=old_status,
+                  changed_by_id=changed_by.id if changed_by else None)
+
+
+async def publish_task_assigned(db: AsyncSession, task: Task, assigned_by: User | None, key: str):
+    await publish(db, "task_assigned", key, task_id=task.id,
+                  assigned_by_id=assigned_by.id if assigned_by else None)
+
+
+@outbox_handler("task_status_changed")
+async def _handle_task_status_changed(db: AsyncSession, payload: dict):
+    task = await db.get(Task, payload["task_id"])
+    if task:
+        changed_by = await db.get(User, payload["changed_by_id"]) if payload.get("changed_by_id") else None
+        await on_task_status_changed(db, task, payload["old_status"], changed_by=changed_by)
+
+
+@outbox_handler("task_assigned")
+async def _handle_task_assigned(db: AsyncSession, payload: dict):
+    task = await db.get(Task, payload["task_id"])
+    if task:
+        assigned_by = await db.get(User, payload["assigned_by_id"]) if payload.get("assigned_by_id") else None
+        await on_task_assigned(db, task, assigned_by=assigned_by)
+
+
+@outbox_handler("supply_status_changed")
+async def _handle_supply_status_changed(db: AsyncSession, payload: dict):
+    order = await db.get(SupplyOrder, payload["order_id"])
+    if order:
+        await on_supply_status_changed(db, order, payload["old_status"])
+
+
+@outbox_handler("stage_completed")
+async def _handle_stage_completed(db: AsyncSession, payload: dict):
+    stage = await db.get(ConstructionStage, payload["stage_id"])
+    if stage:
+        await on_stage_completed(db, stage, stage.object_id)
+
 
-    await _send_to_linked_chats(bot, db, object_id, text)
-    await bot.session.close()
+@outbox_handler("fact_deviation")
+async def _handle_fact_deviation(db: AsyncSession, payload: dict):
+    await on_fact_deviation(db, payload["object_id"], payload["work_name"], payload["deviation_pct"])
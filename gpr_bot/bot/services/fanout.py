@@ -0,0 +1,89 @@
+"""
+Fan-out — параллельная отправка пачки Telegram-сообщений с ограничением.
+
+    results = await fan_out_results(bot, [Outgoing(chat_id, text, reply_markup=kb), ...], concurrency=10)
+    ok = await fan_out(bot, messages)  # только число успешных
+
+Одновременно обслуживается не больше concurrency чатов; сообщения одного
+чата уходят строго по порядку. Ошибка одного получателя не прерывает
+остальных, пишется в лог и попадает в его Delivery.
+
+run_per_chat — тот же планировщик для произвольного обработчика. Для
+разовой пачки: слот держится, пока чат не разобран, поэтому долгие
+ожидания внутри worker задерживают остальные чаты (очередь tg:outbound
+разбирает OutboundDispatcher — у него воркер на чат).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 10
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class Outgoing:
+    chat_id: int
+    text: str
+    reply_markup: Any = None
+    parse_mode: str = "HTML"
+    object_id: int | None = None        # для учёта доставки по объекту
+    notification_id: int | None = None
+
+
+@dataclass
+class Delivery:
+    chat_id: int
+    ok: bool
+    error: str | None = None
+
+
+def group_by_chat(items: Iterable[T], chat_of: Callable[[T], int]) -> dict[int, list[T]]:
+    """Разложить по чатам, сохраняя исходный порядок внутри чата."""
+    groups: dict[int, list[T]] = {}
+    for item in items:
+        groups.setdefault(chat_of(item), []).append(item)
+    return groups
+
+
+async def run_per_chat(groups: dict[int, list[T]], worker: Callable[[T], Awaitable[R]],
+                       concurrency: int = DEFAULT_CONCURRENCY) -> list[R]:
+    """Чаты параллельно (не больше concurrency), внутри чата — последовательно."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def drain(items: list[T]) -> list[R]:
+        async with sem:
+            return [await worker(item) for item in items]
+
+    chunks = await asyncio.gather(*(drain(items) for items in groups.values()))
+    return [r for chunk in chunks for r in chunk]
+
+
+async def fan_out_results(bot, messages: list[Outgoing],
+                          concurrency: int = DEFAULT_CONCURRENCY) -> list[Delivery]:
+    """Разослать сообщения; вернуть результат по каждому сообщению."""
+    if not messages:
+        return []
+
+    async def send(msg: Outgoing) -> Delivery:
+        try:
+            await bot.send_message(
+                msg.chat_id, msg.text,
+                parse_mode=msg.parse_mode, reply_markup=msg.reply_markup,
+            )
+            return Delivery(msg.chat_id, True)
+        except Exception as e:
+            logger.warning(f"Send to {msg.chat_id} failed: {e}")
+            return Delivery(msg.chat_id, False, str(e))
+
+    return await run_per_chat(group_by_chat(messages, lambda m: m.chat_id), send, concurrency)
+
+
+async def fan_out(bot, messages: list[Outgoing], concurrency: int = DEFAULT_CONCURRENCY) -> int:
+    """Разослать сообщения; вернуть число успешно отправленных."""
+    return sum(d.ok for d in await fan_out_results(bot, messages, concurrency))
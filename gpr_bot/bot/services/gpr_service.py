@@ -6,6 +6,7 @@ from bot.db.models import (
     GPR, GPRItem, GPRSignature, GPRStatus, Department,
     ConstructionObject, ObjectStatus, ObjectRole, User
 )
+from bot.services.object_changes import mark_object_changed
 
 
 # Template of GPR items based on the analyzed document structure
@@ -164,6 +165,7 @@ async def create_gpr_from_template(
             sort_order += 1
 
     await session.flush()
+    mark_object_changed(session, object_id)
     return gpr
 
 
@@ -211,6 +213,7 @@ async def send_gpr_for_signatures(session: AsyncSession, gpr_id: int, object_id:
 
     gpr.status = GPRStatus.PENDING_SIGNATURES
     await session.flush()
+    mark_object_changed(session, object_id)
 
 
 async def sign_gpr(session: AsyncSession, gpr_id: int, user_id: int) -> bool:
@@ -228,13 +231,15 @@ async def sign_gpr(session: AsyncSession, gpr_id: int, user_id: int) -> bool:
     sig.signed_at = datetime.utcnow()
     await session.flush()
 
+    gpr = await session.get(GPR, gpr_id)
+    mark_object_changed(session, gpr.object_id)
+
     # Check if all signed
     all_sigs = await session.execute(
         select(GPRSignature).where(GPRSignature.gpr_id == gpr_id)
     )
     signatures = all_sigs.scalars().all()
     if all(s.signed for s in signatures):
-        gpr = await session.get(GPR, gpr_id)
         gpr.status = GPRStatus.ACTIVE
         obj = await session.get(ConstructionObject, gpr.object_id)
         obj.status = ObjectStatus.ACTIVE
@@ -0,0 +1,64 @@
+"""
+Keyset — курсорная пагинация лент по (created_at, id), новые сверху.
+
+    page = await keyset_page(db, select(Notification).where(...),
+                             Notification.created_at, Notification.id,
+                             cursor=cursor, limit=50)
+    page.items, page.next_cursor  # next_cursor=None — лента закончилась
+
+Курсор — непрозрачная строка (urlsafe base64 от "created_at|id"), клиент
+возвращает её как ?cursor=. В отличие от OFFSET, страница читается одним
+проходом по индексу (…, created_at DESC) и не «плывёт» при новых записях.
+"""
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """ValueError на битом курсоре."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, _, row_id = raw.rpartition("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def apply_keyset(query, created_col, id_col, cursor: str | None, limit: int):
+    """Условие «старше курсора» + порядок + limit+1 (лишняя строка — признак следующей страницы)."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+    return query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def make_page(rows, limit: int, created_attr: str = "created_at", id_attr: str = "id") -> Page:
+    rows = list(rows)
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(getattr(last, created_attr), getattr(last, id_attr)))
+
+
+async def keyset_page(session: AsyncSession, query, created_col, id_col,
+                      cursor: str | None = None, limit: int = 50) -> Page:
+    query = apply_keyset(query, created_col, id_col, cursor, limit)
+    rows = (await session.execute(query)).scalars().all()
+    return make_page(rows, limit)
@@ -0,0 +1,57 @@
+"""
+Missing fact — активные объекты без факта за день вместе с получателями, одним запросом.
+
+  SELECT DISTINCT objects.id, objects.name, users.telegram_id
+  FROM objects JOIN object_roles JOIN users
+  WHERE objects.status = 'active' AND object_roles.role IN (ИТР стройки, PM)
+    AND NOT EXISTS (SELECT 1 FROM daily_plan_fact
+                    WHERE object_id = objects.id AND date = :day AND fact_volume > 0)
+
+Anti-join идёт по индексу ix_daily_plan_fact_object_date, поэтому работа в БД
+не растёт с числом объектов в портфеле — только с числом получателей.
+Отправку в Telegram делает вызывающий (scheduler/tasks.py).
+"""
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import ConstructionObject, DailyPlanFact, ObjectRole, ObjectStatus, User, UserRole
+
+RECIPIENT_ROLES = (UserRole.CONSTRUCTION_ITR, UserRole.PROJECT_MANAGER)
+
+
+@dataclass
+class MissingFact:
+    object_id: int
+    object_name: str
+    telegram_ids: list[int]
+
+
+def missing_fact_query(day: date):
+    has_fact = exists().where(
+        DailyPlanFact.object_id == ConstructionObject.id,
+        DailyPlanFact.date == day,
+        DailyPlanFact.fact_volume > 0,
+    )
+    return (
+        select(ConstructionObject.id, ConstructionObject.name, User.telegram_id)
+        .join(ObjectRole, ObjectRole.object_id == ConstructionObject.id)
+        .join(User, User.id == ObjectRole.user_id)
+        .where(
+            ConstructionObject.status == ObjectStatus.ACTIVE,
+            ObjectRole.role.in_(RECIPIENT_ROLES),
+            ~has_fact,
+        )
+        .distinct()
+        .order_by(ConstructionObject.id)
+    )
+
+
+async def find_missing_facts(session: AsyncSession, day: date) -> list[MissingFact]:
+    """Объекты без факта за day, у которых есть кому напомнить."""
+    missing: dict[int, MissingFact] = {}
+    for object_id, name, telegram_id in (await session.execute(missing_fact_query(day))).all():
+        missing.setdefault(object_id, MissingFact(object_id, name, [])).telegram_ids.append(telegram_id)
+    return list(missing.values())
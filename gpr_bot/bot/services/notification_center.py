@@ -0,0 +1,144 @@
+"""
+Notification Center — категории уведомлений, фильтр на стороне SQL и счётчики.
+
+Категория вычисляется из notifications.type по NOTIF_CATEGORY_MAP; всё, что
+в карту не попало, — "system". category_clause() превращает категорию в
+условие по type, чтобы LIMIT/курсор применялись уже к отфильтрованной ленте.
+
+Непрочитанные считаются по notification_counters (user_id, type → unread),
+которую ведёт триггер на notifications. Сводка по категориям/приоритетам —
+свёртка нескольких десятков строк пользователя, а не всех его уведомлений.
+
+Пересборка счётчиков (если разъехались):
+    python -m bot.services.notification_center
+"""
+import asyncio
+import logging
+from sqlalchemy import String, cast, delete, false, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.db.models import Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = "system"
+
+NOTIF_CATEGORY_MAP = {
+    "task_assigned": "tasks", "task_overdue": "tasks", "task_completed": "tasks",
+    "task_blocked": "tasks", "plan_fact_request": "tasks", "plan_fact_overdue": "tasks",
+    "gpr_sign_request": "gpr", "gpr_signed": "gpr", "gpr_all_signed": "gpr",
+    "supply_delayed": "supply", "supply_shipped": "supply", "supply_received": "supply",
+    "material_shipped": "supply", "material_received": "supply", "cascade_shift": "supply",
+    "stage_completed": "construction", "stage_rejected": "construction",
+    "construction_stage_done": "construction", "defect_reported": "construction",
+    "defect_resolved": "construction", "kmd_issued": "construction",
+    "escalation_l1": "escalation", "escalation_l2": "escalation",
+    "escalation_l3": "escalation",
+    "weekly_audit": "system", "object_status_change": "system", "general": "system",
+}
+
+NOTIF_PRIORITY_MAP = {
+    "task_overdue": "high", "task_blocked": "high",
+    "gpr_sign_request": "high", "supply_delayed": "high",
+    "defect_reported": "critical",
+    "escalation_l1": "high", "escalation_l2": "critical", "escalation_l3": "critical",
+    "plan_fact_overdue": "high", "cascade_shift": "high",
+}
+
+CATEGORIES = sorted(set(NOTIF_CATEGORY_MAP.values()))
+
+
+def category_of(ntype: str) -> str:
+    return NOTIF_CATEGORY_MAP.get(ntype, DEFAULT_CATEGORY)
+
+
+def types_of(category: str) -> list[str]:
+    return sorted(t for t, c in NOTIF_CATEGORY_MAP.items() if c == category)
+
+
+def category_clause(category: str):
+    """WHERE-условие по notifications.type для категории."""
+    type_text = cast(Notification.type, String)
+    if category == DEFAULT_CATEGORY:
+        other = [t for t, c in NOTIF_CATEGORY_MAP.items() if c != DEFAULT_CATEGORY]
+        return type_text.not_in(other)
+    if category not in CATEGORIES:
+        return false()
+    return type_text.in_(types_of(category))
+
+
+# ─── UNREAD COUNTERS ─────────────────────────────────────
+
+async def get_unread_by_type(session: AsyncSession, user_id: int) -> dict[str, int]:
+    result = await session.execute(
+        select(NotificationCounter.type, NotificationCounter.unread)
+        .where(NotificationCounter.user_id == user_id, NotificationCounter.unread > 0)
+    )
+    return dict(result.all())
+
+
+async def get_unread_total(session: AsyncSession, user_id: int) -> int:
+    result = await session.execute(
+        select(func.coalesce(func.sum(NotificationCounter.unread), 0))
+        .where(NotificationCounter.user_id == user_id)
+    )
+    return int(result.scalar() or 0)
+
+
+def summarize_unread(by_type: dict[str, int], actionable_types=()) -> dict:
+    """Сводка для /api/notifications/summary из счётчиков по типам."""
+    actionable = set(actionable_types)
+    by_category: dict[str, int] = {}
+    summary = {"total_unread": 0, "critical_unread": 0, "by_category": by_category,
+               "pending_actions": 0, "escalations_active": 0}
+    for ntype, n in by_type.items():
+        cat = category_of(ntype)
+        by_category[cat] = by_category.get(cat, 0) + n
+        summary["total_unread"] += n
+        if NOTIF_PRIORITY_MAP.get(ntype) in ("critical", "high"):
+            summary["critical_unread"] += n
+        if ntype in actionable:
+            summary["pending_actions"] += n
+        if ntype.startswith("escalation_"):
+            summary["escalations_active"] += n
+    return summary
+
+
+async def mark_all_read(session: AsyncSession, user_id: int, category: str | None = None) -> int:
+    """Один UPDATE по непрочитанным пользователя (счётчики поправит триггер)."""
+    stmt = (
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if category:
+        stmt = stmt.where(category_clause(category))
+    result = await session.execute(stmt)
+    return result.rowcount or 0
+
+
+async def rebuild_unread_counters(session: AsyncSession) -> int:
+    """Полная пересборка notification_counters из notifications."""
+    await session.execute(delete(NotificationCounter))
+    await session.execute(
+        insert(NotificationCounter).from_select(
+            ["user_id", "type", "unread"],
+            select(Notification.user_id, cast(Notification.type, String), func.count())
+            .where(Notification.is_read == False)
+            .group_by(Notification.user_id, Notification.type),
+        )
+    )
+    return (await session.execute(select(func.count()).select_from(NotificationCounter))).scalar() or 0
+
+
+async def main():
+    from bot.db.session import async_session
+    logging.basicConfig(level=logging.INFO)
+    async with async_session() as session:
+        count = await rebuild_unread_counters(session)
+        await session.commit()
+    logger.info(f"notification_counters rebuilt: {count} rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
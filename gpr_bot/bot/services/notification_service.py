@@ -1,8 +1,10 @@
-from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from bot.db.models import Notification, NotificationType, User, ObjectChat
+from bot.services.notification_center import get_unread_total
+from bot.services.fanout import Outgoing
+from bot.services.outbound import enqueue, enqueue_many
 
 
 async def create_notification(
@@ -28,27 +30,22 @@ async def create_notification(
 
 
 async def send_push(
-    bot: Bot, session: AsyncSession, user_id: int,
+    session: AsyncSession, user_id: int,
     title: str, text: str = "",
     entity_type: str = "", entity_id: int | None = None,
+    object_id: int | None = None, notification_id: int | None = None,
 ):
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+    result = await session.execute(select(User.telegram_id).where(User.id == user_id))
+    telegram_id = result.scalar_one_or_none()
+    if not telegram_id:
         return
-    try:
-        message = f"🔔 <b>{title}</b>"
-        if text:
-            message += f"\n{text}"
-
-        # Build deep link keyboard
-        kb = _build_push_keyboard(entity_type, entity_id)
-        await bot.send_message(
-            user.telegram_id, message,
-            parse_mode="HTML", reply_markup=kb,
-        )
-    except Exception:
-        pass
+    message = f"🔔 <b>{title}</b>"
+    if text:
+        message += f"\n{text}"
+
+    # Build deep link keyboard
+    kb = _build_push_keyboard(entity_type, entity_id)
+    await enqueue(telegram_id, message, reply_markup=kb, object_id=object_id, notification_id=notification_id)
 
 
 def _build_push_keyboard(entity_type: str, entity_id: int | None) -> InlineKeyboardMarkup | None:
@@ -81,7 +78,6 @@ def _build_push_keyboard(entity_type: str, entity_id: int | None) -> InlineKeybo
 
 
 async def notify_and_push(
-    bot: Bot,
     session: AsyncSession,
     user_id: int,
     type: NotificationType,
@@ -91,16 +87,16 @@ async def notify_and_push(
     entity_id: int | None = None,
     object_id: int | None = None,
 ):
-    await create_notification(session, user_id, type, title, text, entity_type, entity_id)
-    await send_push(bot, session, user_id, title, text, entity_type, entity_id)
+    notif = await create_notification(session, user_id, type, title, text, entity_type, entity_id)
+    await send_push(session, user_id, title, text, entity_type, entity_id,
+                    object_id=object_id, notification_id=notif.id)
 
     # Also send to linked chats if object_id is provided
     if object_id:
-        await send_to_linked_chats(bot, session, object_id, title, text, entity_type, entity_id)
+        await send_to_linked_chats(session, object_id, title, text, entity_type, entity_id)
 
 
 async def send_to_linked_chats(
-    bot: Bot,
     session: AsyncSession,
     object_id: int,
     title: str,
@@ -110,14 +106,15 @@ async def send_to_linked_chats(
 ):
     """Send notification to all TG chats linked to this object."""
     result = await session.execute(
-        select(ObjectChat).where(
+        select(ObjectChat.chat_id).where(
             ObjectChat.object_id == object_id,
             ObjectChat.is_active == True,
+            ObjectChat.unreachable_at.is_(None),
         )
     )
-    chats = result.scalars().all()
+    chat_ids = result.scalars().all()
 
-    if not chats:
+    if not chat_ids:
         return
 
     message = f"🔔 <b>{title}</b>"
@@ -126,24 +123,11 @@ async def send_to_linked_chats(
 
     kb = _build_push_keyboard(entity_type, entity_id)
 
-    for chat in chats:
-        try:
-            await bot.send_message(
-                chat.chat_id, message,
-                parse_mode="HTML", reply_markup=kb,
-            )
-        except Exception:
-            pass
+    await enqueue_many([Outgoing(chat_id, message, reply_markup=kb, object_id=object_id) for chat_id in chat_ids])
 
 
 async def get_unread_count(session: AsyncSession, user_id: int) -> int:
-    result = await session.execute(
-        select(func.count(Notification.id)).where(
-            Notification.user_id == user_id,
-            Notification.is_read == False,
-        )
-    )
-    return result.scalar() or 0
+    return await get_unread_total(session, user_id)
 
 
 async def get_notifications(session: AsyncSession, user_id: int, limit: int = 20):
@@ -0,0 +1,63 @@
+"""
+Object Changes — единая точка «данные объекта изменились».
+
+Пишущий код вызывает mark_object_changed(session, object_id). При commit:
+  • before_commit — objects.data_version += 1 в той же транзакции
+    (по версии строится ETag объектных GET-роутов, api/cache.py);
+  • after_commit  — сброс закешированных ответов объекта в Redis (уборка:
+    ключ кеша включает data_version, старые ответы и так не читаются).
+При rollback отметки отбрасываются.
+"""
+import asyncio
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from bot.db.models import ConstructionObject
+from bot.services.response_cache import invalidate_objects
+
+_INFO_KEY = "changed_objects"
+_background: set[asyncio.Task] = set()
+
+
+def mark_object_changed(session, *object_ids):
+    """Отметить объекты изменёнными в текущей транзакции сессии."""
+    session.info.setdefault(_INFO_KEY, set()).update(oid for oid in object_ids if oid)
+
+
+async def get_object_version(session: AsyncSession, object_id: int) -> int | None:
+    """Текущая data_version объекта (None — объекта нет)."""
+    return (await session.execute(
+        select(ConstructionObject.data_version).where(ConstructionObject.id == object_id)
+    )).scalar_one_or_none()
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    ids = session.info.get(_INFO_KEY)
+    if not ids:
+        return
+    session.execute(
+        update(ConstructionObject)
+        .where(ConstructionObject.id.in_(sorted(ids)))
+        .values(data_version=ConstructionObject.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache(session):
+    ids = session.info.pop(_INFO_KEY, None)
+    if not ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(invalidate_objects(*ids))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_INFO_KEY, None)
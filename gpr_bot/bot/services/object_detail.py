@@ -0,0 +1,58 @@
+"""
+Object Detail — read model карточки объекта одним запросом.
+
+Объект + счётчики из object_stats (LEFT JOIN) + команда (json_agg в скалярном
+подзапросе) — один round trip вместо выборки объекта, команды и восьми COUNT.
+Если строки object_stats ещё нет — живой пересчёт (get_object_stats).
+
+Бенчмарк «до/после»: python -m benchmarks.object_detail
+"""
+from sqlalchemy import String, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.db.models import ConstructionObject, ObjectRole, ObjectStats, User
+from bot.services.object_stats import STAT_FIELDS, empty_stats, get_object_stats
+
+
+def _team_subquery():
+    member = func.json_build_object(
+        "user_id", User.id,
+        "full_name", User.full_name,
+        "role", cast(ObjectRole.role, String),
+    )
+    return (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(member, ObjectRole.id)),
+            literal_column("'[]'::json"),
+        ))
+        .select_from(ObjectRole)
+        .join(User, User.id == ObjectRole.user_id)
+        .where(ObjectRole.object_id == ConstructionObject.id)
+        .scalar_subquery()
+    )
+
+
+def detail_select(object_id: int):
+    return (
+        select(
+            ConstructionObject,
+            ObjectStats.object_id.label("stats_object_id"),
+            *(getattr(ObjectStats, f) for f in STAT_FIELDS),
+            _team_subquery().label("team"),
+        )
+        .outerjoin(ObjectStats, ObjectStats.object_id == ConstructionObject.id)
+        .where(ConstructionObject.id == object_id)
+    )
+
+
+async def load_object_detail(session: AsyncSession, object_id: int) -> dict | None:
+    """{"object": ConstructionObject, "team": [{user_id, full_name, role}], "stats": {...}} или None."""
+    row = (await session.execute(detail_select(object_id))).one_or_none()
+    if row is None:
+        return None
+    m = row._mapping
+    if m["stats_object_id"] is not None:
+        stats = {f: m[f] for f in STAT_FIELDS}
+    else:
+        stats = (await get_object_stats(session, [object_id])).get(object_id, empty_stats())
+    return {"object": m[ConstructionObject], "team": m["team"] or [], "stats": stats}
@@ -0,0 +1,160 @@
+"""
+Object Stats — денормализованные счётчики объекта (таблица object_stats).
+
+Пишущие пути (смена статусов задач / поставок / этапов) вызывают
+refresh_object_stats() в той же транзакции — строка объекта
+пересчитывается одним upsert'ом. Горячие экраны читают строку по PK.
+
+Пересчёт идёт под блокировкой строки objects (FOR NO KEY UPDATE, до конца
+транзакции): иначе под READ COMMITTED два писателя одного объекта считают
+каждый со снимка без чужой строки, и поздний upsert затирает ранний.
+
+Полная пересборка (ремонт):
+    python -m bot.services.object_stats
+"""
+import asyncio
+import logging
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.services.object_changes import mark_object_changed
+from bot.db.models import (
+    ConstructionObject, ObjectStats, Task, TaskStatus,
+    SupplyOrder, SupplyStatus, ConstructionStage, ConstructionStageStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = (
+    "task_total", "task_done", "task_overdue", "task_in_progress",
+    "supply_total", "supply_delayed", "stage_total", "stage_accepted",
+)
+
+
+def empty_stats() -> dict:
+    return {f: 0 for f in STAT_FIELDS}
+
+
+def _stats_select(object_ids: list[int] | None = None):
+    """SELECT object_id + все счётчики из сырых таблиц (GROUP BY object_id)."""
+    tasks = (
+        select(
+            Task.object_id,
+            func.count().label("total"),
+            func.count().filter(Task.status == TaskStatus.DONE).label("done"),
+            func.count().filter(Task.status == TaskStatus.OVERDUE).label("overdue"),
+            func.count().filter(Task.status == TaskStatus.IN_PROGRESS).label("in_progress"),
+        )
+        .group_by(Task.object_id)
+    )
+    supplies = (
+        select(
+            SupplyOrder.object_id,
+            func.count().label("total"),
+            func.count().filter(SupplyOrder.status == SupplyStatus.DELAYED).label("delayed"),
+        )
+        .group_by(SupplyOrder.object_id)
+    )
+    stages = (
+        select(
+            ConstructionStage.object_id,
+            func.count().label("total"),
+            func.count().filter(ConstructionStage.status == ConstructionStageStatus.ACCEPTED).label("accepted"),
+        )
+        .group_by(ConstructionStage.object_id)
+    )
+    if object_ids is not None:
+        tasks = tasks.where(Task.object_id.in_(object_ids))
+        supplies = supplies.where(SupplyOrder.object_id.in_(object_ids))
+        stages = stages.where(ConstructionStage.object_id.in_(object_ids))
+    t, s, st = tasks.subquery(), supplies.subquery(), stages.subquery()
+
+    q = (
+        select(
+            ConstructionObject.id.label("object_id"),
+            func.coalesce(t.c.total, 0).label("task_total"),
+            func.coalesce(t.c.done, 0).label("task_done"),
+            func.coalesce(t.c.overdue, 0).label("task_overdue"),
+            func.coalesce(t.c.in_progress, 0).label("task_in_progress"),
+            func.coalesce(s.c.total, 0).label("supply_total"),
+            func.coalesce(s.c.delayed, 0).label("supply_delayed"),
+            func.coalesce(st.c.total, 0).label("stage_total"),
+            func.coalesce(st.c.accepted, 0).label("stage_accepted"),
+        )
+        .outerjoin(t, t.c.object_id == ConstructionObject.id)
+        .outerjoin(s, s.c.object_id == ConstructionObject.id)
+        .outerjoin(st, st.c.object_id == ConstructionObject.id)
+    )
+    if object_ids is not None:
+        q = q.where(ConstructionObject.id.in_(object_ids))
+    return q
+
+
+async def _upsert(session: AsyncSession, object_ids: list[int] | None):
+    stmt = insert(ObjectStats).from_select(["object_id", *STAT_FIELDS], _stats_select(object_ids))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ObjectStats.object_id],
+        set_={**{f: stmt.excluded[f] for f in STAT_FIELDS}, "updated_at": func.now()},
+    )
+    await session.execute(stmt)
+
+
+async def refresh_object_stats(session: AsyncSession, *object_ids: int | None):
+    """Пересчитать строки object_stats для объектов. Вызывать до commit."""
+    ids = sorted({oid for oid in object_ids if oid})
+    if not ids:
+        return
+    await session.flush()
+    await _lock_objects(session, ids)
+    await _upsert(session, ids)
+    mark_object_changed(session, *ids)
+
+
+async def _lock_objects(session: AsyncSession, object_ids: list[int]):
+    """Сериализовать пересчёт по объекту; порядок по id — без взаимоблокировок.
+    NO KEY — не мешает вставке строк, ссылающихся на объект (FK берёт KEY SHARE)."""
+    await session.execute(
+        select(ConstructionObject.id)
+        .where(ConstructionObject.id.in_(object_ids))
+        .order_by(ConstructionObject.id)
+        .with_for_update(key_share=True)
+    )
+
+
+async def rebuild_object_stats(session: AsyncSession) -> int:
+    """Полная пересборка таблицы по всем объектам."""
+    await _upsert(session, None)
+    return (await session.execute(select(func.count()).select_from(ObjectStats))).scalar() or 0
+
+
+async def get_object_stats(session: AsyncSession, object_ids: list[int]) -> dict[int, dict]:
+    """
+    Счётчики по объектам: PK-lookup в object_stats.
+    Для объектов без строки — живой пересчёт (без записи).
+    """
+    if not object_ids:
+        return {}
+    result = await session.execute(
+        select(ObjectStats.object_id, *(getattr(ObjectStats, f) for f in STAT_FIELDS))
+        .where(ObjectStats.object_id.in_(object_ids))
+    )
+    stats = {row["object_id"]: {f: row[f] for f in STAT_FIELDS} for row in result.mappings().all()}
+    missing = [oid for oid in object_ids if oid not in stats]
+    if missing:
+        live = await session.execute(_stats_select(missing))
+        for row in live.mappings().all():
+            stats[row["object_id"]] = {f: row[f] for f in STAT_FIELDS}
+    return stats
+
+
+async def main():
+    from bot.db.session import async_session
+    logging.basicConfig(level=logging.INFO)
+    async with async_session() as session:
+        count = await rebuild_object_stats(session)
+        await session.commit()
+    logger.info(f"object_stats rebuilt: {count} objects")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
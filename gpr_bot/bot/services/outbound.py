@@ -0,0 +1,483 @@
+"""
+Outbound — единая очередь исходящих Telegram-сообщений (Redis Stream).
+
+Отправители (API, планировщик, хендлеры) не вызывают bot.send_message, а
+кладут сообщение в поток:
+
+    await enqueue(user.telegram_id, text, reply_markup=kb)
+    await enqueue_many([Outgoing(chat_id, text), ...])
+
+Доставляет OutboundDispatcher, запущенный в процессе бота (bot/main.py) на
+его единственном долгоживущем Bot:
+  • token bucket глобально (~30 msg/s) и на чат (личка 1 msg/s, группа 20 msg/min);
+  • TelegramRetryAfter — пауза чата на retry_after и повтор;
+  • сетевые/5xx ошибки — повтор с экспоненциальной задержкой;
+  • у каждого чата своя очередь и воркер: порядок внутри чата сохраняется,
+    чат на паузе не задерживает остальных, поток читается без остановки;
+  • XACK после обработки — at-least-once (зависшие забирает XAUTOCLAIM);
+  • итог каждой отправки — в message_deliveries, недоступные чаты (бот
+    заблокирован, чат не найден) помечаются и пропускаются
+    (bot/services/delivery_log.py).
+
+Метрики — get_metrics(): глубина очереди, sent/failed/retried/skipped/dropped, p50/p95 задержки
+от постановки в очередь до отправки. Если Redis недоступен, enqueue
+отправляет сообщение напрямую.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import statistics
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup
+from redis.exceptions import ResponseError
+
+from bot.db.redis import get_redis
+from bot.services.delivery_log import (
+    is_unreachable_error, load_unreachable, mark_unreachable, record_deliveries, unreachable_among,
+)
+from bot.services.fanout import Outgoing
+
+logger = logging.getLogger(__name__)
+
+STREAM = "tg:outbound"
+GROUP = "dispatcher"
+STATS_KEY = f"{STREAM}:stats"
+LATENCY_KEY = f"{STREAM}:latency"
+STREAM_MAXLEN = 100_000
+LATENCY_SAMPLES = 1000
+
+GLOBAL_RATE = 30.0            # msg/s на бота
+PRIVATE_RATE = 1.0            # msg/s в личный чат
+GROUP_RATE = 20 / 60          # msg/s в группу
+GROUP_BURST = 20
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+READ_COUNT = 100
+READ_BLOCK_MS = 5000
+CLAIM_IDLE_MS = 300_000
+DEFAULT_CONCURRENCY = 20
+MAX_IN_FLIGHT = 10_000        # записей потока, розданных воркерам чатов
+CHAT_IDLE_S = 30.0            # воркер чата завершается после простоя
+
+
+# ─── ENQUEUE ─────────────────────────────────────────────
+
+def _encode(msg: Outgoing) -> dict:
+    fields = {
+        "chat_id": str(msg.chat_id),
+        "text": msg.text,
+        "parse_mode": msg.parse_mode or "",
+        "enqueued_at": repr(time.time()),
+    }
+    if msg.reply_markup is not None:
+        fields["reply_markup"] = msg.reply_markup.model_dump_json(exclude_none=True)
+    if msg.object_id is not None:
+        fields["object_id"] = str(msg.object_id)
+    if msg.notification_id is not None:
+        fields["notification_id"] = str(msg.notification_id)
+    return fields
+
+
+def _decode(fields: dict | None) -> tuple[Outgoing, float]:
+    if not fields:
+        # XADD … MAXLEN срезал тело записи, а id остался в PEL
+        raise ValueError("entry payload trimmed from the stream")
+    markup = fields.get("reply_markup")
+    msg = Outgoing(
+        chat_id=int(fields["chat_id"]),
+        text=fields["text"],
+        reply_markup=InlineKeyboardMarkup.model_validate_json(markup) if markup else None,
+        parse_mode=fields.get("parse_mode") or None,
+        object_id=int(fields["object_id"]) if fields.get("object_id") else None,
+        notification_id=int(fields["notification_id"]) if fields.get("notification_id") else None,
+    )
+    return msg, float(fields.get("enqueued_at") or time.time())
+
+
+async def enqueue(chat_id: int, text: str, reply_markup=None, parse_mode: str = "HTML",
+                  object_id: int | None = None, notification_id: int | None = None):
+    await enqueue_many([Outgoing(chat_id, text, reply_markup=reply_markup, parse_mode=parse_mode,
+                                 object_id=object_id, notification_id=notification_id)])
+
+
+async def enqueue_many(messages: list[Outgoing]) -> int:
+    """Поставить сообщения в очередь одним pipeline; вернуть их число."""
+    if not messages:
+        return 0
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for msg in messages:
+            pipe.xadd(STREAM, _encode(msg), maxlen=STREAM_MAXLEN, approximate=True)
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Outbound enqueue failed, sending {len(messages)} directly: {e}")
+        await _send_direct(messages)
+    return len(messages)
+
+
+async def _send_direct(messages: list[Outgoing]):
+    from aiogram import Bot
+    from bot.config import get_settings
+    from bot.services.fanout import fan_out
+    bot = Bot(token=get_settings().bot_token)
+    try:
+        await fan_out(bot, messages)
+    finally:
+        await bot.session.close()
+
+
+# ─── RATE LIMITS ─────────────────────────────────────────
+
+class TokenBucket:
+    """rate токенов/с, не больше capacity; reserve() — сколько ждать до своего токена."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def pause(self, seconds: float, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and self.paused_until <= now
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def chat_bucket(chat_id: int) -> TokenBucket:
+    if chat_id < 0:  # группы и каналы
+        return TokenBucket(GROUP_RATE, GROUP_BURST)
+    return TokenBucket(PRIVATE_RATE, 1)
+
+
+def backoff(attempt: int) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# ─── DISPATCHER ──────────────────────────────────────────
+
+class OutboundDispatcher:
+    """Читает поток без остановки и раскладывает сообщения по очередям чатов.
+
+    У каждого чата — свой воркер (живёт, пока у чата есть сообщения, и ещё
+    CHAT_IDLE_S после): порядок внутри чата сохраняется, а чат на паузе
+    flood control или группа с очередью на 20 msg/min не задерживают
+    остальных. concurrency ограничивает только одновременные вызовы
+    send_message — ожидание token bucket, RetryAfter и backoff слот не
+    занимают. Всего в работе не больше MAX_IN_FLIGHT записей потока.
+    """
+
+    def __init__(self, bot, consumer: str | None = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 session_factory=None):
+        self.bot = bot
+        self.session_factory = session_factory  # None — без записи в message_deliveries
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self.chat_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._stopping = False
+        self._sending = asyncio.Semaphore(concurrency)
+        self._room = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self._queues: dict[int, asyncio.Queue] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._in_flight: set[str] = set()          # id записей потока, розданных воркерам
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._records: list[dict] = []
+        self._newly_unreachable: set[int] = set()
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        redis = get_redis()
+        try:
+            await redis.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        if self.session_factory:
+            async with self.session_factory() as session:
+                count = await load_unreachable(session)
+            logger.info(f"Outbound: {count} unreachable chats loaded")
+        logger.info(f"Outbound dispatcher {self.consumer} started")
+
+        # Своё недоставленное с прошлого запуска, затем — новое
+        backlog = True
+        try:
+            while not self._stopping:
+                try:
+                    if backlog:
+                        # "0" отдаёт и ещё не подтверждённое — пачку дорабатываем до конца
+                        entries = await self._read("0")
+                        backlog = bool(entries)
+                        await self.process(entries)
+                        continue
+                    entries = await self._claim() or await self._read(">")
+                    await self.submit(entries)
+                    await self.flush()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Outbound dispatcher loop error: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            for task in list(self._workers.values()):
+                task.cancel()
+
+    async def _read(self, start: str) -> list:
+        resp = await get_redis().xreadgroup(
+            GROUP, self.consumer, {STREAM: start},
+            count=READ_COUNT, block=None if start == "0" else READ_BLOCK_MS,
+        )
+        return resp[0][1] if resp else []
+
+    async def _claim(self) -> list:
+        """Забрать сообщения, зависшие у упавших потребителей."""
+        resp = await get_redis().xautoclaim(
+            STREAM, GROUP, self.consumer, min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=READ_COUNT,
+        )
+        return [e for e in resp[1] if e and e[1]]
+
+    async def process(self, entries: list):
+        """Обработать пачку целиком и записать итоги (backlog при старте, тесты)."""
+        await self.submit(entries)
+        await self._drained.wait()
+        await self.flush()
+
+    async def submit(self, entries: list):
+        """Раздать записи по очередям чатов, не дожидаясь отправки."""
+        entries = [(entry_id, fields) for entry_id, fields in entries if entry_id not in self._in_flight]
+        if not entries:
+            return
+        decoded, broken = [], []
+        for entry_id, fields in entries:
+            try:
+                decoded.append((entry_id, *_decode(fields)))
+            except Exception as e:
+                logger.error(f"Outbound: dropping unreadable entry {entry_id}: {e!r}")
+                broken.append(entry_id)
+        if broken:
+            await self._drop(broken)
+        if not decoded:
+            return
+        try:
+            unreachable = await unreachable_among({msg.chat_id for _, msg, _ in decoded})
+        except Exception as e:
+            logger.warning(f"Outbound: unreachable check failed: {e}")
+            unreachable = set()
+        for entry_id, msg, enqueued_at in decoded:
+            await self._room.acquire()
+            self._in_flight.add(entry_id)
+            self._drained.clear()
+            self._queue(msg.chat_id).put_nowait((entry_id, msg, enqueued_at, msg.chat_id in unreachable))
+
+    async def _drop(self, entry_ids: list[str]):
+        """Подтвердить записи, которые нельзя доставить: тело срезано MAXLEN или не читается.
+        Иначе чтение своего PEL ("0") возвращало бы их вечно."""
+        try:
+            await get_redis().xack(STREAM, GROUP, *entry_ids)
+        except Exception as e:
+            logger.warning(f"Outbound: ack of dropped entries failed: {e}")
+        for _ in entry_ids:
+            await _incr("dropped")
+
+    def _queue(self, chat_id: int) -> asyncio.Queue:
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue()
+            self._workers[chat_id] = asyncio.get_running_loop().create_task(self._chat_worker(chat_id, queue))
+        return queue
+
+    async def _chat_worker(self, chat_id: int, queue: asyncio.Queue):
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), CHAT_IDLE_S)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+                try:
+                    await self._handle(*item)
+                except Exception as e:
+                    # Запись не подтверждена — её заберёт XAUTOCLAIM
+                    logger.error(f"Outbound: chat {chat_id} message failed: {e}")
+                finally:
+                    self._done(item[0])
+        finally:
+            # Выход без await после проверки очереди — submit не положит сообщение «в пустоту»
+            if self._queues.get(chat_id) is queue:
+                del self._queues[chat_id]
+                del self._workers[chat_id]
+
+    def _done(self, entry_id: str):
+        self._in_flight.discard(entry_id)
+        self._room.release()
+        if not self._in_flight:
+            self._drained.set()
+
+    async def _handle(self, entry_id: str, msg: Outgoing, enqueued_at: float, unreachable: bool):
+        if unreachable or msg.chat_id in self._newly_unreachable:
+            status, reason, attempts = "skipped", "unreachable", 0
+            await _incr("skipped")
+        else:
+            status, reason, attempts = await self.deliver(msg, enqueued_at)
+            if status == "unreachable":
+                self._newly_unreachable.add(msg.chat_id)
+                status = "failed"
+        self._records.append({
+            "chat_id": msg.chat_id, "object_id": msg.object_id, "notification_id": msg.notification_id,
+            "status": status, "reason": reason, "attempts": attempts,
+            "enqueued_at": datetime.utcfromtimestamp(enqueued_at),
+        })
+        await get_redis().xack(STREAM, GROUP, entry_id)
+
+    async def flush(self):
+        """Записать накопленные итоги доставки и новые недоступные чаты."""
+        records, self._records = self._records, []
+        unreachable, self._newly_unreachable = self._newly_unreachable, set()
+        if records or unreachable:
+            await self._persist(records, unreachable)
+        self._prune_buckets()
+
+    async def _persist(self, records: list[dict], unreachable: set[int]):
+        """Отметки недоступных и журнал доставки — разные транзакции: сбой журнала
+        не должен терять отметки (иначе tg:unreachable в Redis и БД расходятся)."""
+        if not self.session_factory:
+            return
+        if unreachable:
+            try:
+                async with self.session_factory() as session:
+                    await mark_unreachable(session, unreachable)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Outbound: failed to mark unreachable {sorted(unreachable)}: {e}")
+        if not records:
+            return
+        try:
+            async with self.session_factory() as session:
+                await record_deliveries(session, records)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Outbound: failed to persist {len(records)} delivery records: {e}")
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = chat_bucket(chat_id)
+        self.chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _prune_buckets(self):
+        now = time.monotonic()
+        for chat_id in [c for c, b in self.chat_buckets.items() if b.idle(now)]:
+            del self.chat_buckets[chat_id]
+
+    async def deliver(self, msg: Outgoing, enqueued_at: float) -> tuple[str, str | None, int]:
+        """(status, reason, attempts); status — sent / failed / unreachable."""
+        bucket = self._bucket(msg.chat_id)
+        reason = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                async with self._sending:
+                    await self.bot.send_message(
+                        msg.chat_id, msg.text, parse_mode=msg.parse_mode, reply_markup=msg.reply_markup,
+                    )
+                await _record_sent(time.time() - enqueued_at)
+                return "sent", None, attempt
+            except TelegramRetryAfter as e:
+                logger.warning(f"Flood control for {msg.chat_id}: retry after {e.retry_after}s")
+                bucket.pause(e.retry_after)
+                reason = f"retry after {e.retry_after}s"
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning(f"Send to {msg.chat_id} failed (attempt {attempt}): {e}")
+                await asyncio.sleep(backoff(attempt))
+                reason = str(e)
+            except TelegramAPIError as e:
+                logger.warning(f"Send to {msg.chat_id} rejected: {e}")
+                await _incr("failed")
+                return ("unreachable" if is_unreachable_error(e) else "failed"), str(e)[:255], attempt
+            await _incr("retried")
+        logger.error(f"Send to {msg.chat_id} gave up after {MAX_ATTEMPTS} attempts")
+        await _incr("failed")
+        return "failed", (reason or "gave up")[:255], MAX_ATTEMPTS
+
+
+# ─── METRICS ─────────────────────────────────────────────
+
+async def _incr(field: str):
+    try:
+        await get_redis().hincrby(STATS_KEY, field, 1)
+    except Exception:
+        pass
+
+
+async def _record_sent(latency_s: float):
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, "sent", 1)
+        pipe.lpush(LATENCY_KEY, round(latency_s * 1000))
+        pipe.ltrim(LATENCY_KEY, 0, LATENCY_SAMPLES - 1)
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+async def get_metrics() -> dict:
+    """{"depth", "pending", "sent", "failed", "retried", "skipped", "dropped", "latency_ms": {"p50", "p95"}}"""
+    redis = get_redis()
+    depth = pending = 0
+    try:
+        for group in await redis.xinfo_groups(STREAM):
+            if group["name"] == GROUP:
+                pending = group["pending"]
+                depth = (group.get("lag") or 0) + pending
+    except ResponseError:
+        pass  # потока ещё нет
+    stats = {k: int(v) for k, v in (await redis.hgetall(STATS_KEY)).items()}
+    samples = [int(x) for x in await redis.lrange(LATENCY_KEY, 0, -1)]
+    latency = {"p50": 0, "p95": 0}
+    if len(samples) >= 2:
+        q = statistics.quantiles(samples, n=100)
+        latency = {"p50": round(q[49]), "p95": round(q[94])}
+    elif samples:
+        latency = {"p50": samples[0], "p95": samples[0]}
+    return {
+        "depth": depth, "pending": pending,
+        "sent": stats.get("sent", 0), "failed": stats.get("failed", 0), "retried": stats.get("retried", 0),
+        "skipped": stats.get("skipped", 0), "dropped": stats.get("dropped", 0),
+        "latency_ms": latency,
+    }
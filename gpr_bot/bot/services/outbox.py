@@ -0,0 +1,176 @@
+"""
+Outbox — транзакционная очередь побочных эффектов событий (таблица event_outbox).
+
+Эндпоинт не рассылает уведомления сам, а пишет событие в той же транзакции,
+что и изменение состояния:
+
+    task.status = new_status
+    await publish(db, "task_status_changed", key, task_id=task.id, ...)
+    await db.commit()           # событие и изменение фиксируются вместе
+
+Пул воркеров (python -m bot.outbox_worker, сервис outbox в docker-compose)
+забирает события пачками через FOR UPDATE SKIP LOCKED, вызывает обработчик,
+зарегистрированный @outbox_handler (см. event_engine), и помечает событие
+done в той же транзакции, что и записи обработчика. Ошибка — повтор с
+задержкой, после MAX_ATTEMPTS — status = failed.
+
+Гарантии: at-least-once (push, ушедший в Redis до сбоя commit, может
+повториться); повторная публикация с тем же idempotency_key игнорируется.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import EventOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+RETRY_BASE = 5          # с; 5, 10, 20 … до RETRY_MAX
+RETRY_MAX = 600
+IDLE_SLEEP = 0.5
+RETENTION = timedelta(days=7)
+PURGE_INTERVAL = 3600
+
+Handler = Callable[[AsyncSession, dict], Awaitable]
+HANDLERS: dict[str, Handler] = {}
+
+
+def outbox_handler(event: str):
+    """Зарегистрировать обработчик события: async def fn(session, payload)."""
+    def register(fn: Handler) -> Handler:
+        HANDLERS[event] = fn
+        return fn
+    return register
+
+
+async def publish(session: AsyncSession, event: str, key: str, **payload) -> None:
+    """Добавить событие в текущую транзакцию; дубликат по key — no-op."""
+    await session.execute(
+        pg_insert(EventOutbox)
+        .values(event=event, idempotency_key=key, payload=payload)
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+    )
+
+
+def event_key(scope: str, idempotency_key: str | None = None) -> str:
+    """Ключ события: из Idempotency-Key клиента / id callback, иначе случайный."""
+    return f"{scope}:{idempotency_key or uuid.uuid4().hex}"
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1)))
+
+
+# ─── WORKER ──────────────────────────────────────────────
+
+async def claim(session: AsyncSession, limit: int = BATCH_SIZE) -> list[EventOutbox]:
+    result = await session.execute(
+        select(EventOutbox)
+        .where(EventOutbox.status == "pending", EventOutbox.available_at <= func.now())
+        .order_by(EventOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def process_batch(session: AsyncSession, limit: int = BATCH_SIZE) -> int:
+    """Обработать до limit событий одной транзакцией; вернуть число взятых."""
+    rows = await claim(session, limit)
+    for row in rows:
+        try:
+            handler = HANDLERS.get(row.event)
+            if handler is None:
+                raise LookupError(f"no handler for {row.event}")
+            # Savepoint: ошибка одного события не откатывает остальные
+            async with session.begin_nested():
+                await handler(session, row.payload)
+            row.status = "done"
+            row.processed_at = datetime.utcnow()
+        except Exception as e:
+            row.attempts += 1
+            row.last_error = str(e)[:1000]
+            if row.attempts >= MAX_ATTEMPTS:
+                row.status = "failed"
+                logger.error(f"Outbox event {row.id} ({row.event}) failed permanently: {e}")
+            else:
+                row.available_at = datetime.utcnow() + retry_delay(row.attempts)
+                logger.warning(f"Outbox event {row.id} ({row.event}) attempt {row.attempts} failed: {e}")
+    if rows:
+        await session.commit()
+    return len(rows)
+
+
+async def purge_processed(session: AsyncSession, older_than: timedelta = RETENTION) -> int:
+    result = await session.execute(
+        delete(EventOutbox).where(
+            EventOutbox.status == "done",
+            EventOutbox.processed_at < datetime.utcnow() - older_than,
+        )
+    )
+    await session.commit()
+    return result.rowcount or 0
+
+
+async def get_outbox_stats(session: AsyncSession) -> dict:
+    """{"pending", "done", "failed", "oldest_pending_s"}"""
+    counts = dict((await session.execute(
+        select(EventOutbox.status, func.count()).group_by(EventOutbox.status)
+    )).all())
+    oldest = (await session.execute(
+        select(func.min(EventOutbox.created_at)).where(EventOutbox.status == "pending")
+    )).scalar()
+    return {
+        "pending": counts.get("pending", 0), "done": counts.get("done", 0), "failed": counts.get("failed", 0),
+        "oldest_pending_s": round((datetime.utcnow() - oldest).total_seconds()) if oldest else 0,
+    }
+
+
+class OutboxWorkerPool:
+    def __init__(self, session_factory, size: int = 4, batch: int = BATCH_SIZE):
+        self.session_factory = session_factory
+        self.size = size
+        self.batch = batch
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        logger.info(f"Outbox worker pool started: {self.size} workers")
+        await asyncio.gather(self._purge_loop(), *(self._worker(n) for n in range(self.size)))
+
+    async def _worker(self, n: int):
+        while not self._stopping:
+            taken = 0
+            try:
+                async with self.session_factory() as session:
+                    taken = await process_batch(session, self.batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {n} error: {e}")
+            if not taken:
+                await asyncio.sleep(IDLE_SLEEP)
+
+    async def _purge_loop(self):
+        while not self._stopping:
+            try:
+                async with self.session_factory() as session:
+                    purged = await purge_processed(session)
+                if purged:
+                    logger.info(f"Outbox: purged {purged} processed events")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox purge error: {e}")
+            await asyncio.sleep(PURGE_INTERVAL)
+
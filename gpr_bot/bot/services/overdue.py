@@ -0,0 +1,124 @@
+"""
+Overdue — перевод просроченных задач в OVERDUE пачкой, без цикла по задачам.
+
+Число запросов не зависит от числа задач:
+  1. UPDATE tasks … RETURNING — статусы и данные для уведомлений;
+  2. исполнители одним SELECT;
+  3. карта объект → PM (object_roles + objects.responsible_pm_id) одним SELECT,
+     для объектов без PM — все активные PM (ещё один SELECT);
+  4. уведомления исполнителям одним INSERT;
+  5. refresh_object_stats по затронутым объектам.
+Отправку в Telegram делает вызывающий (scheduler/tasks.py) после commit.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from sqlalchemy import insert, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.db.models import (
+    ConstructionObject, Notification, NotificationType, ObjectRole,
+    Task, TaskStatus, User, UserRole,
+)
+from bot.services.object_stats import refresh_object_stats
+
+
+@dataclass
+class Recipient:
+    id: int
+    telegram_id: int
+    full_name: str
+
+
+@dataclass
+class OverdueTask:
+    id: int
+    title: str
+    deadline: date
+    object_id: int
+    assignee: Recipient | None
+    pms: list[Recipient] = field(default_factory=list)
+
+
+async def _recipients(session: AsyncSession, user_ids: set[int]) -> dict[int, Recipient]:
+    if not user_ids:
+        return {}
+    result = await session.execute(
+        select(User.id, User.telegram_id, User.full_name).where(User.id.in_(user_ids))
+    )
+    return {r.id: Recipient(*r) for r in result.all()}
+
+
+async def _object_pms(session: AsyncSession, object_ids: set[int]) -> dict[int, list[Recipient]]:
+    by_role = (
+        select(ObjectRole.object_id, User.id, User.telegram_id, User.full_name)
+        .join(User, User.id == ObjectRole.user_id)
+        .where(
+            ObjectRole.object_id.in_(object_ids),
+            ObjectRole.role == UserRole.PROJECT_MANAGER,
+            User.is_active == True,
+        )
+    )
+    responsible = (
+        select(ConstructionObject.id, User.id, User.telegram_id, User.full_name)
+        .join(User, User.id == ConstructionObject.responsible_pm_id)
+        .where(ConstructionObject.id.in_(object_ids), User.is_active == True)
+    )
+    pms: dict[int, list[Recipient]] = {}
+    for object_id, user_id, telegram_id, full_name in (await session.execute(union(by_role, responsible))).all():
+        pms.setdefault(object_id, []).append(Recipient(user_id, telegram_id, full_name))
+    return pms
+
+
+async def _all_pms(session: AsyncSession) -> list[Recipient]:
+    result = await session.execute(
+        select(User.id, User.telegram_id, User.full_name)
+        .where(User.role == UserRole.PROJECT_MANAGER, User.is_active == True)
+    )
+    return [Recipient(*r) for r in result.all()]
+
+
+async def mark_overdue_tasks(session: AsyncSession, today: date, scope=None) -> list[OverdueTask]:
+    """Перевести задачи с дедлайном < today в OVERDUE; вернуть их с получателями.
+
+    scope — дополнительное условие на задачи (инкрементальный скан, bot/services/watermarks.py).
+    """
+    rows = (await session.execute(
+        update(Task)
+        .where(
+            Task.deadline < today, Task.status.notin_([TaskStatus.DONE, TaskStatus.OVERDUE]),
+            *([] if scope is None else [scope]),
+        )
+        .values(status=TaskStatus.OVERDUE)
+        .returning(Task.id, Task.title, Task.deadline, Task.object_id, Task.assignee_id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if not rows:
+        return []
+
+    object_ids = {r.object_id for r in rows}
+    assignees = await _recipients(session, {r.assignee_id for r in rows if r.assignee_id})
+    pms = await _object_pms(session, object_ids)
+    fallback = await _all_pms(session) if object_ids - pms.keys() else []
+
+    notifications = [
+        {
+            "user_id": r.assignee_id,
+            "type": NotificationType.TASK_OVERDUE,
+            "title": f"🔴 Просрочена: {r.title}",
+            "text": f"Дедлайн: {r.deadline.strftime('%d.%m.%Y')}",
+            "entity_type": "task",
+            "entity_id": r.id,
+        }
+        for r in rows if r.assignee_id
+    ]
+    if notifications:
+        await session.execute(insert(Notification), notifications)
+    await refresh_object_stats(session, *object_ids)
+
+    return [
+        OverdueTask(
+            id=r.id, title=r.title, deadline=r.deadline, object_id=r.object_id,
+            assignee=assignees.get(r.assignee_id),
+            pms=pms.get(r.object_id, fallback),
+        )
+        for r in rows
+    ]
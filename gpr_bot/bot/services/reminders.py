@@ -0,0 +1,96 @@
+"""
+Reminders — напоминания о дедлайнах одним INSERT … SELECT без повторов.
+
+Каждое напоминание несёт notifications.dedupe_key
+(reminder:24h:task:123:2026-10-17) с уникальным частичным индексом:
+
+  INSERT INTO notifications (…, dedupe_key)
+  SELECT … FROM tasks JOIN users
+  WHERE <задача к напоминанию> AND NOT EXISTS (уже есть такой dedupe_key)
+  ON CONFLICT (dedupe_key) WHERE dedupe_key IS NOT NULL DO NOTHING
+  RETURNING …
+
+Anti-join отсекает уже отправленные по индексу, ON CONFLICT — гонку двух
+одновременных запусков. Push ставится только по строкам из RETURNING, то
+есть ровно по вставленным.
+"""
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import String, cast, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from bot.db.models import Notification, Task, TaskStatus, User
+
+REMINDER_24H = "24h"
+REMINDER_TODAY = "today"
+
+_TEMPLATES = {
+    # kind → (title prefix, text parts до/после названия задачи)
+    REMINDER_24H: ("⏰ 24ч до дедлайна: ", "⏰ <b>Напоминание: 24ч до дедлайна</b>\n\n📋 ", True),
+    REMINDER_TODAY: ("🔴 Сегодня дедлайн: ", "🔴 <b>Дедлайн сегодня!</b>\n\n📋 ", False),
+}
+
+
+@dataclass
+class Reminder:
+    notification_id: int
+    telegram_id: int
+    object_id: int
+    text: str
+
+
+def reminder_key(kind: str, task_id: int, day: date) -> str:
+    return f"reminder:{kind}:task:{task_id}:{day.isoformat()}"
+
+
+def _key_expr(kind: str, day: date):
+    return func.concat(f"reminder:{kind}:task:", Task.id, f":{day.isoformat()}")
+
+
+def reminders_insert(kind: str, deadline: date, day: date):
+    """INSERT … SELECT … ON CONFLICT DO NOTHING RETURNING — как CTE."""
+    title_prefix, text_prefix, with_deadline = _TEMPLATES[kind]
+    key = _key_expr(kind, day)
+    text = func.concat(text_prefix, Task.title)
+    if with_deadline:
+        text = func.concat(text, "\n📅 Дедлайн: ", func.to_char(Task.deadline, "DD.MM.YYYY"))
+    sent = aliased(Notification)
+
+    due = (
+        select(
+            Task.assignee_id,
+            cast(literal("task_overdue"), Notification.type.type),
+            func.concat(title_prefix, Task.title),
+            text,
+            literal("task", String),
+            Task.id,
+            key,
+        )
+        .join(User, User.id == Task.assignee_id)
+        .where(
+            Task.deadline == deadline,
+            Task.status.notin_([TaskStatus.DONE, TaskStatus.OVERDUE]),
+            ~exists().where(sent.dedupe_key == key),
+        )
+    )
+    return (
+        pg_insert(Notification)
+        .from_select(["user_id", "type", "title", "text", "entity_type", "entity_id", "dedupe_key"], due)
+        .on_conflict_do_nothing(index_elements=["dedupe_key"], index_where=Notification.dedupe_key.isnot(None))
+        .returning(Notification.id, Notification.user_id, Notification.entity_id, Notification.text)
+        .cte("inserted")
+    )
+
+
+async def issue_deadline_reminders(session: AsyncSession, kind: str, deadline: date, day: date) -> list[Reminder]:
+    """Вставить недостающие напоминания; вернуть вставленные с адресатами для push."""
+    inserted = reminders_insert(kind, deadline, day)
+    result = await session.execute(
+        select(inserted.c.id, User.telegram_id, Task.object_id, inserted.c.text)
+        .join(User, User.id == inserted.c.user_id)
+        .join(Task, Task.id == inserted.c.entity_id)
+    )
+    return [Reminder(*row) for row in result.all()]
@@ -0,0 +1,88 @@
+"""
+Response Cache — кеш сериализованных ответов API в Redis с тегами по объекту.
+
+Ключ:  rc:{route}:{role}:{hash(params + data_version)}
+Тег:   rc:tag:object:{object_id} — SET ключей ответов объекта
+Stats: rc:stats — HASH "{route}:hit|miss|bypass" → счётчик
+
+Теги объекта сбрасываются после commit сессии, в которой вызван
+mark_object_changed() (bot/services/object_changes.py); это уборка —
+корректность даёт data_version в ключе (api/cache.py).
+Недоступный Redis не ломает запросы — кеш просто пропускается.
+"""
+import hashlib
+import json
+import logging
+from bot.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "rc"
+STATS_KEY = f"{PREFIX}:stats"
+TAG_TTL = 24 * 3600  # дольше любого TTL ответа
+
+
+def _tag_key(object_id) -> str:
+    return f"{PREFIX}:tag:object:{object_id}"
+
+
+def build_key(route: str, params: dict, role: str) -> str:
+    raw = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:16]
+    return f"{PREFIX}:{route}:{role}:{digest}"
+
+
+async def cache_get(key: str) -> str | None:
+    try:
+        return await get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"Response cache read failed: {e}")
+        return None
+
+
+async def cache_set(key: str, payload: str, ttl: int, object_id=None):
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.set(key, payload, ex=ttl)
+        if object_id is not None:
+            tag = _tag_key(object_id)
+            pipe.sadd(tag, key)
+            pipe.expire(tag, TAG_TTL)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Response cache write failed: {e}")
+
+
+async def record(route: str, outcome: str):
+    try:
+        await get_redis().hincrby(STATS_KEY, f"{route}:{outcome}", 1)
+    except Exception:
+        pass
+
+
+async def get_stats() -> dict:
+    """{route: {"hit": n, "miss": n, "bypass": n, "hit_rate": pct}}"""
+    raw = await get_redis().hgetall(STATS_KEY)
+    stats: dict = {}
+    for field, value in raw.items():
+        route, _, outcome = field.rpartition(":")
+        stats.setdefault(route, {"hit": 0, "miss": 0, "bypass": 0})[outcome] = int(value)
+    for s in stats.values():
+        lookups = s["hit"] + s["miss"]
+        s["hit_rate"] = round(s["hit"] / lookups * 100, 1) if lookups else 0
+    return stats
+
+
+async def invalidate_objects(*object_ids):
+    """Сбросить все закешированные ответы объектов."""
+    ids = {oid for oid in object_ids if oid}
+    if not ids:
+        return
+    try:
+        r = get_redis()
+        for oid in ids:
+            tag = _tag_key(oid)
+            keys = await r.smembers(tag)
+            await r.delete(tag, *keys)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for {sorted(ids)}: {e}")
@@ -3,6 +3,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.models import SupplyOrder, SupplyStatus
+from bot.services.object_stats import refresh_object_stats
+from bot.services.object_changes import mark_object_changed
 
 
 async def create_supply_order(
@@ -27,6 +29,7 @@ async def create_supply_order(
     )
     session.add(order)
     await session.flush()
+    await refresh_object_stats(session, object_id)
     return order
 
 
@@ -60,6 +63,7 @@ async def approve_supply(session: AsyncSession, order_id: int, approved_by_id: i
     order.status = SupplyStatus.APPROVED
     order.approved_by_id = approved_by_id
     await session.flush()
+    mark_object_changed(session, order.object_id)
     return order
 
 
@@ -74,6 +78,7 @@ async def update_supply_status(
     if actual_date:
         order.actual_date = actual_date
     await session.flush()
+    await refresh_object_stats(session, order.object_id)
     return order
 
 
@@ -3,6 +3,9 @@ from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from bot.db.models import Task, TaskStatus, TaskComment, Department, User, UserRole
+from bot.services.escalation_state import acknowledge_subject
+from bot.services.object_stats import refresh_object_stats
+from bot.services.object_changes import mark_object_changed
 
 
 VALID_TRANSITIONS = {
@@ -37,6 +40,7 @@ async def create_task(
     )
     session.add(task)
     await session.flush()
+    await refresh_object_stats(session, object_id)
     return task
 
 
@@ -97,8 +101,11 @@ async def transition_task(
         task.completed_at = datetime.utcnow()
     if new_status == TaskStatus.BLOCKED:
         task.blocked_reason = reason
+    if new_status != TaskStatus.ASSIGNED:
+        await acknowledge_subject(session, "task", task.id)
 
     await session.flush()
+    await refresh_object_stats(session, task.object_id)
     return task
 
 
@@ -110,6 +117,7 @@ async def reassign_task(session: AsyncSession, task_id: int, new_assignee_id: in
     if task.status == TaskStatus.NEW:
         task.status = TaskStatus.ASSIGNED
     await session.flush()
+    mark_object_changed(session, task.object_id)
     return task
 
 
@@ -121,6 +129,7 @@ async def reschedule_task(session: AsyncSession, task_id: int, new_deadline: dat
     if task.status == TaskStatus.OVERDUE:
         task.status = TaskStatus.IN_PROGRESS
     await session.flush()
+    await refresh_object_stats(session, task.object_id)
     return task
 
 
@@ -128,6 +137,9 @@ async def add_comment(session: AsyncSession, task_id: int, user_id: int, text: s
     comment = TaskComment(task_id=task_id, user_id=user_id, text=text)
     session.add(comment)
     await session.flush()
+    task = await session.get(Task, task_id)
+    if task:
+        mark_object_changed(session, task.object_id)
     return comment
 
 
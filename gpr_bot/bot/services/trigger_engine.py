@@ -15,14 +15,19 @@ Integration:
   # On any status change:
   await engine.fire("TASK_COMPLETED", task_id=123, user_id=5)
 
-  # Cron (every minute):
+  # Cron (sleeps until the next due timer):
   scheduler = CronScheduler(db_session, engine)
-  await scheduler.tick()
+  await scheduler.run_forever()
 """
 
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta, date, time
 from enum import Enum
+from operator import attrgetter
 from typing import Any
+import asyncio
+import heapq
+import itertools
 import logging
 
 logger = logging.getLogger("trigger_engine")
@@ -646,50 +651,21 @@ class EscalationMatrix:
     async def check_pending(self):
         """
         Called by CronScheduler every minute.
-        Finds actionable notifications without response and escalates.
-        """
-        # Query: all actionable notifications that are:
-        # - is_actionable = True
-        # - is_read = False (or read but no action taken)
-        # - no response action logged
-        # - created_at + escalation_time < now
-
-        # Пробел → actual DB query
-        # pending = await self.db.execute(
-        #     select(Notification)
-        #     .where(
-        #         Notification.is_actionable == True,
-        #         Notification.is_read == False,
-        #     )
-        # )
-
-        pending_notifications = []  # Placeholder
-
-        now = datetime.utcnow()
-
-        for notif in pending_notifications:
-            ntype = notif.get("type", "")
-            timing = self.TIMING.get(ntype)
-            if not timing:
-                continue
-
-            created = notif.get("created_at", now)
-            elapsed_min = (now - created).total_seconds() / 60
-            current_level = notif.get("escalation_level") or 0
+        Escalates actionable notifications whose next level is due.
 
-            # Check Level 1
-            if current_level < 1 and elapsed_min >= timing.get("l1", 60):
-                await self._escalate(notif, level=1)
-
-            # Check Level 2
-            elif current_level < 2 and elapsed_min >= timing.get("l2", 240):
-                await self._escalate(notif, level=2)
+        Pending state lives in escalation_state (bot/services/escalation_state.py):
+        only due rows are read, FOR UPDATE SKIP LOCKED, so the cost is O(due)
+        and several workers never escalate the same notification twice.
+        Acknowledging the notification action deletes its row.
+        """
+        from bot.services.escalation_state import process_due
+        from bot.services.outbound import enqueue_many
 
-            # Check Level 3
-            elif current_level < 3:
-                l3_min = timing.get("l3")
-                if l3_min and elapsed_min >= l3_min:
-                    await self._escalate(notif, level=3)
+        _, messages = await process_due(self.db, datetime.utcnow())
+        await self.db.commit()
+        if messages:
+            await enqueue_many(messages)
+        return len(messages)
 
     async def _escalate(self, original_notif: dict, level: int):
         """Fire escalation event."""
@@ -728,12 +704,11 @@ class EscalationMatrix:
         Special L3 rule: if plan-fact not submitted by 20:00,
         send red zone digest to director.
         """
-        now = datetime.utcnow()  # Пробел → timezone-aware
-        if now.hour == 20 and now.minute < 5:  # Run once at ~20:00
-            # Query all plan_fact_request notifications from today
-            # that are still unread/unactioned
-            # For each → fire ESCALATION_L3 to director
-            pass
+        # Fired once at 20:00 by CronScheduler (late firings are caught up)
+        # Query all plan_fact_request notifications from today
+        # that are still unread/unactioned
+        # For each → fire ESCALATION_L3 to director
+        pass
 
 
 # ══════════════════════════════════════════════════════════
@@ -785,67 +760,165 @@ class CascadeCalculator:
 # ══  CRON SCHEDULER  ═════════════════════════════════════
 # ══════════════════════════════════════════════════════════
 
+@dataclass(frozen=True)
+class CronRule:
+    """
+    One time-based trigger: daily at `at` (optionally only on `weekday`,
+    0 = Monday) or every `every` aligned to midnight (every 5 min → :00, :05, …).
+    `handler` is an attribute path on CronScheduler ("escalation.check_pending").
+    """
+    name: str
+    handler: str
+    at: time | None = None
+    weekday: int | None = None
+    every: timedelta | None = None
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First firing strictly after `moment`."""
+        midnight = datetime.combine(moment.date(), time())
+        if self.every:
+            return midnight + self.every * ((moment - midnight) // self.every + 1)
+        fire = datetime.combine(moment.date(), self.at)
+        if fire <= moment:
+            fire += timedelta(days=1)
+        if self.weekday is not None:
+            fire += timedelta(days=(self.weekday - fire.weekday()) % 7)
+        return fire
+
+
+@dataclass(order=True)
+class _Timer:
+    due: datetime
+    seq: int
+    rule: CronRule = field(compare=False)
+    key: Any = field(compare=False)        # object_id for per-object rules, else None
+    version: int = field(compare=False)
+
+
 class CronScheduler:
     """
-    Time-based triggers. Run via:
+    Time-based triggers on a min-heap of next-fire timestamps. Run via:
       scheduler = CronScheduler(db, engine)
 
       # In FastAPI startup:
       @app.on_event("startup")
       async def start_scheduler():
-          asyncio.create_task(scheduler.run_forever())
+          asyncio.create_task(scheduler.run_forever(since=last_run))
+
+    The loop sleeps until the earliest due timer; each firing is one heappop +
+    heappush, O(log n) in the number of timers — rules are never re-evaluated
+    on idle ticks. A late wake-up (slow handler, suspended host) or a restart
+    with `since` fires every overdue timer once and reschedules it after now:
+    missed firings are caught up, not replayed one by one.
+
+    Per-object rules: schedule(rule_name, key=object_id, at=time(17, 30))
+    adds a separate timer whose handler gets the object_id.
+    `last_run` is the moment of the last processed batch — persist it and pass
+    as `since` to catch up after downtime.
     """
 
+    RULES = (
+        CronRule("approaching_deadlines", "_check_approaching_deadlines", at=time(9, 0)),
+        CronRule("plan_fact_requests", "_send_plan_fact_requests", at=time(18, 0)),
+        CronRule("plan_fact_overdue", "_check_plan_fact_overdue", at=time(19, 0)),
+        CronRule("evening_deadline", "escalation.check_evening_deadline", at=time(20, 0)),
+        CronRule("weekly_audits", "_send_weekly_audits", at=time(10, 0), weekday=0),
+        CronRule("overdue_tasks", "_check_overdue_tasks", every=timedelta(minutes=5)),
+        CronRule("escalation_pending", "escalation.check_pending", every=timedelta(minutes=1)),
+        CronRule("gpr_deviations", "_check_gpr_deviations", every=timedelta(minutes=30)),
+    )
+
+    # Wake up at least this often even with nothing due (wall clock adjustments)
+    MAX_SLEEP = timedelta(minutes=10)
+
     def __init__(self, db, engine: TriggerEngine):
         self.db = db
         self.engine = engine
         self.escalation = EscalationMatrix(db, engine)
-
-    async def run_forever(self, interval_seconds: int = 60):
-        """Main loop — runs every minute."""
-        import asyncio
+        self.rules = {rule.name: rule for rule in self.RULES}
+        self.last_run: datetime | None = None
+        self._started = False
+        self._heap: list[_Timer] = []
+        self._versions: dict[tuple[str, Any], int] = {}
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+
+    # ── Timers ──
+
+    def start(self, since: datetime | None = None):
+        """Put every rule on the heap; firings after `since` (if given) are due now."""
+        origin = since or datetime.utcnow()
+        self._started = True
+        for rule in self.RULES:
+            self.cancel(rule.name)
+            self._push(rule, None, rule.next_after(origin))
+
+    def schedule(self, rule_name: str, key: Any = None, **overrides):
+        """(Re)schedule a rule, optionally per key with its own at/weekday/every.
+
+        Replaces any live timer for (rule_name, key) — a second call moves it, never duplicates.
+        """
+        rule = replace(self.rules[rule_name], **overrides)
+        self.cancel(rule_name, key)
+        self._push(rule, key, rule.next_after(datetime.utcnow()))
+
+    def cancel(self, rule_name: str, key: Any = None):
+        """Lazy deletion: the stale heap entry is dropped when popped."""
+        self._versions[(rule_name, key)] = self._versions.get((rule_name, key), 0) + 1
+
+    def _push(self, rule: CronRule, key: Any, due: datetime):
+        version = self._versions.setdefault((rule.name, key), 0)
+        heapq.heappush(self._heap, _Timer(due, next(self._seq), rule, key, version))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def next_due(self) -> datetime | None:
+        while self._heap and self._heap[0].version != self._versions[(self._heap[0].rule.name, self._heap[0].key)]:
+            heapq.heappop(self._heap)
+        return self._heap[0].due if self._heap else None
+
+    # ── Loop ──
+
+    async def run_forever(self, since: datetime | None = None):
+        """Sleep until the earliest timer, fire everything due, repeat."""
+        self._wakeup = asyncio.Event()
+        if not self._started:
+            self.start(since)
         while True:
+            due = self.next_due()
+            now = datetime.utcnow()  # Пробел → timezone-aware (MSK)
+            delay = self.MAX_SLEEP if due is None else min(due - now, self.MAX_SLEEP)
+            if delay > timedelta(0):
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay.total_seconds())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_due(now)
+
+    async def run_due(self, now: datetime) -> int:
+        """Fire every timer due at `now` once; return the number of firings."""
+        fired = 0
+        while self.next_due() is not None and self._heap[0].due <= now:
+            timer = heapq.heappop(self._heap)
+            if now - timer.due > timedelta(minutes=1):
+                logger.warning(f"⏰ Catching up {timer.rule.name} (due {timer.due:%d.%m %H:%M})")
+            handler = attrgetter(timer.rule.handler)(self)
             try:
-                await self.tick()
+                await (handler(timer.key) if timer.key is not None else handler())
             except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            await asyncio.sleep(interval_seconds)
+                logger.error(f"Scheduler error in {timer.rule.name}: {e}")
+            heapq.heappush(self._heap, replace(timer, due=timer.rule.next_after(now), seq=next(self._seq)))
+            fired += 1
+        self.last_run = now
+        return fired
 
     async def tick(self):
-        """Single scheduler tick — called every minute."""
-        now = datetime.utcnow()  # Пробел → timezone-aware (MSK)
-        current_time = now.time()
-
-        # ── 1. Check deadline approaching (daily, morning) ──
-        if current_time.hour == 9 and current_time.minute < 2:
-            await self._check_approaching_deadlines()
-
-        # ── 2. Plan-Fact request (configurable, default 18:00) ──
-        if current_time.hour == 18 and current_time.minute < 2:
-            await self._send_plan_fact_requests()
-
-        # ── 3. Plan-Fact overdue check (19:00 = 1h after request) ──
-        if current_time.hour == 19 and current_time.minute < 2:
-            await self._check_plan_fact_overdue()
-
-        # ── 4. Evening deadline → L3 escalation (20:00) ──
-        if current_time.hour == 20 and current_time.minute < 2:
-            await self.escalation.check_evening_deadline()
-
-        # ── 5. Weekly audit (Monday 10:00) ──
-        if now.weekday() == 0 and current_time.hour == 10 and current_time.minute < 2:
-            await self._send_weekly_audits()
-
-        # ── 6. Task overdue detection (every 5 min) ──
-        if current_time.minute % 5 == 0:
-            await self._check_overdue_tasks()
-
-        # ── 7. Escalation matrix check (every minute) ──
-        await self.escalation.check_pending()
-
-        # ── 8. GPR deviation check (every 30 min) ──
-        if current_time.minute % 30 == 0:
-            await self._check_gpr_deviations()
+        """Compatibility: fire whatever is due now (for callers that still poll)."""
+        if not self._started:
+            self.start(self.last_run)
+        await self.run_due(datetime.utcnow())
 
     async def _check_approaching_deadlines(self):
         """Notify about tasks due tomorrow."""
@@ -854,10 +927,11 @@ class CronScheduler:
         # Пробел → actual query
         logger.info("⏰ Checking approaching deadlines")
 
-    async def _send_plan_fact_requests(self):
+    async def _send_plan_fact_requests(self, object_id: int | None = None):
         """
         СМР-008: Daily plan-fact data collection at 18:00.
-        Send to all прорабы and ИТР on active objects.
+        Send to all прорабы and ИТР on active objects (or one object, when
+        scheduled per object with its own time — CronScheduler.schedule).
         """
         # Query: active objects → construction_itr users
         # For each → fire PLAN_FACT_REQUEST
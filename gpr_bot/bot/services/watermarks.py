@@ -0,0 +1,72 @@
+"""
+Watermarks — инкрементальный скан для задач планировщика.
+
+Вместо полного прохода по tasks / supply_orders каждый прогон смотрит только:
+  • строки, чей срок перешёл порог с прошлого прогона (deadline в
+    [scanned_day, today) — «вчера ещё не просрочено, сегодня уже да»);
+  • строки, изменённые после прошлого успешного прогона (updated_at >
+    scanned_until; updated_at ведут ORM и триггер БД, alembic 0009).
+
+    async with async_session() as session:
+        mark = await load_watermark(session, "check_overdue_tasks")
+        ... .where(mark.crossed_or_changed(Task.deadline, Task.updated_at))
+        await save_watermark(session, mark.job, today)
+        await session.commit()
+
+Watermark пишется в той же транзакции, что и результат прогона: упавший
+прогон его не сдвигает. scanned_until — начало транзакции минус LAG, чтобы
+не пропустить строки из транзакций, начатых раньше нас и закоммиченных
+после нашего снимка; повторный просмотр этих строк безвреден — условия
+задач идемпотентны (status ещё не OVERDUE / DELAYED). Первый прогон
+(watermark ещё нет) — полный скан.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, or_, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.models import JobWatermark
+
+LAG = timedelta(minutes=5)
+
+
+@dataclass
+class Watermark:
+    job: str
+    scanned_until: datetime | None = None
+    scanned_day: date | None = None
+
+    def is_new_day(self, today: date) -> bool:
+        return self.scanned_day != today
+
+    def changed(self, updated_col):
+        """Изменённые после прошлого прогона (все — при первом)."""
+        return true() if self.scanned_until is None else updated_col > self.scanned_until
+
+    def crossed_or_changed(self, date_col, updated_col):
+        """Срок перешёл порог «< today» с прошлого прогона или строка изменилась."""
+        if self.scanned_until is None or self.scanned_day is None:
+            return true()
+        return or_(date_col >= self.scanned_day, updated_col > self.scanned_until)
+
+
+async def load_watermark(session: AsyncSession, job: str) -> Watermark:
+    row = (await session.execute(
+        select(JobWatermark.scanned_until, JobWatermark.scanned_day).where(JobWatermark.job == job)
+    )).first()
+    return Watermark(job, *row) if row else Watermark(job)
+
+
+async def save_watermark(session: AsyncSession, job: str, today: date):
+    """Сдвинуть watermark; коммитит вызывающий вместе с результатом прогона."""
+    scanned_until = func.localtimestamp() - LAG
+    await session.execute(
+        pg_insert(JobWatermark)
+        .values(job=job, scanned_until=scanned_until, scanned_day=today)
+        .on_conflict_do_update(
+            index_elements=[JobWatermark.job],
+            set_={"scanned_until": scanned_until, "scanned_day": today, "updated_at": func.now()},
+        )
+    )
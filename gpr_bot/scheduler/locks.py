@@ -0,0 +1,155 @@
+"""
+Locks — ровно один исполнитель каждого срабатывания задачи на N репликах планировщика.
+
+Каждая реплика держит свой APScheduler; задача обёрнута singleton_job:
+
+  1. fencing token — INCR sched:fence:{job} (монотонный номер захвата);
+  2. lock — SET sched:lock:{job} token NX PX ttl; не взяли — срабатывание
+     уже выполняет другая реплика;
+  3. last run — если задача завершилась меньше min_gap назад (другая реплика
+     отработала это же срабатывание чуть раньше), пропуск;
+  4. heartbeat — пока задача идёт, lock продлевается каждые ttl/3; если
+     продлить не удалось (lock истёк и его взял другой) — задача отменяется;
+  5. отметка last run пишется, только если наш token ещё актуален.
+
+Живые реплики — sched:replica:{id} с TTL, обновляет replica_heartbeat().
+"""
+import asyncio
+import functools
+import logging
+import os
+import socket
+import time
+
+from bot.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "sched"
+LOCK_TTL = 60.0
+REPLICA_TTL = 45
+REPLICA_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+# value == token → продлить / удалить
+_EXTEND = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# fence не сдвинулся → записать время завершения
+_MARK_DONE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('set', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class LockLost(Exception):
+    pass
+
+
+class JobLock:
+    def __init__(self, name: str, ttl: float = LOCK_TTL):
+        self.name = name
+        self.ttl = ttl
+        self.lock_key = f"{PREFIX}:lock:{name}"
+        self.fence_key = f"{PREFIX}:fence:{name}"
+        self.last_key = f"{PREFIX}:last:{name}"
+        self.token: str | None = None
+
+    async def acquire(self) -> bool:
+        redis = get_redis()
+        token = str(await redis.incr(self.fence_key))
+        if await redis.set(self.lock_key, token, px=int(self.ttl * 1000), nx=True):
+            self.token = token
+            return True
+        return False
+
+    async def extend(self) -> bool:
+        return bool(await get_redis().eval(_EXTEND, 1, self.lock_key, self.token, int(self.ttl * 1000)))
+
+    async def release(self):
+        await get_redis().eval(_RELEASE, 1, self.lock_key, self.token)
+
+    async def ran_within(self, seconds: float) -> bool:
+        last = await get_redis().get(self.last_key)
+        return last is not None and time.time() - float(last) < seconds
+
+    async def mark_done(self, keep: float):
+        await get_redis().eval(
+            _MARK_DONE, 2, self.lock_key, self.last_key, self.token, repr(time.time()), max(1, int(keep)),
+        )
+
+    async def _heartbeat(self, job: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                held = await self.extend()
+            except Exception as e:
+                logger.warning(f"Job {self.name}: heartbeat failed: {e}")
+                continue
+            if not held:
+                logger.error(f"Job {self.name}: lock lost (token {self.token}), cancelling")
+                job.cancel()
+                return
+
+    async def run(self, fn, min_gap: float):
+        """Выполнить fn, если lock взят и срабатывание ещё не отработано."""
+        if not await self.acquire():
+            logger.info(f"Job {self.name}: running on another replica, skipped")
+            return False
+        try:
+            if await self.ran_within(min_gap):
+                logger.info(f"Job {self.name}: already ran within {min_gap:.0f}s, skipped")
+                return False
+            job = asyncio.create_task(fn())
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                await job
+            except asyncio.CancelledError:
+                if heartbeat.done():
+                    raise LockLost(self.name)
+                raise
+            finally:
+                heartbeat.cancel()
+            await self.mark_done(keep=min_gap)
+            return True
+        finally:
+            await self.release()
+
+
+def singleton_job(name: str, min_gap: float, ttl: float = LOCK_TTL):
+    """Обёртка задачи APScheduler: одно выполнение на срабатывание по всем репликам.
+
+    min_gap — «то же срабатывание»: меньше половины периода задачи, но больше
+    разброса часов/старта реплик.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper():
+            try:
+                await JobLock(name, ttl).run(fn, min_gap)
+            except LockLost:
+                logger.error(f"Job {name}: aborted after losing its lock")
+            except Exception as e:
+                logger.error(f"Job {name} failed: {e}")
+        return wrapper
+    return decorate
+
+
+async def replica_heartbeat():
+    await get_redis().set(f"{PREFIX}:replica:{REPLICA_ID}", repr(time.time()), ex=REPLICA_TTL)
+
+
+async def live_replicas() -> list[str]:
+    prefix = f"{PREFIX}:replica:"
+    return sorted([key[len(prefix):] async for key in get_redis().scan_iter(match=f"{prefix}*")])
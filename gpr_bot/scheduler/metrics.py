@@ -0,0 +1,165 @@
+"""
+Metrics — учёт выполнения задач планировщика и защита от наложения прогонов.
+
+Каждая задача в scheduler/tasks.py обёрнута instrumented(name, period):
+длительность попадает в гистограмму, итог (успех/ошибка) и время последнего
+успеха — в Redis, общий для всех реплик и видимый API
+(GET /api/scheduler/metrics). Внутри задачи объёмы добавляются через
+
+    count(rows_scanned=len(rows), notifications=n)
+
+(вне прогона count ничего не делает). Если прогон идёт дольше
+settings.job_overrun_fraction от периода задачи, в лог пишется ERROR, а
+администраторам (ADMIN_TELEGRAM_IDS) уходит сообщение — ещё до окончания
+прогона, то есть и для зависшей задачи.
+
+Наложение прогонов предотвращает сам APScheduler (max_instances=1,
+coalesce); пропущенные из-за этого срабатывания считает on_skipped.
+
+Ключи: sched:metrics:{job} (hash счётчиков), sched:metrics:{job}:hist
+(hash «верхняя граница, с» → число прогонов).
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime
+
+from bot.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "sched:metrics"
+BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+COUNTERS = (
+    "runs", "failures", "overruns", "overlapped", "missed",
+    "rows_scanned", "notifications", "sends_attempted", "sends_failed",
+)
+
+_current: ContextVar[dict | None] = ContextVar("job_counters", default=None)
+
+
+def _settings():
+    from bot.config import get_settings
+    return get_settings()
+
+
+def count(**values: int):
+    """Добавить к счётчикам текущего прогона (rows_scanned, notifications, sends_*)."""
+    counters = _current.get()
+    if counters is None:
+        return
+    for name, value in values.items():
+        counters[name] = counters.get(name, 0) + value
+
+
+def bucket(seconds: float) -> str:
+    for bound in BUCKETS:
+        if seconds <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+async def record_run(job: str, duration: float, counters: dict, ok: bool, period: float, overrun: bool):
+    key = f"{PREFIX}:{job}"
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hincrby(key, "runs", 1)
+    for name, value in counters.items():
+        pipe.hincrby(key, name, value)
+    if not ok:
+        pipe.hincrby(key, "failures", 1)
+    if overrun:
+        pipe.hincrby(key, "overruns", 1)
+    fields = {"last_duration_ms": round(duration * 1000), "period": int(period), "last_run": repr(time.time())}
+    if ok:
+        fields["last_success"] = fields["last_run"]
+    pipe.hset(key, mapping=fields)
+    pipe.hincrby(f"{key}:hist", bucket(duration), 1)
+    await pipe.execute()
+
+
+async def _alert_overrun(job: str, period: float, limit: float):
+    await asyncio.sleep(limit)
+    logger.error(f"Job {job}: still running after {limit:.0f}s (period {period:.0f}s)")
+    admins = _settings().admin_ids
+    if not admins:
+        return
+    from bot.services.fanout import Outgoing
+    from bot.services.outbound import enqueue_many
+    text = (
+        f"⏱ <b>Планировщик: {job} не укладывается в период</b>\n\n"
+        f"Идёт дольше {limit:.0f} с при периоде {period:.0f} с"
+    )
+    try:
+        await enqueue_many([Outgoing(chat_id, text) for chat_id in admins])
+    except Exception as e:
+        logger.warning(f"Job {job}: overrun alert failed: {e}")
+
+
+def instrumented(job: str, period: float):
+    """Обёртка задачи: длительность, счётчики, последний успех, сигнал о долгом прогоне."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper():
+            counters: dict = {}
+            token = _current.set(counters)
+            limit = period * _settings().job_overrun_fraction
+            watchdog = asyncio.create_task(_alert_overrun(job, period, limit))
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await fn()
+                ok = True
+                return result
+            finally:
+                duration = time.perf_counter() - started
+                watchdog.cancel()
+                _current.reset(token)
+                try:
+                    await record_run(job, duration, counters, ok, period, overrun=duration > limit)
+                except Exception as e:
+                    logger.warning(f"Job {job}: metrics not recorded: {e}")
+                logger.info(f"Job {job}: {'ok' if ok else 'failed'} in {duration:.2f}s {counters or ''}")
+        return wrapper
+    return decorate
+
+
+def on_skipped(event):
+    """Слушатель APScheduler: EVENT_JOB_MAX_INSTANCES / EVENT_JOB_MISSED."""
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+    field = "overlapped" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+    logger.warning(f"Job {event.job_id}: firing skipped ({field})")
+
+    async def incr():
+        try:
+            await get_redis().hincrby(f"{PREFIX}:{event.job_id}", field, 1)
+        except Exception as e:
+            logger.warning(f"Job {event.job_id}: metrics not recorded: {e}")
+
+    asyncio.get_running_loop().create_task(incr())
+
+
+async def get_job_metrics() -> dict:
+    """{job: {runs, failures, …, last_success, last_duration_ms, period, histogram}}"""
+    redis = get_redis()
+    jobs = {}
+    async for key in redis.scan_iter(match=f"{PREFIX}:*"):
+        if key.endswith(":hist"):
+            continue
+        job = key[len(PREFIX) + 1:]
+        raw = await redis.hgetall(key)
+        hist = await redis.hgetall(f"{key}:hist")
+        stats = {name: int(raw.get(name, 0)) for name in COUNTERS}
+        last_success = raw.get("last_success")
+        jobs[job] = {
+            **stats,
+            "last_success": datetime.fromtimestamp(float(last_success)).isoformat(timespec="seconds")
+            if last_success else None,
+            "last_duration_ms": int(raw.get("last_duration_ms", 0)),
+            "period": int(raw.get("period", 0)),
+            "histogram": {
+                le: int(hist.get(le, 0)) for le in [*map(str, BUCKETS), "+Inf"] if le in hist
+            },
+        }
+    return dict(sorted(jobs.items()))
@@ -1,14 +1,26 @@
 import asyncio
 import logging
 from datetime import datetime, date, timedelta
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, and_
 from bot.config import get_settings
 from bot.db.session import async_session, init_db
+from bot.services.object_stats import refresh_object_stats
+from bot.services.overdue import mark_overdue_tasks
+from bot.services.escalation import sweep_escalations
+from bot.services.escalation_state import BATCH_SIZE as ESCALATION_BATCH, process_due
+from bot.services.missing_fact import find_missing_facts
+from bot.services.watermarks import load_watermark, save_watermark
+from bot.services.reminders import REMINDER_24H, REMINDER_TODAY, issue_deadline_reminders
+from bot.services.fanout import Outgoing
+from bot.services.outbound import enqueue_many
+from bot.services.burst import enqueue_burst
+from scheduler.locks import REPLICA_ID, replica_heartbeat, singleton_job
+from scheduler.metrics import count, instrumented, on_skipped
 from bot.db.models import (
     Task, TaskStatus, User, UserRole, SupplyOrder, SupplyStatus,
-    ConstructionObject, ObjectStatus, NotificationType, Notification,
-    ObjectRole, DailyPlanFact,
+    ConstructionObject, ObjectStatus,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -17,85 +29,67 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+async def send(messages: list[Outgoing], burst: str | None = None):
+    """Отдать сообщения в outbound (burst — растянуть рассылкой) с учётом в метриках задачи."""
+    count(sends_attempted=len(messages))
+    try:
+        if burst:
+            await enqueue_burst(burst, messages)
+        else:
+            await enqueue_many(messages)
+    except Exception:
+        count(sends_failed=len(messages))
+        raise
+
+
 async def check_overdue_tasks():
     """Mark overdue tasks and notify assignees + project managers."""
-    from aiogram import Bot
     from bot.utils.deep_links import object_tasks_button
     from aiogram.types import InlineKeyboardMarkup
-    bot = Bot(token=settings.bot_token)
 
+    today = date.today()
     async with async_session() as session:
-        today = date.today()
-
-        # Find tasks past deadline that aren't done/already overdue
-        result = await session.execute(
-            select(Task).where(
-                Task.deadline < today,
-                Task.status.notin_([TaskStatus.DONE, TaskStatus.OVERDUE]),
-            )
-        )
-        tasks = result.scalars().all()
-
-        for task in tasks:
-            old_status = task.status
-            task.status = TaskStatus.OVERDUE
-            logger.info(f"Task {task.id} '{task.title}' marked OVERDUE")
-
-            # Notify assignee
-            if task.assignee_id:
-                notif = Notification(
-                    user_id=task.assignee_id,
-                    type=NotificationType.TASK_OVERDUE,
-                    title=f"🔴 Просрочена: {task.title}",
-                    text=f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}",
-                    entity_type="task",
-                    entity_id=task.id,
-                )
-                session.add(notif)
-
-                assignee = await session.get(User, task.assignee_id)
-                if assignee:
-                    try:
-                        kb = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(task.object_id)]])
-                        await bot.send_message(
-                            assignee.telegram_id,
-                            f"🔴 <b>Задача просрочена!</b>\n"
-                            f"📋 {task.title}\n"
-                            f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}",
-                            parse_mode="HTML",
-                            reply_markup=kb,
-                        )
-                    except Exception:
-                        pass
-
-            # Notify project managers
-            pm_result = await session.execute(
-                select(User).where(User.role == UserRole.PROJECT_MANAGER, User.is_active == True)
-            )
-            for pm in pm_result.scalars().all():
-                if pm.id != task.assignee_id:
-                    try:
-                        await bot.send_message(
-                            pm.telegram_id,
-                            f"⚠️ <b>Просроченная задача</b>\n"
-                            f"📋 {task.title}\n"
-                            f"Исполнитель: {(await session.get(User, task.assignee_id)).full_name if task.assignee_id else '—'}",
-                            parse_mode="HTML",
-                        )
-                    except Exception:
-                        pass
-
+        mark = await load_watermark(session, "check_overdue_tasks")
+        overdue = await mark_overdue_tasks(session, today, scope=mark.crossed_or_changed(Task.deadline, Task.updated_at))
+        await save_watermark(session, mark.job, today)
         await session.commit()
-    await bot.session.close()
+    count(rows_scanned=len(overdue), notifications=sum(1 for t in overdue if t.assignee))
+    if not overdue:
+        return
+    logger.info(f"{len(overdue)} tasks marked OVERDUE")
+
+    messages = []
+    for task in overdue:
+        deadline = task.deadline.strftime('%d.%m.%Y')
+        if task.assignee:
+            kb = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(task.object_id)]])
+            messages.append(Outgoing(
+                task.assignee.telegram_id,
+                f"🔴 <b>Задача просрочена!</b>\n"
+                f"📋 {task.title}\n"
+                f"Дедлайн: {deadline}",
+                reply_markup=kb, object_id=task.object_id,
+            ))
+        assignee_name = task.assignee.full_name if task.assignee else '—'
+        for pm in task.pms:
+            if task.assignee and pm.id == task.assignee.id:
+                continue
+            messages.append(Outgoing(
+                pm.telegram_id,
+                f"⚠️ <b>Просроченная задача</b>\n"
+                f"📋 {task.title}\n"
+                f"Исполнитель: {assignee_name}",
+                object_id=task.object_id,
+            ))
+
+    await send(messages)
 
 
 async def check_delayed_supplies():
     """Check for supplies past expected delivery date."""
-    from aiogram import Bot
-    bot = Bot(token=settings.bot_token)
-
     async with async_session() as session:
         today = date.today()
+        mark = await load_watermark(session, "check_delayed_supplies")
         result = await session.execute(
             select(SupplyOrder).where(
                 SupplyOrder.expected_date < today,
@@ -103,39 +97,43 @@ async def check_delayed_supplies():
                     SupplyStatus.REQUESTED, SupplyStatus.APPROVED,
                     SupplyStatus.ORDERED,
                 ]),
+                mark.crossed_or_changed(SupplyOrder.expected_date, SupplyOrder.updated_at),
             )
         )
         orders = result.scalars().all()
+        count(rows_scanned=len(orders))
 
+        messages = []
+        pms = None
         for order in orders:
             if order.status != SupplyStatus.DELAYED:
                 order.status = SupplyStatus.DELAYED
 
                 # Notify PMs
-                pm_result = await session.execute(
-                    select(User).where(User.role == UserRole.PROJECT_MANAGER, User.is_active == True)
+                if pms is None:
+                    pms = (await session.execute(
+                        select(User).where(User.role == UserRole.PROJECT_MANAGER, User.is_active == True)
+                    )).scalars().all()
+                messages.extend(
+                    Outgoing(
+                        pm.telegram_id,
+                        f"⚠️ <b>Задержка поставки</b>\n"
+                        f"📦 {order.material_name}\n"
+                        f"Ожидалось: {order.expected_date.strftime('%d.%m.%Y')}",
+                        object_id=order.object_id,
+                    )
+                    for pm in pms
                 )
-                for pm in pm_result.scalars().all():
-                    try:
-                        await bot.send_message(
-                            pm.telegram_id,
-                            f"⚠️ <b>Задержка поставки</b>\n"
-                            f"📦 {order.material_name}\n"
-                            f"Ожидалось: {order.expected_date.strftime('%d.%m.%Y')}",
-                            parse_mode="HTML",
-                        )
-                    except Exception:
-                        pass
 
+        await refresh_object_stats(session, *{o.object_id for o in orders})
+        await save_watermark(session, mark.job, today)
         await session.commit()
-    await bot.session.close()
+
+    await send(messages, burst="check_delayed_supplies")
 
 
 async def daily_digest():
     """Send morning digest to project managers."""
-    from aiogram import Bot
-    bot = Bot(token=settings.bot_token)
-
     async with async_session() as session:
         # Count active objects, overdue tasks, delayed supplies
         from sqlalchemy import func
@@ -162,285 +160,149 @@ async def daily_digest():
         pm_result = await session.execute(
             select(User).where(User.role.in_([UserRole.PROJECT_MANAGER, UserRole.ADMIN]), User.is_active == True)
         )
-        for pm in pm_result.scalars().all():
-            try:
-                await bot.send_message(pm.telegram_id, text, parse_mode="HTML")
-            except Exception:
-                pass
+        pms = pm_result.scalars().all()
 
-    await bot.session.close()
+    await send([Outgoing(pm.telegram_id, text) for pm in pms], burst="daily_digest")
 
 
 async def deadline_reminders():
-    """Напоминания за 24ч и 2ч до дедлайна задачи."""
-    from aiogram import Bot
+    """Напоминания за 24ч и 2ч до дедлайна задачи (без повторов — notifications.dedupe_key)."""
     from bot.utils.deep_links import object_tasks_button
     from aiogram.types import InlineKeyboardMarkup
-    bot = Bot(token=settings.bot_token)
 
+    now = datetime.utcnow()
+    today = date.today()
     async with async_session() as session:
-        now = datetime.utcnow()
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
-
         # Tasks with deadline tomorrow (24h reminder)
-        result_24h = await session.execute(
-            select(Task).where(
-                Task.deadline == tomorrow,
-                Task.status.notin_([TaskStatus.DONE, TaskStatus.OVERDUE]),
-                Task.assignee_id.isnot(None),
-            )
-        )
-        for task in result_24h.scalars().all():
-            assignee = await session.get(User, task.assignee_id)
-            if not assignee:
-                continue
-
-            # Check if already reminded today
-            existing = (await session.execute(
-                select(func.count(Notification.id)).where(
-                    Notification.user_id == assignee.id,
-                    Notification.entity_id == task.id,
-                    Notification.title.contains("24ч"),
-                    Notification.created_at >= datetime.combine(today, datetime.min.time()),
-                )
-            )).scalar()
-            if existing:
-                continue
-
-            kb = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(task.object_id)]])
-            text = (
-                f"⏰ <b>Напоминание: 24ч до дедлайна</b>\n\n"
-                f"📋 {task.title}\n"
-                f"📅 Дедлайн: {task.deadline.strftime('%d.%m.%Y')}"
-            )
-            notif = Notification(
-                user_id=assignee.id, type="task_overdue",
-                title=f"⏰ 24ч до дедлайна: {task.title}",
-                text=text, entity_type="task", entity_id=task.id,
-            )
-            session.add(notif)
-            try:
-                await bot.send_message(assignee.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-            except Exception:
-                pass
-            logger.info(f"24h reminder sent for task {task.id} to user {assignee.id}")
-
+        reminders = await issue_deadline_reminders(session, REMINDER_24H, today + timedelta(days=1), today)
         # Tasks with deadline today (2h reminder — only between 7-20)
         if 7 <= now.hour <= 20:
-            result_2h = await session.execute(
-                select(Task).where(
-                    Task.deadline == today,
-                    Task.status.notin_([TaskStatus.DONE, TaskStatus.OVERDUE]),
-                    Task.assignee_id.isnot(None),
-                )
-            )
-            for task in result_2h.scalars().all():
-                assignee = await session.get(User, task.assignee_id)
-                if not assignee:
-                    continue
-
-                existing = (await session.execute(
-                    select(func.count(Notification.id)).where(
-                        Notification.user_id == assignee.id,
-                        Notification.entity_id == task.id,
-                        Notification.title.contains("Сегодня"),
-                        Notification.created_at >= datetime.combine(today, datetime.min.time()),
-                    )
-                )).scalar()
-                if existing:
-                    continue
-
-                kb = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(task.object_id)]])
-                text = (
-                    f"🔴 <b>Дедлайн сегодня!</b>\n\n"
-                    f"📋 {task.title}"
-                )
-                notif = Notification(
-                    user_id=assignee.id, type="task_overdue",
-                    title=f"🔴 Сегодня дедлайн: {task.title}",
-                    text=text, entity_type="task", entity_id=task.id,
-                )
-                session.add(notif)
-                try:
-                    await bot.send_message(assignee.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-                except Exception:
-                    pass
-
+            reminders += await issue_deadline_reminders(session, REMINDER_TODAY, today, today)
         await session.commit()
-    await bot.session.close()
+    count(notifications=len(reminders))
+
+    await send([
+        Outgoing(
+            r.telegram_id, r.text,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(r.object_id)]]),
+            object_id=r.object_id, notification_id=r.notification_id,
+        )
+        for r in reminders
+    ], burst="deadline_reminders")
+    if reminders:
+        logger.info(f"Deadline reminders scheduled: {len(reminders)}")
 
 
 async def escalation_check():
     """Эскалация просроченных задач: 1д → исполнитель, 3д → PM, 7д → директор."""
-    from aiogram import Bot
     from bot.utils.deep_links import object_tasks_button
     from aiogram.types import InlineKeyboardMarkup
-    bot = Bot(token=settings.bot_token)
 
+    today = date.today()
     async with async_session() as session:
-        today = date.today()
-
-        result = await session.execute(
-            select(Task).where(Task.status == TaskStatus.OVERDUE, Task.deadline.isnot(None))
-        )
-        for task in result.scalars().all():
-            days_overdue = (today - task.deadline).days
-            if days_overdue <= 0:
-                continue
-
-            kb = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(task.object_id)]])
-
-            # 1 day — re-notify assignee
-            if days_overdue == 1 and task.assignee_id:
-                assignee = await session.get(User, task.assignee_id)
-                if assignee:
-                    text = (
-                        f"🔴 <b>Просрочено 1 день</b>\n\n"
-                        f"📋 {task.title}\n"
-                        f"Дедлайн был: {task.deadline.strftime('%d.%m.%Y')}"
-                    )
-                    try:
-                        await bot.send_message(assignee.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-                    except Exception:
-                        pass
-
-            # 3 days — escalate to PM
-            if days_overdue == 3:
-                pms = await session.execute(
-                    select(User).join(ObjectRole, ObjectRole.user_id == User.id).where(
-                        ObjectRole.object_id == task.object_id,
-                        ObjectRole.role.in_([UserRole.PROJECT_MANAGER, UserRole.ADMIN]),
-                    )
-                )
-                assignee = await session.get(User, task.assignee_id) if task.assignee_id else None
-                for pm in pms.scalars().all():
-                    text = (
-                        f"⚠️ <b>Эскалация: 3 дня просрочки</b>\n\n"
-                        f"📋 {task.title}\n"
-                        f"👤 Исполнитель: {assignee.full_name if assignee else '—'}\n"
-                        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}"
-                    )
-                    notif = Notification(
-                        user_id=pm.id, type="escalation",
-                        title=f"⚠️ Эскалация: {task.title}",
-                        text=text, entity_type="task", entity_id=task.id,
-                    )
-                    session.add(notif)
-                    try:
-                        await bot.send_message(pm.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-                    except Exception:
-                        pass
-
-            # 7 days — escalate to director
-            if days_overdue == 7:
-                directors = await session.execute(
-                    select(User).where(
-                        User.role.in_([UserRole.DIRECTOR, UserRole.ADMIN]),
-                        User.is_active == True,
-                    )
-                )
-                assignee = await session.get(User, task.assignee_id) if task.assignee_id else None
-                for director in directors.scalars().all():
-                    text = (
-                        f"🚨 <b>Критическая эскалация: 7 дней просрочки</b>\n\n"
-                        f"📋 {task.title}\n"
-                        f"👤 Исполнитель: {assignee.full_name if assignee else '—'}\n"
-                        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y')}"
-                    )
-                    notif = Notification(
-                        user_id=director.id, type="escalation",
-                        title=f"🚨 Критическая: {task.title}",
-                        text=text, entity_type="task", entity_id=task.id,
-                    )
-                    session.add(notif)
-                    try:
-                        await bot.send_message(director.telegram_id, text, parse_mode="HTML", reply_markup=kb)
-                    except Exception:
-                        pass
-
+        # Первый прогон за день — все задачи на ступенях 1/3/7; следующие — только изменённые с тех пор
+        mark = await load_watermark(session, "escalation_check")
+        scope = None if mark.is_new_day(today) else mark.changed(Task.updated_at)
+        escalations = await sweep_escalations(session, today, scope=scope)
+        await save_watermark(session, mark.job, today)
         await session.commit()
-    await bot.session.close()
+    count(notifications=sum(1 for e in escalations if e.notification_id))
+    if not escalations:
+        return
+    logger.info(f"Escalation sweep: {len(escalations)} messages")
+
+    keyboards = {}
+    for e in escalations:
+        if e.object_id not in keyboards:
+            keyboards[e.object_id] = InlineKeyboardMarkup(inline_keyboard=[[object_tasks_button(e.object_id)]])
+    await send([
+        Outgoing(e.telegram_id, e.text, reply_markup=keyboards[e.object_id],
+                 object_id=e.object_id, notification_id=e.notification_id)
+        for e in escalations
+    ])
+
+
+async def escalate_pending():
+    """Ступени L1/L2/L3 по уведомлениям без ответа (EscalationMatrix.TIMING) — только созревшие."""
+    while True:
+        # Пачка — своя транзакция: строки заняты (SKIP LOCKED) только до commit
+        async with async_session() as session:
+            claimed, messages = await process_due(session, datetime.utcnow(), ESCALATION_BATCH)
+            await session.commit()
+        count(rows_scanned=claimed, notifications=len(messages))
+        await send(messages)
+        if claimed < ESCALATION_BATCH:
+            return
 
 
 async def check_missing_fact():
     """Напоминание прорабам о незаполненном факте за вчера."""
-    from aiogram import Bot
-    bot = Bot(token=settings.bot_token)
-
+    yesterday = date.today() - timedelta(days=1)
     async with async_session() as session:
-        yesterday = date.today() - timedelta(days=1)
-
-        # Get active objects
-        objs = (await session.execute(
-            select(ConstructionObject).where(ConstructionObject.status == ObjectStatus.ACTIVE)
-        )).scalars().all()
-
-        for obj in objs:
-            # Check if any fact was entered yesterday
-            fact_count = (await session.execute(
-                select(func.count(DailyPlanFact.id)).where(
-                    DailyPlanFact.object_id == obj.id,
-                    DailyPlanFact.date == yesterday,
-                    DailyPlanFact.fact_volume > 0,
-                )
-            )).scalar() or 0
-
-            if fact_count > 0:
-                continue
-
-            # Notify construction ITRs and PMs on this object
-            users = (await session.execute(
-                select(User).join(ObjectRole, ObjectRole.user_id == User.id).where(
-                    ObjectRole.object_id == obj.id,
-                    ObjectRole.role.in_([
-                        UserRole.CONSTRUCTION_ITR, UserRole.PROJECT_MANAGER,
-                    ]),
-                )
-            )).scalars().all()
+        missing = await find_missing_facts(session, yesterday)
+    count(rows_scanned=len(missing))
 
-            for user in users:
-                text = (
-                    f"📝 <b>Не заполнен факт за {yesterday.strftime('%d.%m.%Y')}</b>\n\n"
-                    f"🏗 {obj.name}\n"
-                    f"Используйте /fact для ввода данных"
-                )
-                try:
-                    await bot.send_message(user.telegram_id, text, parse_mode="HTML")
-                except Exception:
-                    pass
-
-            if users:
-                logger.info(f"Missing fact reminder sent for object {obj.id} ({len(users)} users)")
-
-    await bot.session.close()
+    messages = []
+    for obj in missing:
+        text = (
+            f"📝 <b>Не заполнен факт за {yesterday.strftime('%d.%m.%Y')}</b>\n\n"
+            f"🏗 {obj.object_name}\n"
+            f"Используйте /fact для ввода данных"
+        )
+        messages.extend(Outgoing(telegram_id, text, object_id=obj.object_id) for telegram_id in obj.telegram_ids)
+    await send(messages, burst="check_missing_fact")
+    if missing:
+        logger.info(f"Missing fact reminders: {len(missing)} objects, {len(messages)} users")
 
 
 async def main():
     await init_db()
 
-    scheduler = AsyncIOScheduler()
+    # Не больше одного прогона задачи одновременно; пропущенные срабатывания
+    # (реплика спала, прогон затянулся) схлопываются в одно
+    scheduler = AsyncIOScheduler(job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 300})
+    scheduler.add_listener(on_skipped, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    # Реплик может быть несколько: каждое срабатывание выполняет одна (scheduler/locks.py).
+    # min_gap — меньше периода задачи, больше разброса старта реплик.
+    # period — через сколько следующее срабатывание (метрики и сигнал о долгом прогоне, scheduler/metrics.py).
+    def add_job(fn, trigger, min_gap, period, **trigger_args):
+        job = instrumented(fn.__name__, period)(fn)
+        scheduler.add_job(singleton_job(fn.__name__, min_gap)(job), trigger, id=fn.__name__, **trigger_args)
 
     # Check deadlines every hour
-    scheduler.add_job(check_overdue_tasks, "interval", seconds=settings.check_deadlines_interval)
+    add_job(check_overdue_tasks, "interval", settings.check_deadlines_interval / 2, settings.check_deadlines_interval,
+            seconds=settings.check_deadlines_interval)
+
+    # Рассылки ниже уходят через enqueue_burst (растянуты на burst_window);
+    # jitter разносит их старт, чтобы запросы к БД не совпадали в начале часа
+    jitter = settings.burst_job_jitter or None
 
     # Check supply delays every 2 hours
-    scheduler.add_job(check_delayed_supplies, "interval", hours=2)
+    add_job(check_delayed_supplies, "interval", 3600, 2 * 3600, hours=2, jitter=jitter)
 
     # Daily digest at configured hour
-    scheduler.add_job(daily_digest, "cron", hour=settings.digest_hour, minute=0)
+    add_job(daily_digest, "cron", 3600, 24 * 3600, hour=settings.digest_hour, minute=0, jitter=jitter)
 
     # Deadline reminders — every 2 hours during work hours
-    scheduler.add_job(deadline_reminders, "cron", hour="7,9,11,13,15,17", minute=0)
+    add_job(deadline_reminders, "cron", 3600, 2 * 3600, hour="7,9,11,13,15,17", minute=0, jitter=jitter)
 
     # Escalation check — twice daily
-    scheduler.add_job(escalation_check, "cron", hour="9,15", minute=30)
+    add_job(escalation_check, "cron", 3600, 6 * 3600, hour="9,15", minute=30)
+
+    # Уведомления без ответа — каждую минуту на всех репликах: строки делит
+    # FOR UPDATE SKIP LOCKED, поэтому singleton_job не нужен
+    job = instrumented(escalate_pending.__name__, 60)(escalate_pending)
+    scheduler.add_job(job, "interval", minutes=1, id=escalate_pending.__name__)
 
     # Missing fact reminder — every morning at 8:30
-    scheduler.add_job(check_missing_fact, "cron", hour=8, minute=30)
+    add_job(check_missing_fact, "cron", 3600, 24 * 3600, hour=8, minute=30, jitter=jitter)
+
+    # Replica heartbeat (sched:replica:*)
+    scheduler.add_job(replica_heartbeat, "interval", seconds=15, next_run_time=datetime.now())
 
     scheduler.start()
-    logger.info("Scheduler started")
+    logger.info(f"Scheduler started (replica {REPLICA_ID})")
 
     try:
         while True:
@@ -0,0 +1,103 @@
+"""
+Batch Loader — ключи одного тика резолвятся одним вызовом, результат кешируется.
+Run: python3 -m pytest tests/test_batch_loader.py -v
+"""
+import asyncio
+
+from bot.services.batch_loader import BatchLoader, get_loaders
+
+
+def test_batches_and_memoizes():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(sorted(keys))
+        return {k: k * 10 for k in keys if k != 3}
+
+    async def scenario():
+        loader = BatchLoader(batch_fn, int)
+        values = await loader.load_many([1, 2, 3, 2])
+        single = await loader.load(1)
+        again = await asyncio.gather(loader.load(4), loader.load(2), loader.load(5))
+        return values, single, again
+
+    values, single, again = asyncio.run(scenario())
+    assert values == [10, 20, 0, 20]
+    assert single == 10
+    assert again == [40, 20, 50]
+    assert calls == [[1, 2, 3], [4, 5]]
+
+
+def test_failed_batch_is_not_cached():
+    attempts = []
+
+    async def batch_fn(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return {k: k for k in keys}
+
+    async def scenario():
+        loader = BatchLoader(batch_fn)
+        try:
+            await loader.load(7)
+        except RuntimeError:
+            pass
+        return await loader.load(7)
+
+    assert asyncio.run(scenario()) == 7
+    assert len(attempts) == 2
+
+
+def test_bad_batch_result_reaches_waiters():
+    async def batch_fn(keys):
+        return None  # не dict — ошибка уже после вызова batch_fn
+
+    async def scenario():
+        loader = BatchLoader(batch_fn)
+        try:
+            await asyncio.wait_for(loader.load(1), 1)
+        except AttributeError:
+            return loader
+        raise AssertionError("error not surfaced")
+
+    loader = asyncio.run(scenario())
+    assert loader._cache == {} and loader._tasks == set()
+
+
+if __name__ == "__main__":
+    test_batches_and_memoizes()
+    test_failed_batch_is_not_cached()
+    test_bad_batch_result_reaches_waiters()
+    print("✅ batch loader OK")
+
+
+def test_loader_families_share_session_lock():
+    class FakeResult:
+        def all(self):
+            return []
+
+    class FakeSession:
+        def __init__(self):
+            self.info = {}
+            self.active = self.peak = self.calls = 0
+
+        async def execute(self, stmt):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0)
+            self.active -= 1
+            self.calls += 1
+            return FakeResult()
+
+    async def scenario():
+        session = FakeSession()
+        loaders = get_loaders(session)
+        users, zones = await asyncio.gather(
+            loaders.active_objects_by_user.load_many([1, 2]), loaders.bom_stats.load_many([5]),
+        )
+        return session, users, zones
+
+    session, users, zones = asyncio.run(scenario())
+    assert users == [0, 0] and zones == [{"total": 0, "completed": 0}]
+    assert session.calls == 2 and session.peak == 1
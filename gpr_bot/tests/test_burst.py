@@ -0,0 +1,101 @@
+"""
+Burst — детерминированный слот получателя в окне, бюджет msg/s, прогноз завершения.
+Run: python3 -m pytest tests/test_burst.py -v
+"""
+import asyncio
+from collections import Counter
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+import bot.services.burst as burst
+from bot.services.fanout import Outgoing
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self.ops.append((name, a, kw))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*a, **kw) for name, a, kw in self.ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.zset = {}
+        self.hashes = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def zcard(self, key):
+        return len(self.zset)
+
+    async def zadd(self, key, mapping):
+        self.zset.update(mapping)
+
+    async def zrangebyscore(self, key, lo, hi, start=0, num=None):
+        return [m for m, s in sorted(self.zset.items(), key=lambda x: (x[1], x[0])) if s <= hi][:num]
+
+    async def zrem(self, key, member):
+        return 1 if self.zset.pop(member, None) is not None else 0
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+
+def _setup(monkeypatch):
+    redis = FakeRedis()
+    sent = []
+
+    async def enqueue_many(messages):
+        sent.extend(messages)
+        return len(messages)
+
+    monkeypatch.setattr(burst, "get_redis", lambda: redis)
+    monkeypatch.setattr(burst, "enqueue_many", enqueue_many)
+    return redis, sent
+
+
+def test_jitter_is_deterministic_per_user():
+    assert burst.jitter("daily_digest", 42, 900) == burst.jitter("daily_digest", 42, 900)
+    assert burst.jitter("daily_digest", 42, 900) != burst.jitter("daily_digest", 43, 900)
+    assert all(0 <= burst.jitter("daily_digest", c, 900) < 900 for c in range(1000))
+
+
+def test_plan_respects_budget_per_second():
+    offsets = burst.plan_offsets("check_missing_fact", list(range(2000)), window=60, budget=20)
+    per_second = Counter(int(o) for o in offsets)
+    assert max(per_second.values()) <= 20
+    # 2000 сообщений при 20 msg/s не помещаются в 60 с — хвост уезжает за окно
+    assert max(offsets) >= 2000 / 20 - 1
+    wanted = [burst.jitter("check_missing_fact", c, 60) for c in range(2000)]
+    assert all(o >= w for o, w in zip(offsets, wanted))
+
+
+def test_burst_released_in_order_within_budget(monkeypatch):
+    redis, sent = _setup(monkeypatch)
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Задачи", callback_data="x")]])
+    messages = [Outgoing(c % 50, f"msg {i}", reply_markup=kb if i % 2 else None, object_id=7)
+                for i, c in enumerate(range(200))]
+
+    async def scenario():
+        report = await burst.enqueue_burst("daily_digest", messages, window=30, budget=5, now=1000.0)
+        released = []
+        for tick in range(1000, 1100):
+            released.append(await burst.release_due(now=float(tick), limit=5))
+        return report, released
+
+    report, released = asyncio.run(scenario())
+    assert max(released) <= 5 and sum(released) == 200 and not redis.zset
+    assert report.messages == 200 and report.finish_at >= 1000 + 200 / 5
+    assert "daily_digest" in redis.hashes[burst.REPORTS_KEY]
+    # Внутри чата порядок исходный, разметка и object_id переживают сериализацию
+    for chat in range(50):
+        texts = [m.text for m in sent if m.chat_id == chat]
+        assert texts == [f"msg {i}" for i in range(chat, 200, 50)]
+    assert sent[0].object_id == 7
+    assert any(m.reply_markup and m.reply_markup.inline_keyboard[0][0].text == "Задачи" for m in sent)
@@ -0,0 +1,126 @@
+"""
+Coalesce — окно склейки: буфер по (чат, объект), сводка, обход для срочных типов.
+Run: python3 -m pytest tests/test_coalesce.py -v
+"""
+import asyncio
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+import bot.services.coalesce as co
+import bot.utils.deep_links as deep_links
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self.ops.append((name, a, kw))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*a, **kw) for name, a, kw in self.ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.zset = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def zadd(self, key, mapping, nx=False):
+        for member, score in mapping.items():
+            if not (nx and member in self.zset):
+                self.zset[member] = score
+
+    async def zrangebyscore(self, key, lo, hi, start=0, num=None):
+        return [m for m, s in sorted(self.zset.items(), key=lambda x: x[1]) if s <= hi][:num]
+
+    async def zrem(self, key, member):
+        return 1 if self.zset.pop(member, None) is not None else 0
+
+    async def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    async def delete(self, key):
+        self.lists.pop(key, None)
+
+
+def _setup(monkeypatch):
+    redis = FakeRedis()
+    sent = []
+
+    async def enqueue_many(messages):
+        sent.extend((m.chat_id, m.text) for m in messages)
+
+    monkeypatch.setattr(co, "get_redis", lambda: redis)
+    monkeypatch.setattr(co, "enqueue_many", enqueue_many)
+    monkeypatch.setattr(deep_links, "object_button",
+                        lambda object_id: InlineKeyboardButton(text="obj", callback_data=f"obj:{object_id}"))
+    return redis, sent
+
+
+def test_bulk_events_become_one_digest(monkeypatch):
+    redis, sent = _setup(monkeypatch)
+
+    async def scenario():
+        for i in range(40):
+            await co.coalesce(100, 7, "task_status", f"🔵 <b>Статус задачи изменён</b>\n\n<b>Задача {i}</b>\nnew → В работе",
+                              window=60)
+        await co.coalesce(100, 7, "escalation", "⛔ блокировка", window=60)
+        await co.coalesce(200, 7, "stage_completed", "🏗 Этап завершён", window=60)
+        assert sent == [(100, "⛔ блокировка")]
+        assert await co.flush_due(now=0, top=3) == 0
+        return await co.flush_due(now=redis.zset[co.buffer_key(100, 7)] + 1, top=3)
+
+    assert asyncio.run(scenario()) == 2
+    digest = dict(sent[1:])
+    assert "Сводка: 40" in digest[100] and "Статус задачи изменён — 40" in digest[100]
+    assert "• Задача 0 · new → В работе" in digest[100] and "…и ещё 37" in digest[100]
+    assert digest[200] == "🏗 Этап завершён"
+    assert not redis.zset and not redis.lists
+
+
+def test_render_digest_keeps_shared_keyboard():
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Задачи", callback_data="x")]])
+    items = [{"type": "t", "text": "A\nb", "kb": kb.model_dump_json(exclude_none=True)}] * 2
+    text, markup = co.render_digest(items, top=5)
+    assert markup.inline_keyboard[0][0].text == "Задачи"
+    _, markup = co.render_digest(items + [{"type": "t", "text": "A\nc"}], top=5)
+    assert markup is None
+    assert co.is_urgent("escalation_l2") and co.is_urgent("defect_reported") and co.is_urgent("task_overdue")
+    assert not co.is_urgent("task_status")
+
+
+def test_actionable_pushes_bypass_window(monkeypatch):
+    redis, _ = _setup(monkeypatch)
+    sent = []
+
+    async def enqueue_many(messages):
+        sent.extend(messages)
+        return []
+
+    monkeypatch.setattr(co, "enqueue_many", enqueue_many)
+
+    def accept_kb(task_id):
+        return InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Принять", callback_data=f"task_accept:{task_id}"),
+            InlineKeyboardButton(text="❌ Отклонить", callback_data=f"task_reject:{task_id}"),
+        ]])
+
+    pushes = [co.Push(100, f"📋 Новая задача {i}", 7, "task_assigned", accept_kb(i)) for i in (1, 2)]
+    # Кнопки действия над пунктом — сразу, даже если тип без сроков
+    pushes.append(co.Push(100, "Подтвердите", 7, "general", accept_kb(3)))
+    asyncio.run(co.coalesce_many(pushes, window=60))
+
+    assert [m.reply_markup.inline_keyboard[0][0].callback_data for m in sent] == \
+        ["task_accept:1", "task_accept:2", "task_accept:3"]
+    assert not redis.zset and not redis.lists
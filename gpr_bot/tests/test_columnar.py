@@ -0,0 +1,30 @@
+"""
+Columnar — параллельные массивы и словарное кодирование строковых колонок.
+Run: python3 -m pytest tests/test_columnar.py -v
+"""
+from decimal import Decimal
+
+from bot.services.columnar import encode_dict, to_columnar
+
+
+def test_encode_dict_keeps_first_seen_order():
+    assert encode_dict(["Б", "А", "Б", "Б"]) == {"dict": ["Б", "А"], "codes": [0, 1, 0, 0]}
+
+
+def test_to_columnar_round_trip():
+    columns = ["floor", "facade", "plan_qty"]
+    rows = [(1, "Север", Decimal("10.5")), (1, "Юг", Decimal("3")), (2, "Север", Decimal("0"))]
+    out = to_columnar(rows, columns, {"facade"})
+
+    assert out["count"] == 3
+    cols = out["columns"]
+    assert cols["floor"] == [1, 1, 2]
+    assert cols["plan_qty"] == [10.5, 3.0, 0.0]
+    facades = [cols["facade"]["dict"][c] for c in cols["facade"]["codes"]]
+    assert facades == ["Север", "Юг", "Север"]
+
+
+def test_to_columnar_empty():
+    out = to_columnar([], ["floor", "facade"], {"facade"})
+    assert out["count"] == 0
+    assert out["columns"] == {"floor": [], "facade": {"dict": [], "codes": []}}
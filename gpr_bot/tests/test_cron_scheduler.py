@@ -0,0 +1,100 @@
+"""
+CronScheduler — min-heap таймеров: следующее срабатывание, догон пропущенных, правила по объекту.
+Run: python3 -m pytest tests/test_cron_scheduler.py -v
+"""
+import asyncio
+from datetime import datetime, time, timedelta
+
+from bot.services.trigger_engine import CronRule, CronScheduler
+
+
+class Recorder(CronScheduler):
+    def __init__(self):
+        super().__init__(db=None, engine=None)
+        self.calls = []
+        for name in ("_check_approaching_deadlines", "_send_plan_fact_requests", "_check_plan_fact_overdue",
+                     "_send_weekly_audits", "_check_overdue_tasks", "_check_gpr_deviations"):
+            setattr(self, name, self._recorder(name))
+        self.escalation.check_pending = self._recorder("check_pending")
+        self.escalation.check_evening_deadline = self._recorder("check_evening_deadline")
+
+    def _recorder(self, name):
+        async def call(*args):
+            self.calls.append((name, *args))
+        return call
+
+
+def test_next_after():
+    every5 = CronRule("x", "h", every=timedelta(minutes=5))
+    assert every5.next_after(datetime(2026, 10, 19, 9, 3, 30)) == datetime(2026, 10, 19, 9, 5)
+    assert every5.next_after(datetime(2026, 10, 19, 9, 5)) == datetime(2026, 10, 19, 9, 10)
+    daily = CronRule("x", "h", at=time(18, 0))
+    assert daily.next_after(datetime(2026, 10, 19, 17, 59)) == datetime(2026, 10, 19, 18, 0)
+    assert daily.next_after(datetime(2026, 10, 19, 18, 0)) == datetime(2026, 10, 20, 18, 0)
+    monday = CronRule("x", "h", at=time(10, 0), weekday=0)
+    # 2026-10-19 — понедельник
+    assert monday.next_after(datetime(2026, 10, 19, 10, 30)) == datetime(2026, 10, 26, 10, 0)
+    assert monday.next_after(datetime(2026, 10, 17, 12, 0)) == datetime(2026, 10, 19, 10, 0)
+
+
+def test_fires_in_order_without_reevaluating_idle_rules():
+    s = Recorder()
+    s.start(since=datetime(2026, 10, 19, 17, 59, 30))
+    assert s.next_due() == datetime(2026, 10, 19, 18, 0)
+    assert asyncio.run(s.run_due(datetime(2026, 10, 19, 17, 59, 59))) == 0
+    asyncio.run(s.run_due(datetime(2026, 10, 19, 18, 0)))
+    assert sorted(c[0] for c in s.calls) == sorted([
+        "_send_plan_fact_requests", "_check_overdue_tasks", "check_pending", "_check_gpr_deviations",
+    ])
+    assert s.next_due() == datetime(2026, 10, 19, 18, 1)
+
+
+def test_downtime_catches_up_each_rule_once():
+    s = Recorder()
+    s.start(since=datetime(2026, 10, 19, 8, 0))
+    # Процесс стоял 3 часа: каждое пропущенное правило срабатывает один раз, не по числу пропусков
+    fired = asyncio.run(s.run_due(datetime(2026, 10, 19, 11, 0)))
+    names = [c[0] for c in s.calls]
+    assert fired == len(names) == 5
+    assert names.count("check_pending") == 1
+    assert "_check_approaching_deadlines" in names and "_send_weekly_audits" in names
+    assert s.next_due() == datetime(2026, 10, 19, 11, 1)
+
+
+def test_per_object_timer_and_cancel(monkeypatch):
+    s = Recorder()
+    s.start(since=datetime(2026, 10, 19, 12, 0))
+    import bot.services.trigger_engine as te
+
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 10, 19, 12, 0)
+
+    monkeypatch.setattr(te, "datetime", Clock)
+    s.schedule("plan_fact_requests", key=42, at=time(17, 30))
+    s.schedule("plan_fact_requests", key=43, at=time(17, 45))
+    s.cancel("plan_fact_requests", key=43)
+    asyncio.run(s.run_due(datetime(2026, 10, 19, 17, 50)))
+    plan_fact = [c for c in s.calls if c[0] == "_send_plan_fact_requests"]
+    assert plan_fact == [("_send_plan_fact_requests", 42)]
+
+
+def test_reschedule_moves_timer_instead_of_duplicating(monkeypatch):
+    s = Recorder()
+    s.start(since=datetime(2026, 10, 19, 12, 0))
+    import bot.services.trigger_engine as te
+
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 10, 19, 12, 0)
+
+    monkeypatch.setattr(te, "datetime", Clock)
+    s.schedule("plan_fact_requests", key=5, at=time(17, 30))
+    s.schedule("plan_fact_requests", key=5, at=time(18, 30))
+    s.schedule("plan_fact_requests")                    # глобальное правило после start()
+    asyncio.run(s.run_due(datetime(2026, 10, 19, 17, 50)))
+    asyncio.run(s.run_due(datetime(2026, 10, 19, 18, 40)))
+    plan_fact = [c for c in s.calls if c[0] == "_send_plan_fact_requests"]
+    assert plan_fact == [("_send_plan_fact_requests",), ("_send_plan_fact_requests", 5)]
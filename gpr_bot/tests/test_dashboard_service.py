@@ -0,0 +1,90 @@
+"""
+Dashboard Service — число SQL-запросов не зависит от числа объектов.
+Run: python3 -m pytest tests/test_dashboard_service.py -v
+"""
+import asyncio
+from collections import namedtuple
+from datetime import date
+
+from bot.db.models import ObjectStatus
+from bot.services.dashboard_service import build_dashboard
+
+CounterRow = namedtuple(
+    "CounterRow", "active_objects total_tasks overdue_tasks completed_tasks delayed_supplies"
+)
+ObjectRow = namedtuple(
+    "ObjectRow", "id name city status deadline_date task_total task_done task_overdue"
+)
+ProdRow = namedtuple("ProdRow", "object_id mod_plan mod_fact brk_plan brk_fact")
+KpiRow = namedtuple("KpiRow", "name unit plan fact")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def one(self):
+        return self._rows[0]
+
+    def all(self):
+        return self._rows
+
+
+class CountingSession:
+    """Заглушка AsyncSession: считает execute() и отдаёт строки по таблице запроса."""
+
+    def __init__(self, n_objects: int):
+        self.n_objects = n_objects
+        self.statements = 0
+
+    async def execute(self, stmt, params=None):
+        self.statements += 1
+        sql = str(stmt)
+        ids = range(1, self.n_objects + 1)
+        if "work_types.sequence_order" in sql:
+            return FakeResult([KpiRow("Монтаж модулей", "шт", 10.0 * self.n_objects, 4.0 * self.n_objects)])
+        if "floor_volumes" in sql:
+            return FakeResult([ProdRow(i, 10.0, 4.0, 20.0, 5.0) for i in ids])
+        if "objects.deadline_date" in sql:
+            return FakeResult([
+                ObjectRow(i, f"Объект {i}", "Москва", ObjectStatus.ACTIVE, date(2026, 12, 31), 10, 5, 1)
+                for i in ids
+            ])
+        return FakeResult([CounterRow(self.n_objects, 10 * self.n_objects, self.n_objects, 5 * self.n_objects, 0)])
+
+
+def _run(n_objects: int):
+    session = CountingSession(n_objects)
+    data = asyncio.run(build_dashboard(session))
+    return session.statements, data
+
+
+def test_statement_count_independent_of_objects():
+    small, _ = _run(1)
+    large, data = _run(200)
+    assert small == large
+    assert large <= 4
+    assert len(data["objects"]) == 200
+    assert len(data["production"]["by_object"]) == 200
+
+
+def test_dashboard_shape():
+    _, data = _run(3)
+    assert set(data) == {
+        "active_objects", "total_tasks", "overdue_tasks", "completed_tasks",
+        "delayed_supplies", "objects", "production",
+    }
+    obj = data["objects"][0]
+    assert obj["progress_pct"] == 50
+    assert obj["status"] == "active"
+    prod = data["production"]
+    assert prod["modules_plan"] == 30 and prod["modules_fact"] == 12
+    assert prod["modules_pct"] == 40.0
+    assert prod["brackets_plan"] == 60 and prod["brackets_pct"] == 25.0
+    assert prod["kpi"][0]["pct"] == 40.0
+
+
+if __name__ == "__main__":
+    test_statement_count_independent_of_objects()
+    test_dashboard_shape()
+    print("✅ dashboard service OK")
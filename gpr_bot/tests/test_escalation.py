@@ -0,0 +1,78 @@
+"""
+Escalation — один проход: число запросов не зависит от числа задач, ступени 1/3/7.
+Run: python3 -m pytest tests/test_escalation.py -v
+"""
+import asyncio
+from datetime import date, timedelta
+
+from bot.services.escalation import sweep_escalations
+
+TODAY = date(2026, 3, 10)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def scalars(self):
+        return self
+
+
+class CountingSession:
+    def __init__(self, n_tasks: int):
+        self.n_tasks = n_tasks
+        self.statements = []
+        self.inserted = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql.split()[0])
+        if sql.startswith("INSERT INTO notifications"):
+            self.inserted = params
+            return FakeResult(list(range(1000, 1000 + len(params))))
+        if "FROM tasks" in sql:
+            # Задачи по кругу 1/3/7 дней просрочки; у каждой пятой нет исполнителя
+            rows = []
+            for i in range(1, self.n_tasks + 1):
+                days = {1: 1, 2: 3, 0: 7}[i % 3]
+                assignee = (i, 9000 + i, f"User {i}") if i % 5 else (None, None, None)
+                rows.append((i, f"Задача {i}", TODAY - timedelta(days=days), i % 4 + 1, *assignee))
+            return FakeResult(rows)
+        if "object_roles" in sql:  # PM только у объектов 1 и 2
+            return FakeResult([(1, 100, 9100, "PM 1"), (2, 101, 9101, "PM 2"), (2, 102, 9102, "Админ 2")])
+        if "users.role" in sql:
+            return FakeResult([(200, 9200, "Директор")])
+        return FakeResult([])
+
+
+def _run(n_tasks: int):
+    session = CountingSession(n_tasks)
+    escalations = asyncio.run(sweep_escalations(session, TODAY))
+    return session, escalations
+
+
+def test_constant_query_count():
+    small, _ = _run(12)
+    large, _ = _run(10_000)
+    assert small.statements == large.statements
+    assert large.statements.count("INSERT") == 1
+
+
+def test_buckets_and_recipients():
+    session, escalations = _run(12)
+    # 1 день: i % 3 == 1 → 1, 4, 7, 10; без исполнителя (10) — пропуск
+    assignee_pushes = [e for e in escalations if e.notification_id is None]
+    assert sorted(e.telegram_id for e in assignee_pushes) == [9001, 9004, 9007]
+    # 3 дня: i % 3 == 2 → 2, 5, 8, 11; объекты 3, 2, 1, 4 → PM есть у 5 (двое) и 8 (один)
+    pm_rows = [r for r in session.inserted if r["title"].startswith("⚠️")]
+    assert sorted((r["entity_id"], r["user_id"]) for r in pm_rows) == [(5, 101), (5, 102), (8, 100)]
+    # 7 дней: i % 3 == 0 → 3, 6, 9, 12 — по директору на каждую
+    director_rows = [r for r in session.inserted if r["title"].startswith("🚨")]
+    assert sorted(r["entity_id"] for r in director_rows) == [3, 6, 9, 12]
+    # Каждый push эскалации связан со своим уведомлением
+    linked = [e.notification_id for e in escalations if e.notification_id is not None]
+    assert linked == list(range(1000, 1000 + len(session.inserted)))
+    assert any("Исполнитель: —" in e.text for e in escalations)   # задача 5 без исполнителя
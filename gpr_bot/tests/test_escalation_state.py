@@ -0,0 +1,139 @@
+"""
+Escalation state — учёт по сроку, воркер берёт только созревшие (SKIP LOCKED), ступени L1/L2/L3.
+Run: python3 -m pytest tests/test_escalation_state.py -v
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import EscalationState, Notification, NotificationType
+import bot.services.escalation_state as es
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+class FakeResult:
+    rowcount = 0
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, due):
+        self.due = due
+        self.statements = []
+        self.inserted = []
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO notifications"):
+            self.inserted = params
+            return FakeResult([])
+        if "FROM escalation_state" in sql:
+            return FakeResult(self.due)
+        if "object_roles" in sql:
+            return FakeResult([(7, 100, 9100)])
+        if "users.role" in sql:
+            return FakeResult([(200, 9200)])
+        if "FROM users" in sql:
+            return FakeResult([(1, 9001)])
+        return FakeResult([])
+
+
+def _due(level, created_minutes_ago, ntype="task_assigned"):
+    notif = Notification(id=level + 10, user_id=1, type=ntype, title="📋 Новая задача: Монтаж",
+                         entity_type="task", entity_id=5)
+    created = NOW - timedelta(minutes=created_minutes_ago)
+    state = EscalationState(notification_id=notif.id, subject_type="task", subject_id=5, object_id=7,
+                            level=level, created_at=created,
+                            next_escalation_at=es.next_escalation_at(ntype, created, level))
+    return state, notif
+
+
+def test_claim_only_due_rows_skip_locked():
+    stmt = asyncio.run(_capture_claim())
+    assert "WHERE escalation_state.next_escalation_at <=" in stmt
+    assert stmt.rstrip().endswith("FOR UPDATE OF escalation_state SKIP LOCKED")
+    assert "ORDER BY escalation_state.next_escalation_at" in stmt
+
+
+async def _capture_claim():
+    session = FakeSession([])
+    await es.claim_due(session, NOW)
+    return session.statements[0]
+
+
+def test_track_sets_first_threshold_and_skips_untimed_types():
+    session = FakeSession([])
+    notif = Notification(user_id=1, type="task_assigned", title="t", entity_type="task", entity_id=3)
+    state = es.track(session, notif, subject=("task", 5), object_id=7, now=NOW)
+    assert state.next_escalation_at == NOW + timedelta(minutes=60)
+    assert (state.subject_type, state.subject_id, state.level) == ("task", 5, 0)
+
+    digest = Notification(user_id=1, type=NotificationType.GENERAL, title="t")
+    assert es.track(session, digest, now=NOW) is None
+    assert session.added == [state]
+
+
+def test_levels_recipients_and_next_threshold():
+    due = [_due(0, 61), _due(1, 241), _due(2, 1441)]
+    session = FakeSession(due)
+    claimed, messages = asyncio.run(es.process_due(session, NOW))
+
+    assert claimed == 3
+    assert [m.chat_id for m in messages] == [9001, 9100, 9200]
+    assert [s.level for s, _ in due] == [1, 2, 3]
+    created = [s.created_at for s, _ in due]
+    assert due[0][0].next_escalation_at == created[0] + timedelta(minutes=240)
+    assert due[1][0].next_escalation_at == created[1] + timedelta(minutes=1440)
+    assert due[2][0].next_escalation_at is None          # ступеней больше нет — вне индекса
+    # Запись эскалации — только для L2/L3, одним INSERT
+    assert [r["user_id"] for r in session.inserted] == [100, 200]
+    assert sum(s.startswith("INSERT") for s in session.statements) == 1
+
+
+def test_plan_fact_has_no_l3():
+    state, notif = _due(1, 121, ntype="plan_fact_request")
+    session = FakeSession([(state, notif)])
+    asyncio.run(es.process_due(session, NOW))
+    assert state.level == 2 and state.next_escalation_at is None
+
+
+def test_nothing_due_is_one_query():
+    session = FakeSession([])
+    assert asyncio.run(es.process_due(session, NOW)) == (0, [])
+    assert len(session.statements) == 1
+
+
+def test_transition_out_of_assigned_clears_escalation(monkeypatch):
+    import bot.services.task_service as ts
+    from bot.db.models import Task, TaskStatus
+
+    task = Task(id=5, object_id=7, status=TaskStatus.ASSIGNED)
+
+    async def get_task(session, task_id):
+        return task
+
+    async def refresh(session, object_id):
+        pass
+
+    class Session(FakeSession):
+        async def flush(self):
+            pass
+
+    monkeypatch.setattr(ts, "get_task_by_id", get_task)
+    monkeypatch.setattr(ts, "refresh_object_stats", refresh)
+    session = Session([])
+    asyncio.run(ts.transition_task(session, 5, TaskStatus.IN_PROGRESS))
+    assert session.statements[0].startswith("DELETE FROM escalation_state")
+    assert "escalation_state.subject_type = %(subject_type_1)s" in session.statements[0]
@@ -0,0 +1,46 @@
+"""
+Fan-out — не больше concurrency чатов одновременно, порядок внутри чата, ошибки не прерывают рассылку.
+Run: python3 -m pytest tests/test_fanout.py -v
+"""
+import asyncio
+
+from bot.services.fanout import Outgoing, fan_out, fan_out_results
+
+
+class FakeBot:
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.in_flight = 0
+        self.peak = 0
+        self.sent = []
+        self.texts = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if chat_id in self.fail_for:
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+        self.sent.append(chat_id)
+        self.texts.append(text)
+
+
+def test_bounded_and_failure_isolated():
+    bot = FakeBot(fail_for={3, 7})
+    messages = [Outgoing(i, f"msg {i}") for i in range(50)]
+    ok = asyncio.run(fan_out(bot, messages, concurrency=4))
+    assert ok == 48
+    assert bot.peak <= 4
+    assert sorted(bot.sent) == [i for i in range(50) if i not in (3, 7)]
+
+
+def test_per_chat_order_and_results():
+    bot = FakeBot(fail_for={2})
+    messages = [Outgoing(chat_id, f"{chat_id}:{n}") for n in range(5) for chat_id in (1, 2, 3)]
+    results = asyncio.run(fan_out_results(bot, messages, concurrency=2))
+    assert len(results) == 15
+    assert {d.chat_id for d in results if not d.ok} == {2}
+    assert all("blocked" in d.error for d in results if not d.ok)
+    assert bot.peak <= 2
+    assert [t for t in bot.texts if t.startswith("1:")] == [f"1:{n}" for n in range(5)]
@@ -0,0 +1,82 @@
+"""
+Scheduler locks — одно выполнение на срабатывание по репликам, fencing, потеря lock.
+Run: python3 -m pytest tests/test_job_locks.py -v
+"""
+import asyncio
+
+import scheduler.locks as locks
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def set(self, key, value, px=None, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        if self.data.get(keys[0]) != str(argv[0]):
+            return 0
+        if script is locks._RELEASE:
+            del self.data[keys[0]]
+        elif script is locks._MARK_DONE:
+            self.data[keys[1]] = argv[1]
+        return 1
+
+
+def test_one_execution_per_firing_across_replicas(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(locks, "get_redis", lambda: redis)
+    runs = []
+
+    async def digest():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+
+    job = locks.singleton_job("daily_digest", min_gap=3600)(digest)
+
+    async def scenario():
+        # Две реплики одновременно, затем третья — с опозданием на то же срабатывание
+        await asyncio.gather(job(), job())
+        await job()
+
+    asyncio.run(scenario())
+    assert runs == [1]
+    assert "sched:lock:daily_digest" not in redis.data
+    assert redis.data["sched:fence:daily_digest"] == "3"
+    assert "sched:last:daily_digest" in redis.data
+
+
+def test_lost_lock_cancels_job(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(locks, "get_redis", lambda: redis)
+    finished = []
+
+    async def slow():
+        # Lock «истёк» и достался другой реплике
+        redis.data["sched:lock:escalation_check"] = "999"
+        await asyncio.sleep(1)
+        finished.append(1)
+
+    lock = locks.JobLock("escalation_check", ttl=0.03)
+
+    async def scenario():
+        try:
+            await lock.run(slow, min_gap=60)
+        except locks.LockLost:
+            return "lost"
+
+    assert asyncio.run(scenario()) == "lost"
+    assert finished == []
+    assert "sched:last:escalation_check" not in redis.data
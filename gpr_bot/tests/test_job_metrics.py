@@ -0,0 +1,100 @@
+"""
+Scheduler metrics — длительность, счётчики прогона, последний успех, сигнал о долгом прогоне.
+Run: python3 -m pytest tests/test_job_metrics.py -v
+"""
+import asyncio
+from types import SimpleNamespace
+
+import bot.services.outbound as ob
+import scheduler.metrics as metrics
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self.ops.append((name, a, kw))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*a, **kw) for name, a, kw in self.ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def hincrby(self, key, field, amount):
+        h = self.hashes.setdefault(key, {})
+        h[field] = str(int(h.get(field, 0)) + amount)
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def scan_iter(self, match):
+        for key in list(self.hashes):
+            yield key
+
+
+def _setup(monkeypatch, fraction=0.5, admins=()):
+    redis = FakeRedis()
+    alerts = []
+
+    async def enqueue_many(messages):
+        alerts.extend(messages)
+
+    monkeypatch.setattr(metrics, "get_redis", lambda: redis)
+    monkeypatch.setattr(metrics, "_settings",
+                        lambda: SimpleNamespace(job_overrun_fraction=fraction, admin_ids=list(admins)))
+    monkeypatch.setattr(ob, "enqueue_many", enqueue_many)
+    return redis, alerts
+
+
+def test_run_counters_and_last_success(monkeypatch):
+    redis, _ = _setup(monkeypatch)
+
+    @metrics.instrumented("check_overdue_tasks", period=3600)
+    async def job():
+        metrics.count(rows_scanned=120, notifications=7)
+        metrics.count(sends_attempted=9)
+
+    @metrics.instrumented("check_overdue_tasks", period=3600)
+    async def broken():
+        metrics.count(rows_scanned=3)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        await job()
+        try:
+            await broken()
+        except RuntimeError:
+            pass
+        return await metrics.get_job_metrics()
+
+    stats = asyncio.run(scenario())["check_overdue_tasks"]
+    assert stats["runs"] == 2 and stats["failures"] == 1
+    assert stats["rows_scanned"] == 123 and stats["notifications"] == 7 and stats["sends_attempted"] == 9
+    assert stats["last_success"] is not None and stats["period"] == 3600
+    assert stats["histogram"] == {"0.1": 2}
+    metrics.count(rows_scanned=1)  # вне прогона — ничего не делает
+
+
+def test_overrun_alerts_while_running(monkeypatch):
+    redis, alerts = _setup(monkeypatch, fraction=0.5, admins=[1, 2])
+
+    @metrics.instrumented("escalation_check", period=0.04)
+    async def slow():
+        await asyncio.sleep(0.08)
+
+    asyncio.run(slow())
+    stats = redis.hashes["sched:metrics:escalation_check"]
+    assert stats["overruns"] == "1"
+    assert [m.chat_id for m in alerts] == [1, 2]
+    assert "escalation_check" in alerts[0].text
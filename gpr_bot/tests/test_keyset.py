@@ -0,0 +1,56 @@
+"""
+Keyset — курсор (created_at, id), страницы без пропусков и повторов.
+Run: python3 -m pytest tests/test_keyset.py -v
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import Notification
+from bot.services.keyset import apply_keyset, decode_cursor, encode_cursor, make_page
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trip_and_garbage():
+    ts = datetime(2026, 3, 1, 9, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_feed_once():
+    base = datetime(2026, 3, 1)
+    # одинаковые created_at у соседних строк — порядок решает id
+    feed = sorted(
+        (SimpleNamespace(id=i, created_at=base + timedelta(minutes=i // 2)) for i in range(1, 12)),
+        key=lambda r: (r.created_at, r.id), reverse=True,
+    )
+    seen, cursor = [], None
+    while True:
+        if cursor:
+            ts, rid = decode_cursor(cursor)
+            rows = [r for r in feed if (r.created_at, r.id) < (ts, rid)]
+        else:
+            rows = feed
+        page = make_page(rows[:4], 3)
+        seen += [r.id for r in page.items]
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert seen == [r.id for r in feed]
+
+
+def test_apply_keyset_sql():
+    cursor = encode_cursor(datetime(2026, 3, 1), 7)
+    q = apply_keyset(select(Notification), Notification.created_at, Notification.id, cursor, 50)
+    sql = _sql(q)
+    assert "(notifications.created_at, notifications.id) < ('2026-03-01 00:00:00', 7)" in sql
+    assert "ORDER BY notifications.created_at DESC, notifications.id DESC" in sql
+    assert "LIMIT 51" in sql
+
@@ -0,0 +1,54 @@
+"""
+Missing fact — один запрос на весь портфель, группировка получателей по объекту.
+Run: python3 -m pytest tests/test_missing_fact.py -v
+"""
+import asyncio
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import DailyPlanFact
+from bot.services.missing_fact import find_missing_facts, missing_fact_query
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class CountingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = 0
+
+    async def execute(self, stmt, params=None):
+        self.statements += 1
+        return FakeResult(self.rows)
+
+
+def test_single_anti_join_query():
+    sql = str(missing_fact_query(date(2026, 10, 16)).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("SELECT DISTINCT objects.id, objects.name, users.telegram_id")
+    assert "JOIN object_roles" in sql and "JOIN users" in sql
+    assert "NOT (EXISTS (SELECT" in sql
+    assert "daily_plan_fact.object_id = objects.id" in sql
+    assert "daily_plan_fact.fact_volume >" in sql
+
+
+def test_object_date_index_declared():
+    indexes = {ix.name: [c.name for c in ix.columns] for ix in DailyPlanFact.__table__.indexes}
+    assert indexes["ix_daily_plan_fact_object_date"] == ["object_id", "date"]
+
+
+def test_recipients_grouped_per_object():
+    rows = [(1, "ЖК Север", 9001), (1, "ЖК Север", 9002), (5, "ЖК Юг", 9003)]
+    session = CountingSession(rows)
+    missing = asyncio.run(find_missing_facts(session, date(2026, 10, 16)))
+    assert session.statements == 1
+    assert [(m.object_id, m.object_name, m.telegram_ids) for m in missing] == [
+        (1, "ЖК Север", [9001, 9002]),
+        (5, "ЖК Юг", [9003]),
+    ]
@@ -0,0 +1,56 @@
+"""
+Notification Center — категория как SQL-условие, сводка из счётчиков, read-all одним UPDATE.
+Run: python3 -m pytest tests/test_notification_center.py -v
+"""
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import Notification
+from bot.services.notification_center import (
+    category_clause, category_of, mark_all_read, summarize_unread,
+)
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_category_clause():
+    assert category_of("supply_delayed") == "supply"
+    assert category_of("something_new") == "system"
+    assert "IN ('cascade_shift', 'material_received'" in _sql(select(Notification).where(category_clause("supply")))
+    assert "NOT IN" in _sql(select(Notification).where(category_clause("system")))
+    assert "false" in _sql(select(Notification).where(category_clause("nope")))
+
+
+def test_summarize_unread():
+    by_type = {"escalation_l2": 1200, "supply_delayed": 3, "task_assigned": 5, "general": 2}
+    s = summarize_unread(by_type, actionable_types={"task_assigned", "escalation_l2"})
+    assert s["total_unread"] == 1210
+    assert s["by_category"] == {"escalation": 1200, "supply": 3, "tasks": 5, "system": 2}
+    assert s["critical_unread"] == 1203
+    assert s["pending_actions"] == 1205
+    assert s["escalations_active"] == 1200
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+        class Result:
+            rowcount = 7
+        return Result()
+
+
+def test_mark_all_read_is_one_update():
+    session = RecordingSession()
+    assert asyncio.run(mark_all_read(session, 11, "supply")) == 7
+    assert len(session.statements) == 1
+    sql = _sql(session.statements[0])
+    assert sql.startswith("UPDATE notifications SET is_read=true")
+    assert "notifications.user_id = 11" in sql and "'supply_delayed'" in sql
@@ -0,0 +1,47 @@
+"""
+Object Detail — карточка объекта одним SELECT (объект + object_stats + команда).
+Run: python3 -m pytest tests/test_object_detail.py -v
+"""
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import ConstructionObject
+from bot.services.object_detail import detail_select, load_object_detail
+from bot.services.object_stats import STAT_FIELDS
+
+
+def test_detail_is_one_statement():
+    sql = str(detail_select(5).compile(dialect=postgresql.dialect()))
+    assert sql.count("SELECT") == 2  # внешний + скалярный подзапрос команды
+    assert "LEFT OUTER JOIN object_stats" in sql
+    assert "json_agg(json_build_object" in sql and "ORDER BY object_roles.id" in sql
+
+
+class OneRowSession:
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.calls = 0
+
+    async def execute(self, stmt):
+        self.calls += 1
+        row = SimpleNamespace(_mapping=self.mapping) if self.mapping else None
+        return SimpleNamespace(one_or_none=lambda: row)
+
+
+def test_load_object_detail_single_round_trip():
+    obj = ConstructionObject(id=5, name="A")
+    mapping = {ConstructionObject: obj, "stats_object_id": 5, "team": [{"user_id": 1, "full_name": "X", "role": "pto"}]}
+    mapping.update({f: i for i, f in enumerate(STAT_FIELDS)})
+    session = OneRowSession(mapping)
+
+    detail = asyncio.run(load_object_detail(session, 5))
+    assert session.calls == 1
+    assert detail["object"] is obj
+    assert detail["stats"]["task_done"] == 1 and detail["stats"]["stage_accepted"] == 7
+    assert detail["team"][0]["role"] == "pto"
+
+
+def test_missing_object():
+    assert asyncio.run(load_object_detail(OneRowSession(None), 404)) is None
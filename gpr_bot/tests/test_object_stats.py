@@ -0,0 +1,57 @@
+"""
+Object Stats — пересчёт строки объекта под блокировкой objects, затем upsert.
+Run: python3 -m pytest tests/test_object_stats.py -v
+"""
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from bot.services.object_stats import refresh_object_stats
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.info = {}
+
+    async def flush(self):
+        self.statements.append("FLUSH")
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+def test_refresh_locks_objects_before_recompute():
+    session = RecordingSession()
+    asyncio.run(refresh_object_stats(session, 3, None, 1, 3))
+    flush, lock, upsert = session.statements
+    assert flush == "FLUSH"
+    assert lock.startswith("SELECT objects.id") and lock.endswith("ORDER BY objects.id FOR NO KEY UPDATE")
+    assert upsert.startswith("INSERT INTO object_stats") and "ON CONFLICT (object_id) DO UPDATE" in upsert
+    assert session.info["changed_objects"] == {1, 3}
+
+
+def test_object_card_reads_rollup():
+    from bot.db.models import ConstructionObject, ObjectStatus
+    from bot.handlers.objects import _object_card
+
+    row = {"object_id": 3, "task_total": 8, "task_done": 6, "task_overdue": 2, "task_in_progress": 0,
+           "supply_total": 0, "supply_delayed": 0, "stage_total": 0, "stage_accepted": 0}
+
+    class Result:
+        def mappings(self):
+            return self
+
+        def all(self):
+            return [row]
+
+    class Session(RecordingSession):
+        async def execute(self, stmt, params=None):
+            await super().execute(stmt, params)
+            return Result()
+
+    session = Session()
+    obj = ConstructionObject(id=3, name="ЖК Север", status=ObjectStatus.ACTIVE)
+    text = asyncio.run(_object_card(session, obj))
+    assert "✅ 6/8 задач" in text and "🔴 2 просрочено" in text and "75%" in text
+    assert len(session.statements) == 1 and "FROM object_stats" in session.statements[0]
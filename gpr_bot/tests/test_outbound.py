@@ -0,0 +1,211 @@
+"""
+Outbound — token bucket, сериализация в поток, доставка с RetryAfter и порядком внутри чата,
+учёт доставки и пропуск недоступных чатов.
+Run: python3 -m pytest tests/test_outbound.py -v
+"""
+import asyncio
+
+from contextlib import asynccontextmanager
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+import bot.services.delivery_log as dl
+import bot.services.outbound as ob
+from bot.services.fanout import Outgoing
+
+
+def test_token_bucket_spacing_and_pause():
+    bucket = ob.TokenBucket(rate=2.0, capacity=2)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    bucket.pause(10, now)
+    assert bucket.reserve(now) == 10
+    assert ob.chat_bucket(-100500).capacity == ob.GROUP_BURST
+
+
+def test_encode_decode_round_trip():
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="OK", callback_data="task_accept:1")]])
+    msg, enqueued_at = ob._decode(ob._encode(Outgoing(42, "<b>hi</b>", reply_markup=kb)))
+    assert msg.chat_id == 42 and msg.text == "<b>hi</b>" and msg.parse_mode == "HTML"
+    assert msg.reply_markup.inline_keyboard[0][0].callback_data == "task_accept:1"
+    assert enqueued_at > 0
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self.ops.append((name, a, kw))
+
+    async def execute(self):
+        for name, a, kw in self.ops:
+            await getattr(self.redis, name)(*a, **kw)
+
+
+class FakeRedis:
+    def __init__(self, unreachable=()):
+        self.acked = []
+        self.hash = {}
+        self.lists = {}
+        self.unreachable = {str(c) for c in unreachable}
+
+    async def smismember(self, key, members):
+        return [int(m in self.unreachable) for m in members]
+
+    async def sadd(self, key, *members):
+        self.unreachable.update(members)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def xack(self, stream, group, *entry_ids):
+        self.acked.extend(entry_ids)
+
+    async def hincrby(self, key, field, n):
+        self.hash[field] = self.hash.get(field, 0) + n
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    async def ltrim(self, key, start, end):
+        pass
+
+
+class FlakyBot:
+    def __init__(self):
+        self.sent = []
+        self.flooded = False
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id == 1 and not self.flooded:
+            self.flooded = True
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Flood", retry_after=0)
+        if chat_id == 3:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), "bot was blocked by the user")
+        self.sent.append((chat_id, text))
+
+
+def test_dispatcher_retries_keeps_order_and_acks(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(ob, "get_redis", lambda: redis)
+    monkeypatch.setattr(ob, "PRIVATE_RATE", 1000.0)
+    bot = FlakyBot()
+    dispatcher = ob.OutboundDispatcher(bot, consumer="test")
+
+    entries = [
+        (f"{i}-0", ob._encode(Outgoing(chat_id, f"{chat_id}:{n}")))
+        for i, (chat_id, n) in enumerate([(1, 1), (2, 1), (1, 2), (3, 1), (1, 3)])
+    ]
+    asyncio.run(dispatcher.process(entries))
+
+    assert [t for c, t in bot.sent if c == 1] == ["1:1", "1:2", "1:3"]
+    assert (2, "2:1") in bot.sent
+    assert sorted(redis.acked) == sorted(e[0] for e in entries)
+    assert redis.hash == {"sent": 4, "retried": 1, "failed": 1}
+    assert len(redis.lists[ob.LATENCY_KEY]) == 4
+
+
+def test_waiting_chat_does_not_block_others(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(ob, "get_redis", lambda: redis)
+    monkeypatch.setattr(ob, "PRIVATE_RATE", 20.0)       # 50 мс между сообщениями одного чата
+    bot = FlakyBot()
+    bot.flooded = True
+    dispatcher = ob.OutboundDispatcher(bot, consumer="test", concurrency=1)
+
+    entries = [
+        (f"{i}-0", ob._encode(Outgoing(chat_id, f"{chat_id}:{n}")))
+        for i, (chat_id, n) in enumerate([(1, 1), (1, 2), (1, 3), (2, 1)])
+    ]
+    asyncio.run(dispatcher.process(entries))
+
+    # Единственный слот отправки не держится, пока чат 1 ждёт свой bucket
+    assert bot.sent == [(1, "1:1"), (2, "2:1"), (1, "1:2"), (1, "1:3")]
+    assert sorted(redis.acked) == sorted(e[0] for e in entries)
+
+
+def test_trimmed_and_broken_entries_are_acked_not_retried(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(ob, "get_redis", lambda: redis)
+    monkeypatch.setattr(ob, "PRIVATE_RATE", 1000.0)
+    bot = FlakyBot()
+    dispatcher = ob.OutboundDispatcher(bot, consumer="test")
+
+    entries = [
+        ("1-0", {}),                                  # тело срезано MAXLEN, id остался в PEL
+        ("2-0", {"text": "без chat_id"}),
+        ("3-0", ob._encode(Outgoing(2, "2:1"))),
+    ]
+    asyncio.run(dispatcher.process(entries))
+
+    assert bot.sent == [(2, "2:1")]
+    assert sorted(redis.acked) == ["1-0", "2-0", "3-0"]
+    assert redis.hash["dropped"] == 2
+
+
+class FakeSession:
+    def __init__(self, fail_insert=False):
+        self.statements = []
+        self.commits = 0
+        self.fail_insert = fail_insert
+
+    async def execute(self, stmt, params=None):
+        if self.fail_insert and params:
+            raise RuntimeError("insert or update on table message_deliveries violates foreign key constraint")
+        self.statements.append((stmt, params))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _unreachable_setup(monkeypatch, session):
+    redis = FakeRedis(unreachable={4})
+    monkeypatch.setattr(ob, "get_redis", lambda: redis)
+    monkeypatch.setattr(dl, "get_redis", lambda: redis)
+    monkeypatch.setattr(ob, "PRIVATE_RATE", 1000.0)
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    bot = FlakyBot()
+    dispatcher = ob.OutboundDispatcher(bot, consumer="test", session_factory=session_factory)
+    entries = [
+        (f"{i}-0", ob._encode(Outgoing(chat_id, f"{chat_id}:{n}", object_id=7)))
+        for i, (chat_id, n) in enumerate([(3, 1), (3, 2), (4, 1), (2, 1)])
+    ]
+    asyncio.run(dispatcher.process(entries))
+    return redis, bot
+
+
+def test_unreachable_chats_are_recorded_and_skipped(monkeypatch):
+    session = FakeSession()
+    redis, bot = _unreachable_setup(monkeypatch, session)
+
+    assert bot.sent == [(2, "2:1")]
+    assert "3" in redis.unreachable
+    records = next(params for stmt, params in session.statements if params)
+    outcomes = {(r["chat_id"], r["status"]) for r in records}
+    assert outcomes == {(3, "failed"), (3, "skipped"), (4, "skipped"), (2, "sent")}
+    assert all(r["object_id"] == 7 for r in records)
+    assert session.commits == 2              # отметки недоступных и журнал — отдельно
+    assert redis.hash["skipped"] == 2
+
+
+def test_failed_delivery_log_keeps_unreachable_marks(monkeypatch):
+    session = FakeSession(fail_insert=True)
+    redis, _ = _unreachable_setup(monkeypatch, session)
+
+    assert "3" in redis.unreachable
+    assert session.commits == 1 and len(session.statements) == 2   # UPDATE users, UPDATE object_chats
+
+
+def test_unreachable_error_classification():
+    method = SendMessage(chat_id=1, text="x")
+    assert dl.is_unreachable_error(TelegramForbiddenError(method, "Forbidden: bot was blocked by the user"))
+    assert dl.is_unreachable_error(TelegramBadRequest(method, "Bad Request: chat not found"))
+    assert not dl.is_unreachable_error(TelegramBadRequest(method, "Bad Request: can't parse entities"))
@@ -0,0 +1,84 @@
+"""
+Outbox — публикация с ключом идемпотентности, обработка пачки: done / повтор / failed.
+Run: python3 -m pytest tests/test_outbox.py -v
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+import bot.services.outbox as outbox
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _row(id, event, attempts=0, **payload):
+    return SimpleNamespace(id=id, event=event, payload=payload, status="pending",
+                           attempts=attempts, last_error=None, available_at=None, processed_at=None)
+
+
+def test_publish_ignores_duplicate_key():
+    session = FakeSession()
+    asyncio.run(outbox.publish(session, "task_status_changed", "task_status:1:abc", task_id=1))
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (idempotency_key) DO NOTHING" in sql
+    assert outbox.event_key("task_status:1", "tg:42") == "task_status:1:tg:42"
+    assert outbox.event_key("task_status:1") != outbox.event_key("task_status:1")
+
+
+def test_process_batch_marks_done_retries_and_fails(monkeypatch):
+    handled = []
+
+    async def ok(session, payload):
+        handled.append(payload["task_id"])
+
+    async def boom(session, payload):
+        raise RuntimeError("redis down")
+
+    monkeypatch.setitem(outbox.HANDLERS, "ok", ok)
+    monkeypatch.setitem(outbox.HANDLERS, "boom", boom)
+    rows = [
+        _row(1, "ok", task_id=10),
+        _row(2, "boom"),
+        _row(3, "boom", attempts=outbox.MAX_ATTEMPTS - 1),
+        _row(4, "unknown"),
+    ]
+
+    async def claim(session, limit):
+        return rows
+
+    monkeypatch.setattr(outbox, "claim", claim)
+    session = FakeSession()
+    assert asyncio.run(outbox.process_batch(session)) == 4
+
+    assert handled == [10]
+    assert rows[0].status == "done" and rows[0].processed_at
+    assert rows[1].status == "pending" and rows[1].attempts == 1 and rows[1].available_at
+    assert rows[1].last_error == "redis down"
+    assert rows[2].status == "failed"
+    assert rows[3].status == "pending" and "no handler" in rows[3].last_error
+    assert session.commits == 1
+
+
+def test_worker_entry_point_registers_handlers():
+    """Сервис запускается как python -m bot.outbox_worker — обработчики в том же HANDLERS, что читает пул."""
+    import runpy
+
+    namespace = runpy.run_module("bot.outbox_worker", run_name="outbox_worker_test")
+    assert namespace["OutboxWorkerPool"] is outbox.OutboxWorkerPool
+    assert {"task_status_changed", "task_assigned"} <= set(outbox.HANDLERS)
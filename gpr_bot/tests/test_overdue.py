@@ -0,0 +1,69 @@
+"""
+Overdue — число запросов не зависит от числа просроченных задач.
+Run: python3 -m pytest tests/test_overdue.py -v
+"""
+import asyncio
+from collections import namedtuple
+from datetime import date
+
+from bot.services.overdue import mark_overdue_tasks
+
+Returned = namedtuple("Returned", "id title deadline object_id assignee_id")
+UserRow = namedtuple("UserRow", "id telegram_id full_name")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class CountingSession:
+    def __init__(self, n_tasks: int):
+        self.n_tasks = n_tasks
+        self.statements = []
+        self.info = {}
+
+    async def flush(self):
+        pass
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql.split()[0])
+        if sql.startswith("UPDATE tasks"):
+            return FakeResult([
+                Returned(i, f"Задача {i}", date(2026, 1, 1), i % 7 + 1, i % 13 or None)
+                for i in range(1, self.n_tasks + 1)
+            ])
+        if "UNION" in sql:  # PM только у объекта 1
+            return FakeResult([(1, 100, 9100, "PM объекта")])
+        if sql.startswith("SELECT users.id"):
+            if "users.role" in sql:
+                return FakeResult([UserRow(200, 9200, "Дежурный PM")])
+            return FakeResult([UserRow(u, 9000 + u, f"User {u}") for u in range(1, 13)])
+        return FakeResult([])
+
+
+def _run(n_tasks: int):
+    session = CountingSession(n_tasks)
+    overdue = asyncio.run(mark_overdue_tasks(session, date(2026, 3, 1)))
+    return session.statements, overdue
+
+
+def test_constant_query_count():
+    small, _ = _run(5)
+    large, overdue = _run(5000)
+    assert small == large
+    assert large.count("UPDATE") == 1 and large.count("INSERT") == 2  # notifications + object_stats upsert
+    assert len(overdue) == 5000
+
+
+def test_recipients_resolved_from_preloaded_maps():
+    _, overdue = _run(20)
+    by_id = {t.id: t for t in overdue}
+    assert by_id[1].assignee.telegram_id == 9001
+    assert by_id[13].assignee is None
+    assert [p.id for p in by_id[7].pms] == [100]      # объект 1 — свой PM
+    assert [p.id for p in by_id[1].pms] == [200]      # объект 2 — общий список PM
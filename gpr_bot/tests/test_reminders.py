@@ -0,0 +1,31 @@
+"""
+Reminders — dedupe_key, anti-join и ON CONFLICT в одном INSERT … SELECT.
+Run: python3 -m pytest tests/test_reminders.py -v
+"""
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from bot.services.reminders import REMINDER_24H, REMINDER_TODAY, reminder_key, reminders_insert
+
+
+def _sql(kind):
+    inserted = reminders_insert(kind, date(2026, 10, 18), date(2026, 10, 17))
+    stmt = select(inserted.c.id, inserted.c.text)
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_key_format():
+    assert reminder_key(REMINDER_24H, 123, date(2026, 10, 17)) == "reminder:24h:task:123:2026-10-17"
+
+
+def test_single_statement_anti_join_and_conflict_guard():
+    sql = _sql(REMINDER_24H)
+    assert sql.startswith("WITH inserted AS")
+    assert "INSERT INTO notifications" in sql and "dedupe_key" in sql
+    assert "NOT (EXISTS (SELECT" in sql
+    assert "ON CONFLICT (dedupe_key) WHERE dedupe_key IS NOT NULL DO NOTHING" in sql
+    assert "RETURNING notifications.id" in sql
+    assert "to_char(tasks.deadline" in sql
+    assert "to_char" not in _sql(REMINDER_TODAY)
@@ -0,0 +1,179 @@
+"""
+Response Cache — MISS → HIT → BYPASS, сброс по тегу объекта; ETag → 304.
+Run: python3 -m pytest tests/test_response_cache.py -v
+"""
+import asyncio
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import api.cache as api_cache
+import bot.services.response_cache as rc
+from api.cache import cached, etag
+from bot.services.object_changes import mark_object_changed
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append(lambda: self.redis.data.__setitem__(key, value))
+
+    def sadd(self, tag, key):
+        self.ops.append(lambda: self.redis.data.setdefault(tag, set()).add(key))
+
+    def expire(self, *args):
+        pass
+
+    async def execute(self):
+        for op in self.ops:
+            op()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def hincrby(self, key, field, n):
+        h = self.data.setdefault(key, {})
+        h[field] = h.get(field, 0) + n
+
+    async def hgetall(self, key):
+        return {f: str(v) for f, v in self.data.get(key, {}).items()}
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+def _client(calls):
+    app = FastAPI()
+
+    @app.get("/objects/{object_id}/heavy")
+    @cached(ttl=60)
+    async def heavy(object_id: int, q: str | None = None):
+        calls.append(object_id)
+        return {"id": object_id, "q": q}
+
+    return TestClient(app)
+
+
+def test_hit_miss_bypass_and_invalidation(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rc, "get_redis", lambda: redis)
+    calls = []
+    client = _client(calls)
+
+    assert client.get("/objects/3/heavy?q=a").headers["X-Cache"] == "MISS"
+    r = client.get("/objects/3/heavy?q=a")
+    assert r.headers["X-Cache"] == "HIT" and r.json() == {"id": 3, "q": "a"}
+    assert client.get("/objects/3/heavy?q=b").headers["X-Cache"] == "MISS"
+    assert client.get("/objects/3/heavy?q=a", headers={"X-Cache-Bypass": "1"}).headers["X-Cache"] == "BYPASS"
+    assert len(calls) == 3
+
+    asyncio.run(rc.invalidate_objects(3))
+    assert client.get("/objects/3/heavy?q=a").headers["X-Cache"] == "MISS"
+
+    stats = asyncio.run(rc.get_stats())["/objects/{object_id}/heavy"]
+    assert stats["hit"] == 1 and stats["miss"] == 3 and stats["bypass"] == 1
+
+
+def test_cached_body_goes_through_response_model(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rc, "get_redis", lambda: redis)
+    app = FastAPI()
+
+    class Out(BaseModel):
+        id: int
+        name: str | None = None
+
+    @app.get("/objects/{object_id}/card", response_model=Out, response_model_exclude_none=True)
+    @cached(ttl=60)
+    async def card(object_id: int):
+        return {"id": object_id, "secret": "internal"}
+
+    client = TestClient(app)
+    miss, hit = client.get("/objects/3/card"), client.get("/objects/3/card")
+    assert miss.headers["X-Cache"] == "MISS" and hit.headers["X-Cache"] == "HIT"
+    assert miss.json() == hit.json() == {"id": 3}
+
+
+def test_etag_not_modified_until_version_bump(monkeypatch):
+    versions = {5: 7}
+
+    async def fake_version(db, object_id):
+        return versions.get(object_id)
+
+    monkeypatch.setattr(api_cache, "get_object_version", fake_version)
+    calls = []
+    app = FastAPI()
+
+    @app.get("/objects/{object_id}/view")
+    @etag()
+    async def view(object_id: int, db=Depends(lambda: object())):
+        calls.append(object_id)
+        return {"id": object_id}
+
+    client = TestClient(app)
+    r = client.get("/objects/5/view")
+    assert r.status_code == 200 and r.headers["ETag"] == 'W/"5-7"'
+    assert client.get("/objects/5/view", headers={"If-None-Match": 'W/"5-7"'}).status_code == 304
+    assert len(calls) == 1
+
+    versions[5] = 8
+    r = client.get("/objects/5/view", headers={"If-None-Match": 'W/"5-7"'})
+    assert r.status_code == 200 and r.headers["ETag"] == 'W/"5-8"'
+    assert client.get("/objects/404/view").headers.get("ETag") is None
+
+
+def test_cache_key_follows_data_version(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rc, "get_redis", lambda: redis)
+    versions = {5: 7}
+    version_reads = []
+
+    async def fake_version(db, object_id):
+        version_reads.append(object_id)
+        return versions.get(object_id)
+
+    monkeypatch.setattr(api_cache, "get_object_version", fake_version)
+    body = {"n": 1}
+    app = FastAPI()
+
+    @app.get("/objects/{object_id}/view")
+    @etag()
+    @cached(ttl=60)
+    async def view(object_id: int, db=Depends(lambda: object())):
+        return dict(body)
+
+    client = TestClient(app)
+    assert client.get("/objects/5/view").headers["X-Cache"] == "MISS"
+    assert client.get("/objects/5/view").headers["X-Cache"] == "HIT"
+    assert version_reads == [5, 5]          # версию читает только @etag
+
+    # Commit поднял версию, а сброс тега ещё не дошёл — старый ответ не отдаётся
+    versions[5], body["n"] = 8, 2
+    r = client.get("/objects/5/view")
+    assert r.headers["X-Cache"] == "MISS" and r.json() == {"n": 2} and r.headers["ETag"] == 'W/"5-8"'
+
+
+def test_mark_object_changed_collects_ids():
+    class FakeSession:
+        info = {}
+
+    session = FakeSession()
+    mark_object_changed(session, 1, None, 2)
+    mark_object_changed(session, 2)
+    assert session.info["changed_objects"] == {1, 2}
@@ -0,0 +1,45 @@
+"""
+Throttling — общий для реплик лимит через Redis SET NX PX, локальный fallback.
+Run: python3 -m pytest tests/test_throttling.py -v
+"""
+import asyncio
+
+import bot.middlewares.throttling as th
+
+
+class FakeRedis:
+    def __init__(self):
+        self.keys = {}
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+
+class DownRedis:
+    async def set(self, *a, **kw):
+        raise ConnectionError("redis down")
+
+
+def test_second_action_throttled_across_replicas(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(th, "get_redis", lambda: redis)
+
+    async def scenario():
+        # Две «реплики» — один Redis
+        return [await th._allow(42), await th._allow(42), await th._allow(7)]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert "throttle:42" in redis.keys
+
+
+def test_local_fallback_when_redis_down(monkeypatch):
+    monkeypatch.setattr(th, "get_redis", lambda: DownRedis())
+    monkeypatch.setattr(th, "_user_last_action", {})
+
+    async def scenario():
+        return [await th._allow(42), await th._allow(42)]
+
+    assert asyncio.run(scenario()) == [True, False]
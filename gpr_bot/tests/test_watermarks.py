@@ -0,0 +1,53 @@
+"""
+Watermarks — инкрементальный скан: порог срока или изменение после прошлого прогона.
+Run: python3 -m pytest tests/test_watermarks.py -v
+"""
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from bot.db.models import SupplyOrder, Task, TaskStatus
+from bot.services.watermarks import Watermark, save_watermark
+
+
+def _sql(clause):
+    stmt = update(Task).where(Task.status != TaskStatus.DONE, clause).values(status=TaskStatus.OVERDUE)
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_first_run_scans_everything():
+    mark = Watermark("check_overdue_tasks")
+    assert mark.is_new_day(date(2026, 10, 17))
+    for clause in (mark.crossed_or_changed(Task.deadline, Task.updated_at), mark.changed(Task.updated_at)):
+        assert _sql(clause).endswith("WHERE tasks.status != 'done'")   # true() без доп. условий
+
+
+def test_incremental_predicate():
+    mark = Watermark("check_overdue_tasks", datetime(2026, 10, 17, 8, 55), date(2026, 10, 17))
+    sql = _sql(mark.crossed_or_changed(Task.deadline, Task.updated_at))
+    assert "tasks.deadline >= '2026-10-17'" in sql
+    assert "tasks.updated_at > '2026-10-17 08:55:00'" in sql
+    assert " OR " in sql
+    assert not mark.is_new_day(date(2026, 10, 17)) and mark.is_new_day(date(2026, 10, 18))
+
+
+def test_indexes_back_the_scan():
+    task_ix = {ix.name for ix in Task.__table__.indexes}
+    supply_ix = {ix.name: [c.name for c in ix.columns] for ix in SupplyOrder.__table__.indexes}
+    assert {"ix_tasks_status_deadline", "ix_tasks_updated_at"} <= task_ix
+    assert supply_ix["ix_supply_orders_status_expected"] == ["status", "expected_date"]
+    assert supply_ix["ix_supply_orders_updated_at"] == ["updated_at"]
+
+
+def test_save_is_upsert_with_lag():
+    class Session:
+        async def execute(self, stmt):
+            self.sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    session = Session()
+    asyncio.run(save_watermark(session, "check_delayed_supplies", date(2026, 10, 17)))
+    assert session.sql.startswith("INSERT INTO job_watermarks")
+    assert "ON CONFLICT (job) DO UPDATE" in session.sql
+    assert "LOCALTIMESTAMP -" in session.sql